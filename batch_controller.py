@@ -0,0 +1,162 @@
+# batch_controller.py
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+# Abgestimmte Werte je Modell bleiben über Läufe und Sitzungen hinweg erhalten
+DEFAULT_TUNING_PATH = os.environ.get(
+    "BONSAI_BATCH_TUNING_PATH", os.path.join(tempfile.gettempdir(), "bonsai_batch_tuning.json")
+)
+
+# Sitzungen im selben Prozess schreiben die Datei nacheinander (Lesen, Ändern, Schreiben)
+_tuning_lock = threading.Lock()
+
+# Startwerte und Grenzen
+INITIAL_TOKEN_BUDGET = 800
+MIN_TOKEN_BUDGET = 100
+MAX_TOKEN_BUDGET = 3000  # Antworten sind auf max_tokens=4096 begrenzt
+TOKEN_BUDGET_STEP = 200
+INITIAL_CONCURRENCY = 8
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+CONCURRENCY_STEP = 1
+DECREASE_FACTOR = 0.5
+
+# Schwellen für den Rückzug
+LATENCY_TARGET_SECONDS = 20.0
+MAX_RATE_LIMITED_SHARE = 0.05
+MAX_PARSE_FAILURE_SHARE = 0.05
+
+# Rollierendes Fenster und Anpassungstakt (in abgeschlossenen Batches)
+WINDOW = 20
+ADJUST_EVERY = 4
+
+# Hedging: frühestens nach so vielen Beobachtungen und nie unter HEDGE_MIN_DELAY Sekunden
+HEDGE_MIN_SAMPLES = 5
+HEDGE_MIN_DELAY = 3.0
+
+# Circuit Breaker: ab diesem Fehleranteil (bei mindestens BREAKER_MIN_SAMPLES Batches) gilt ein Modell als gestört
+BREAKER_ERROR_THRESHOLD = 0.5
+BREAKER_WINDOW = 10
+BREAKER_MIN_SAMPLES = 4
+
+
+class BatchController:
+    """AIMD controller for the token budget per batch and the number of batches in flight.
+
+    Every completed batch reports its latency, whether it hit a rate limit (429) and whether its
+    JSON response was malformed or incomplete. Every ADJUST_EVERY batches the rolling window is
+    evaluated: a 429 share above MAX_RATE_LIMITED_SHARE halves the concurrency, a parse-failure
+    share above MAX_PARSE_FAILURE_SHARE or a p95 latency above LATENCY_TARGET_SECONDS halves the
+    token budget. A healthy window raises both additively. The window is reset after a decrease so
+    that one slow phase is not punished twice.
+    """
+
+    def __init__(self, model: str, token_budget: int = INITIAL_TOKEN_BUDGET, concurrency: int = INITIAL_CONCURRENCY, tuning_path: str = DEFAULT_TUNING_PATH):
+        self.model = model
+        self.token_budget = token_budget
+        self.concurrency = concurrency
+        self.tuning_path = tuning_path
+        self.samples = deque(maxlen=WINDOW)
+        self.since_adjustment = 0
+        self.increases = 0
+        self.decreases = 0
+
+    @classmethod
+    def for_model(cls, model: str, tuning_path: str = DEFAULT_TUNING_PATH) -> "BatchController":
+        """Creates a controller starting from the values tuned in earlier runs for this model."""
+        tuned = load_tuning(tuning_path).get(model, {})
+        return cls(
+            model,
+            token_budget=int(tuned.get("token_budget", INITIAL_TOKEN_BUDGET)),
+            concurrency=int(tuned.get("concurrency", INITIAL_CONCURRENCY)),
+            tuning_path=tuning_path,
+        )
+
+    def p95_latency(self):
+        if not self.samples:
+            return None
+        latencies = sorted(latency for latency, _, _ in self.samples)
+        return latencies[max(math.ceil(0.95 * len(latencies)) - 1, 0)]
+
+    def hedge_delay(self):
+        """Seconds after which a duplicate request is issued (observed p95 latency), or None without enough data."""
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.p95_latency(), HEDGE_MIN_DELAY)
+
+    def record(self, latency: float, rate_limited: bool = False, parse_failed: bool = False) -> None:
+        """Registers one completed batch and adjusts budget and concurrency when due."""
+        self.samples.append((latency, bool(rate_limited), bool(parse_failed)))
+        self.since_adjustment += 1
+        if self.since_adjustment < ADJUST_EVERY:
+            return
+        self.since_adjustment = 0
+
+        rate_limited_share = sum(sample[1] for sample in self.samples) / len(self.samples)
+        parse_failure_share = sum(sample[2] for sample in self.samples) / len(self.samples)
+        too_slow = self.p95_latency() > LATENCY_TARGET_SECONDS
+
+        decreased = False
+        if rate_limited_share > MAX_RATE_LIMITED_SHARE:
+            self.concurrency = max(MIN_CONCURRENCY, int(self.concurrency * DECREASE_FACTOR))
+            decreased = True
+        if parse_failure_share > MAX_PARSE_FAILURE_SHARE or too_slow:
+            self.token_budget = max(MIN_TOKEN_BUDGET, int(self.token_budget * DECREASE_FACTOR))
+            decreased = True
+
+        if decreased:
+            self.decreases += 1
+            self.samples.clear()
+        else:
+            self.token_budget = min(MAX_TOKEN_BUDGET, self.token_budget + TOKEN_BUDGET_STEP)
+            self.concurrency = min(MAX_CONCURRENCY, self.concurrency + CONCURRENCY_STEP)
+            self.increases += 1
+
+    def save(self) -> None:
+        """Persists the tuned values for this model (atomic write, other models are kept)."""
+        with _tuning_lock:
+            tuning = load_tuning(self.tuning_path)
+            tuning[self.model] = {
+                "token_budget": self.token_budget,
+                "concurrency": self.concurrency,
+                "updated_at": time.time(),
+            }
+            temp_path = f"{self.tuning_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as tuning_file:
+                    json.dump(tuning, tuning_file, indent=2)
+                os.replace(temp_path, self.tuning_path)
+            except OSError:
+                pass
+
+
+def load_tuning(tuning_path: str = DEFAULT_TUNING_PATH) -> dict:
+    try:
+        with open(tuning_path, encoding="utf-8") as tuning_file:
+            return json.load(tuning_file)
+    except (OSError, ValueError):
+        return {}
+
+
+class CircuitBreaker:
+    """Opens when the share of failed batches of a model crosses BREAKER_ERROR_THRESHOLD.
+
+    Once open it stays open for the rest of the run, so the remaining batches go to the fallback
+    model instead of waiting for further timeouts.
+    """
+
+    def __init__(self, threshold: float = BREAKER_ERROR_THRESHOLD, window: int = BREAKER_WINDOW, min_samples: int = BREAKER_MIN_SAMPLES):
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.outcomes = deque(maxlen=window)
+        self.is_open = False
+
+    def record(self, failed: bool) -> None:
+        self.outcomes.append(bool(failed))
+        if len(self.outcomes) >= self.min_samples and sum(self.outcomes) / len(self.outcomes) >= self.threshold:
+            self.is_open = True
@@ -0,0 +1,121 @@
+# benchmarks/excel_extraction_benchmark.py
+"""Vergleicht die alte Zell-für-Zell-Extraktion mit der vektorisierten Klassifikation.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/excel_extraction_benchmark.py --rows 50000 --columns 20   # 1 Mio. Zellen
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook, load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from text_classification import classify_sheet  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "Wie zufrieden sind Sie insgesamt mit dem Produkt?",
+    "Please rate the following statements.",
+    "Как часто вы пользуетесь этим продуктом?",
+    "Πόσο ικανοποιημένοι είστε;",
+    "您对该产品的总体满意度如何？",
+    "ما مدى رضاك عن المنتج؟",
+    "Weiß nicht / keine Angabe",
+]
+SAMPLE_CODES = ["Q1", "S2a", "AB-123", "V_12", "info@example.com", "https://example.com/survey", "12,5 %", "2024-03-01"]
+
+
+def build_workbook(path: str, rows: int, columns: int, seed: int = 42) -> None:
+    random.seed(seed)
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Daten")
+    start = datetime(2024, 1, 1)
+    for row_index in range(rows):
+        row = []
+        for column_index in range(columns):
+            kind = (row_index + column_index) % 5
+            if kind == 0:
+                row.append(random.choice(SAMPLE_TEXTS))
+            elif kind == 1:
+                row.append(random.randint(0, 10_000))
+            elif kind == 2:
+                row.append(round(random.random() * 100, 2))
+            elif kind == 3:
+                row.append(start + timedelta(days=row_index % 365))
+            else:
+                row.append(random.choice(SAMPLE_CODES))
+        worksheet.append(row)
+    workbook.save(path)
+
+
+def legacy_classify(rows) -> int:
+    """Nachbau der bisherigen Klassifikation (float()-Test und Regex pro Zelle)."""
+    count = 0
+    for row in rows:
+        for value in row:
+            if value is not None and str(value).strip():
+                cell_value = str(value).strip()
+                try:
+                    float(cell_value)
+                    continue
+                except ValueError:
+                    pass
+                if re.search(r'[a-zA-ZäöüÄÖÜß]', cell_value) and len(cell_value) > 1:
+                    count += 1
+    return count
+
+
+def load_rows(path: str) -> list:
+    workbook = load_workbook(path, data_only=True, read_only=True)
+    worksheet = workbook[workbook.sheetnames[0]]
+    rows = list(worksheet.iter_rows(min_row=1, min_col=1, max_col=worksheet.max_column, values_only=True))
+    workbook.close()
+    return rows
+
+
+def legacy_load(path: str) -> list:
+    workbook = load_workbook(path, data_only=True)
+    worksheet = workbook[workbook.sheetnames[0]]
+    return [[cell.value for cell in row] for row in worksheet.iter_rows()]
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--skip-legacy", action="store_true", help="Nur die neue Extraktion messen")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "benchmark.xlsx")
+        print(f"Erzeuge Arbeitsmappe mit {args.rows * args.columns:,} Zellen ...")
+        build_workbook(path, args.rows, args.columns)
+
+        rows, load_seconds = timed(load_rows, path)
+        cells, classify_seconds = timed(classify_sheet, rows)
+        text_cells = int((cells["category"] == "text").sum())
+        print(f"Vektorisiert: Laden {load_seconds:.2f} s (read-only), Klassifikation {classify_seconds:.2f} s, "
+              f"{text_cells:,} Textzellen")
+
+        if not args.skip_legacy:
+            legacy_rows, legacy_load_seconds = timed(legacy_load, path)
+            legacy_cells, legacy_classify_seconds = timed(legacy_classify, legacy_rows)
+            print(f"Bisher:       Laden {legacy_load_seconds:.2f} s, Klassifikation {legacy_classify_seconds:.2f} s, "
+                  f"{legacy_cells:,} Textzellen (inkl. Codes/E-Mails/URLs, ohne nicht-lateinische Schriften)")
+            print(f"Faktor Klassifikation: {legacy_classify_seconds / classify_seconds:.1f}x, "
+                  f"gesamt: {(legacy_load_seconds + legacy_classify_seconds) / (load_seconds + classify_seconds):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/matching_benchmark.py
+"""Vergleicht den bisherigen iterrows-Abgleich des Matching-Übersetzungsbüros mit dem vektorisierten Matcher.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/matching_benchmark.py --rows 200000 --translations 20000
+    python benchmarks/matching_benchmark.py --rows 20000 --translations 100000 --fuzzy --skip-legacy
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from matching_engine import (  # noqa: E402
+    SOURCE_COLUMN, TARGET_COLUMN, apply_fuzzy_matches, build_fuzzy_index, build_translation_index,
+    clean_text_for_matching, clean_text_with_placeholders, match_export, restore_text,
+)
+from matching_rules import DEFAULT_RULES, compile_rules  # noqa: E402
+
+SAMPLE_SENTENCES = [
+    "How satisfied are you with {brand}?",
+    "Please rate the following statements about !%V-brand%! on a scale from 1 to 10.",
+    "Which of these products have you used in the past {months} months?",
+    "How likely are you to recommend {brand} to a friend or colleague?",
+    "Please describe in your own words what you like about {brand}.",
+]
+SAMPLE_CODES = ["<br>", "!%I-progress.txt%!", "ZC:A1", "12", "3.5", "Screenout", "Brand 7", "Neue Antwort 3"]
+
+
+def build_data(rows: int, translations: int, seed: int = 42):
+    random.seed(seed)
+    sources = [
+        random.choice(SAMPLE_SENTENCES).format(brand=f"Product {index}", months=index % 24)
+        for index in range(translations)
+    ]
+    translation_df = pd.DataFrame({
+        "Master / English": sources,
+        "DE": [f"Übersetzung {index}" if index % 50 else "" for index in range(translations)],
+    })
+    texts = []
+    for index in range(rows):
+        kind = index % 10
+        if kind < 6:
+            texts.append(random.choice(sources))
+        elif kind < 7:
+            texts.append(f"Unknown question {index}?")
+        elif kind < 8:
+            # Leicht geänderte Texte (Satzzeichen, doppelte Leerzeichen) für das Fuzzy-Matching
+            texts.append(random.choice(sources).replace("?", " ?").replace(" ", "  ", 1))
+        else:
+            texts.append(random.choice(SAMPLE_CODES))
+    rogator_df = pd.DataFrame({
+        "Frage-ID (gesperrt)": [f"Q{index}" for index in range(rows)],
+        TARGET_COLUMN: [None if index % 7 else "vorhanden" for index in range(rows)],
+        SOURCE_COLUMN: texts,
+    })
+    return rogator_df, translation_df
+
+
+def legacy_should_always_duplicate(text, rules=DEFAULT_RULES):
+    for case in rules["special_cases"]:
+        if re.search(case.strip(), text):
+            return True
+    if text.startswith('<') and text.endswith('>'):
+        return True
+    if text.startswith('!%') and text.endswith('%!'):
+        return True
+    if text.startswith('!') and text.endswith('!'):
+        return True
+    if text.startswith('ZC:'):
+        return True
+    if re.fullmatch(r'\d+(\.\d+)?', text):
+        return True
+    if text.strip().lower() in [term.strip().lower() for term in rules["keywords"] if term.strip()]:
+        return True
+    if re.search(r'Brand\s+\d+', text):
+        return True
+    if text.startswith('Neue Antwort'):
+        return True
+    return False
+
+
+def legacy_match(rogator_df: pd.DataFrame, translation_df: pd.DataFrame):
+    """Nachbau der bisherigen Schleife aus matching_app (iterrows, Regex und .at[] pro Zeile)."""
+    translation_df = translation_df.copy()
+    translation_df.columns = ['Master / English', 'DE']
+    translation_df['Master / English'] = translation_df['Master / English'].astype(str)
+    translation_df['Clean English'] = translation_df['Master / English'].apply(clean_text_for_matching)
+    translation_dict = pd.Series(translation_df['DE'].values, index=translation_df['Clean English']).to_dict()
+
+    processed = rogator_df.copy()
+    processed[TARGET_COLUMN] = processed[TARGET_COLUMN].astype(object)
+    processed['Quelle'] = 'Match'
+    unmatched_indices = []
+    for index, row in processed.iterrows():
+        text = str(row[SOURCE_COLUMN])
+        _, placeholders = clean_text_with_placeholders(text)
+        if legacy_should_always_duplicate(text):
+            processed.at[index, TARGET_COLUMN] = text
+            continue
+        cleaned = clean_text_for_matching(text)
+        if cleaned in translation_dict:
+            translation = translation_dict[cleaned]
+            if pd.isna(translation) or str(translation).strip() == "":
+                unmatched_indices.append(index)
+            else:
+                processed.at[index, TARGET_COLUMN] = restore_text(translation, placeholders)
+        else:
+            existing = row.get(TARGET_COLUMN, "")
+            if pd.isna(existing) or str(existing).strip() == "":
+                unmatched_indices.append(index)
+    return processed, unmatched_indices
+
+
+def vectorized_match(rogator_df: pd.DataFrame, translation_df: pd.DataFrame):
+    return match_export(rogator_df, build_translation_index(translation_df), compile_rules(DEFAULT_RULES).mask)
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--translations", type=int, default=20_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="Nur den vektorisierten Abgleich messen")
+    parser.add_argument("--fuzzy", action="store_true", help="Zusätzlich Aufbau und Abfrage des Fuzzy-Index messen")
+    args = parser.parse_args()
+
+    print(f"Erzeuge Export mit {args.rows:,} Zeilen und Übersetzungsdatei mit {args.translations:,} Einträgen ...")
+    rogator_df, translation_df = build_data(args.rows, args.translations)
+
+    (processed, unmatched), seconds = timed(vectorized_match, rogator_df, translation_df)
+    print(f"Vektorisiert: {seconds:.2f} s, {len(unmatched):,} Texte offen für GPT "
+          f"({rogator_df[SOURCE_COLUMN].nunique():,} verschiedene Texte)")
+
+    if args.fuzzy:
+        translation_index = build_translation_index(translation_df)
+        fuzzy_index, index_seconds = timed(build_fuzzy_index, translation_index)
+        (_, still_open), fuzzy_seconds = timed(apply_fuzzy_matches, processed, unmatched, fuzzy_index)
+        distinct_open = processed.loc[unmatched, SOURCE_COLUMN].nunique()
+        print(f"Fuzzy-Index:  Aufbau {index_seconds:.2f} s ({len(fuzzy_index):,} Einträge), Abfrage {fuzzy_seconds:.2f} s "
+              f"für {distinct_open:,} verschiedene offene Texte, {len(unmatched) - len(still_open):,} Fuzzy-Matches")
+
+    if not args.skip_legacy:
+        (legacy_processed, legacy_unmatched), legacy_seconds = timed(legacy_match, rogator_df, translation_df)
+        identical = legacy_unmatched == unmatched and legacy_processed[TARGET_COLUMN].equals(processed[TARGET_COLUMN])
+        print(f"Bisher:       {legacy_seconds:.2f} s, {len(legacy_unmatched):,} Texte offen für GPT "
+              f"(Ergebnis {'identisch' if identical else 'ABWEICHEND'})")
+        print(f"Faktor: {legacy_seconds / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# document_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Gemeinsamer Ablageort für alle Sitzungen (und Prozesse) auf diesem Server
+DEFAULT_CACHE_DIR = os.environ.get(
+    "BONSAI_DOCUMENT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bonsai_document_cache")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("BONSAI_DOCUMENT_CACHE_MB", "500")) * 1024 * 1024
+
+
+def normalize_parameter(value):
+    """Normalizes a parameter for the cache key (bytes -> digest, text -> unified line endings, stripped)."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    if isinstance(value, str):
+        return value.replace("\r\n", "\n").strip()
+    if isinstance(value, (list, tuple)):
+        return [normalize_parameter(item) for item in value]
+    return value
+
+
+def document_cache_key(file_bytes: bytes, **parameters) -> str:
+    """Builds the content address of a translation: SHA-256 of the upload plus the normalized parameters."""
+    normalized = json.dumps(
+        {name: normalize_parameter(value) for name, value in parameters.items()},
+        sort_keys=True, ensure_ascii=False,
+    )
+    digest = hashlib.sha256(file_bytes)
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """Content-addressed file cache for translated documents with size-based LRU eviction.
+
+    Each entry is stored as <key>.bin (translated bytes) and <key>.json (metadata). Reads refresh the
+    modification time, and eviction removes the least recently used entries until the cache fits
+    into max_bytes again.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + ".bin", base + ".json"
+
+    def get(self, key: str):
+        """Returns (translated bytes, metadata) or None."""
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as meta_file:
+                metadata = json.load(meta_file)
+            with open(data_path, "rb") as data_file:
+                data = data_file.read()
+        except (OSError, ValueError):
+            return None
+        now = time.time()
+        for path in (data_path, meta_path):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return data, metadata
+
+    def put(self, key: str, data: bytes, metadata: dict) -> None:
+        """Stores an entry (atomically via rename) and evicts old entries if the cache is too large."""
+        if len(data) > self.max_bytes:
+            return
+        data_path, meta_path = self._paths(key)
+        metadata = dict(metadata, size=len(data), created_at=time.time())
+        for path, content in ((data_path, data), (meta_path, json.dumps(metadata, ensure_ascii=False).encode("utf-8"))):
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as temp_file:
+                temp_file.write(content)
+            os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".bin"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+            total += stat.st_size
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
@@ -0,0 +1,154 @@
+# fuzzy_index.py
+import re
+
+import numpy as np
+
+# Zeichen-Trigramme; ein Editierschritt zerstört höchstens GRAM_SIZE Trigramme des Suchtexts
+GRAM_SIZE = 3
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Ein Präfix aus k * (GRAM_SIZE * d + 1) Trigrammen verlangt von jedem Treffer mindestens
+# (k - 1) * (GRAM_SIZE * d + 1) + 1 gemeinsame Trigramme und sortiert so die meisten Kandidaten früh aus
+PREFIX_FACTOR = 2
+# Höchstzahl der Kandidaten, die pro Suchtext mit der Levenshtein-Distanz nachgeprüft werden
+MAX_CANDIDATES = 50
+
+
+def normalize_for_fuzzy(text: str) -> str:
+    """Case-folds the text and collapses whitespace, so doubled spaces and case changes cost nothing."""
+    return WHITESPACE_PATTERN.sub(' ', str(text)).strip().casefold()
+
+
+def character_grams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[position:position + GRAM_SIZE] for position in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def build_postings(sources: list) -> dict:
+    """Builds {trigram: sorted entry ids} for all sources at once with numpy.
+
+    Each trigram is packed into one int64 (three code points, 21 bits each), so the pairs can be
+    sorted and deduplicated as arrays instead of growing millions of Python sets.
+    """
+    padded = [f" {source} " for source in sources]
+    padded_lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+    if not padded_lengths.sum():
+        return {}
+    code_points = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    codes = (code_points[:-2] << 42) | (code_points[1:-1] << 21) | code_points[2:]
+    entries = np.repeat(np.arange(len(padded), dtype=np.int32), padded_lengths)[:-2]
+    starts = np.concatenate(([0], padded_lengths.cumsum()[:-1]))
+    # Trigramme, die über die Grenze zum nächsten Text reichen, verwerfen
+    valid = np.arange(len(codes)) - starts[entries] <= padded_lengths[entries] - GRAM_SIZE
+    codes, entries = codes[valid], entries[valid]
+
+    order = np.lexsort((entries, codes))
+    codes, entries = codes[order], entries[order]
+    distinct = np.ones(len(codes), dtype=bool)
+    distinct[1:] = (codes[1:] != codes[:-1]) | (entries[1:] != entries[:-1])
+    codes, entries = codes[distinct], entries[distinct]
+    boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    grams = [
+        chr(code >> 42) + chr((code >> 21) & 0x1FFFFF) + chr(code & 0x1FFFFF)
+        for code in codes[np.concatenate(([0], boundaries))].tolist()
+    ]
+    return dict(zip(grams, np.split(entries, boundaries)))
+
+
+def levenshtein_distance(a: str, b: str) -> int:
+    """Bit-parallel Levenshtein distance (Myers/Hyyrö); Python ints serve as bit vectors of any length."""
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    # Muster ist der kürzere Text, über den längeren wird iteriert
+    a, b = b, a
+    length = len(a)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    peq = {}
+    for position, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << position)
+    pv, mv, score = full, 0, length
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def levenshtein_ratio(a: str, b: str) -> float:
+    """Similarity 1 - distance / length of the longer text (1.0 for identical texts)."""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    return 1.0 - levenshtein_distance(a, b) / longest
+
+
+class FuzzyIndex:
+    """Character trigram inverted index over translation memory sources with a Levenshtein re-ranker.
+
+    Candidate generation uses prefix filtering: a text within the Levenshtein threshold can have
+    lost at most GRAM_SIZE trigrams per edit, so it must share a minimum number of the rarest
+    trigrams of the query. Only those short posting lists are read, which keeps lookups fast on
+    memories with 100k entries. Candidates that pass the count and length bounds are verified with
+    the exact ratio. labels optionally names the origin of each entry (e.g. the template it came from).
+    """
+
+    def __init__(self, sources, targets, labels=None):
+        self.sources = [normalize_for_fuzzy(source) for source in sources]
+        self.targets = list(targets)
+        self.labels = list(labels) if labels is not None else [None] * len(self.targets)
+        self.lengths = np.fromiter((len(source) for source in self.sources), dtype=np.int32, count=len(self.sources))
+        self.postings = build_postings(self.sources)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def lookup(self, text: str, threshold: float = 0.9):
+        """Returns (translation, score) of the most similar entry with score >= threshold, or None."""
+        hit = self.lookup_entry(text, threshold)
+        if hit is None:
+            return None
+        entry, score = hit
+        return self.targets[entry], score
+
+    def lookup_entry(self, text: str, threshold: float = 0.9):
+        """Like lookup(), but returns (entry position, score), so targets and labels can be read."""
+        query = normalize_for_fuzzy(text)
+        if not query or not self.sources:
+            return None
+        grams = character_grams(query)
+        # Längste zulässige Distanz: der Treffer ist höchstens len(query) / threshold lang
+        max_distance = int((1.0 - threshold) * len(query) / threshold)
+        known = sorted((gram for gram in grams if gram in self.postings), key=lambda gram: len(self.postings[gram]))
+        # Präfix aus den seltensten Trigrammen, doppelt so lang wie mindestens nötig, damit der Zählfilter greift
+        prefix = known[:PREFIX_FACTOR * (GRAM_SIZE * max_distance + 1)]
+        if not prefix:
+            return None
+
+        hits = np.bincount(np.concatenate([self.postings[gram] for gram in prefix]), minlength=len(self.sources))
+        # Zählfilter: ein Treffer hat höchstens GRAM_SIZE * max_distance Trigramme des Präfixes verloren
+        candidates = np.flatnonzero(hits >= len(prefix) - GRAM_SIZE * max_distance)
+        # Längenfilter: die Distanz ist mindestens der Längenunterschied
+        lengths = self.lengths[candidates]
+        candidates = candidates[(lengths >= threshold * len(query)) & (lengths * threshold <= len(query))]
+        candidates = candidates[np.argsort(-hits[candidates], kind="stable")[:MAX_CANDIDATES]]
+
+        best = None
+        for entry in candidates:
+            score = levenshtein_ratio(query, self.sources[entry])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (int(entry), score)
+                if score == 1.0:
+                    break
+        return best
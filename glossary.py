@@ -0,0 +1,158 @@
+# glossary.py
+import io
+import re
+import unicodedata
+from collections import deque
+
+import pandas as pd
+
+# Spaltennamen, die als Ausgangs- bzw. Zielbegriff erkannt werden (sonst: erste und zweite Spalte)
+SOURCE_COLUMN_NAMES = ("source", "quelle", "ausgangsbegriff", "begriff", "term")
+TARGET_COLUMN_NAMES = ("target", "ziel", "zielbegriff", "übersetzung", "translation")
+
+# Flexion des Zielbegriffs: so viele Endbuchstaben dürfen abweichen, so viele dürfen hinzukommen
+INFLECTION_CHARS = 1
+MAX_INFLECTION_SUFFIX = 4
+MIN_STEM_LENGTH = 3
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def fold_word(word: str) -> str:
+    """Case- and diacritic-insensitive form of a word ("Verträge" -> "vertrage", "Maße" -> "masse")."""
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def is_inflection(word: str, term_word: str) -> bool:
+    """True if word is term_word or an inflected form of it (same stem, short ending, umlauts ignored)."""
+    word, term_word = fold_word(word), fold_word(term_word)
+    if len(term_word) <= MIN_STEM_LENGTH:
+        return word == term_word
+    stem = term_word[:max(len(term_word) - INFLECTION_CHARS, MIN_STEM_LENGTH)]
+    return word.startswith(stem) and len(word) - len(term_word) <= MAX_INFLECTION_SUFFIX
+
+
+def contains_term(text_words: list, term: str) -> bool:
+    """True if the words of term occur consecutively in text_words, each possibly inflected."""
+    term_words = WORD_PATTERN.findall(term)
+    if not term_words:
+        return True
+    return any(
+        all(is_inflection(text_words[start + offset], term_word) for offset, term_word in enumerate(term_words))
+        for start in range(len(text_words) - len(term_words) + 1)
+    )
+
+
+def read_term_file(file_bytes: bytes, file_name: str, target_language: str = None) -> pd.DataFrame:
+    """Reads a term list (CSV or XLSX) into a DataFrame with the columns source and target.
+
+    The source column is found by name (SOURCE_COLUMN_NAMES) or taken from the first column. The
+    target column is the one named like the target language code ("de", "fr", ...), a column named
+    like TARGET_COLUMN_NAMES, or the second column.
+    """
+    if file_name.lower().endswith(".csv"):
+        # Trennzeichen (Komma, Semikolon, Tab) automatisch erkennen
+        terms = pd.read_csv(io.BytesIO(file_bytes), sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+    else:
+        terms = pd.read_excel(io.BytesIO(file_bytes), dtype=str)
+    if terms.shape[1] < 2:
+        raise ValueError("Die Terminologiedatei braucht mindestens zwei Spalten (Ausgangsbegriff, Zielbegriff).")
+
+    columns = {str(column).strip().lower(): column for column in terms.columns}
+    source_column = next((columns[name] for name in SOURCE_COLUMN_NAMES if name in columns), terms.columns[0])
+    target_names = ((target_language or "").lower(),) + TARGET_COLUMN_NAMES
+    target_column = next(
+        (columns[name] for name in target_names if name in columns and columns[name] != source_column),
+        terms.columns[1] if terms.columns[0] == source_column else terms.columns[0],
+    )
+
+    terms = terms[[source_column, target_column]].set_axis(["source", "target"], axis=1)
+    terms = terms.dropna().apply(lambda column: column.str.strip())
+    return terms[(terms["source"] != "") & (terms["target"] != "")].drop_duplicates("source")
+
+
+class TermBase:
+    """Aho-Corasick automaton over the source terms of a term list.
+
+    All terms are found in a single pass over a segment, independent of the size of the list, so
+    only the term pairs that actually occur in a batch have to be sent with the request. Matching is
+    case-insensitive and only accepts whole words.
+    """
+
+    def __init__(self, terms: pd.DataFrame):
+        self.terms = dict(zip(terms["source"], terms["target"]))
+        # Trie als Liste von Knoten: Übergänge, Fehlerverweis, Ausgaben (Begriffe, die hier enden)
+        self.transitions = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for source in self.terms:
+            self._add(source)
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _add(self, source: str) -> None:
+        node = 0
+        for char in source.casefold():
+            next_node = self.transitions[node].get(char)
+            if next_node is None:
+                next_node = len(self.transitions)
+                self.transitions[node][char] = next_node
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = next_node
+        self.outputs[node].append(source)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.transitions[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.transitions[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def find_terms(self, text: str) -> dict:
+        """Returns {source term: target term} for all terms occurring as whole words in the text."""
+        # casefold() kann die Länge ändern ("ß" -> "ss"); origins hält je Zeichen die Position im Originaltext
+        folded_chars = [char.casefold() for char in text]
+        folded = "".join(folded_chars)
+        origins = [position for position, chars in enumerate(folded_chars) for _ in chars]
+        found = {}
+        node = 0
+        for position, char in enumerate(folded):
+            while node and char not in self.transitions[node]:
+                node = self.fail[node]
+            node = self.transitions[node].get(char, 0)
+            for source in self.outputs[node]:
+                if source in found:
+                    continue
+                start = position - len(source.casefold()) + 1
+                if start > 0 and origins[start - 1] == origins[start]:
+                    continue  # Treffer beginnt mitten in einem aufgefalteten Zeichen
+                if position + 1 < len(folded) and origins[position + 1] == origins[position]:
+                    continue  # Treffer endet mitten in einem aufgefalteten Zeichen
+                original_start, original_end = origins[start], origins[position] + 1
+                if (original_start > 0 and text[original_start - 1].isalnum()) or (
+                    original_end < len(text) and text[original_end].isalnum()
+                ):
+                    continue
+                found[source] = self.terms[source]
+        return found
+
+    def find_violations(self, source_text: str, translated_text: str) -> dict:
+        """Returns the term pairs of the source text whose target term is missing in the translation.
+
+        Inflected forms of the target term count as present (see is_inflection), as the prompt allows them.
+        """
+        translated_words = WORD_PATTERN.findall(translated_text)
+        return {
+            source: target
+            for source, target in self.find_terms(source_text).items()
+            if not contains_term(translated_words, target)
+        }
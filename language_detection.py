@@ -0,0 +1,180 @@
+# language_detection.py
+import json
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Beispieltexte pro Sprache, aus denen die Zeichen-n-Gramm-Profile gebaut werden
+SAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "language_samples.json")
+NGRAM_SIZES = (1, 2, 3)
+
+# Kennzeichnung für Segmente ohne Buchstaben (Zahlen, Codes, Satzzeichen)
+NEUTRAL = "neutral"
+
+# Unter dieser Buchstabenzahl wird die Konfidenz anteilig reduziert ("Ja" kann vieles sein)
+MIN_CONFIDENT_LETTERS = 15
+
+# Ein Segment gilt erst als sicher in der Zielsprache, wenn es genug Buchstaben hat und die beste Sprache
+# die zweitbeste um mindestens diesen Log-Likelihood-Abstand je n-Gramm schlägt (id/ms/fil, no/da, cs/sk)
+MIN_SKIP_LETTERS = 20
+MIN_SKIP_MARGIN = 0.15
+
+# Unicode-Bereiche der Schriften; Schriften mit genau einer Zielsprache werden direkt zugeordnet
+SCRIPT_RANGES = (
+    ("latin", ((0x0041, 0x024F), (0x1E00, 0x1EFF))),
+    ("cyrillic", ((0x0400, 0x052F),)),
+    ("greek", ((0x0370, 0x03FF), (0x1F00, 0x1FFF))),
+    ("hebrew", ((0x0590, 0x05FF),)),
+    ("arabic", ((0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF))),
+    ("devanagari", ((0x0900, 0x097F),)),
+    ("thai", ((0x0E00, 0x0E7F),)),
+    ("hangul", ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF))),
+    ("kana", ((0x3040, 0x30FF), (0x31F0, 0x31FF))),
+    ("han", ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF))),
+)
+SCRIPT_LANGUAGES = {
+    "greek": "el",
+    "hebrew": "he",
+    "arabic": "ar",
+    "devanagari": "hi",
+    "thai": "th",
+    "hangul": "ko",
+    "kana": "ja",
+}
+
+# Häufige Zeichen, die nur in vereinfachtem bzw. traditionellem Chinesisch vorkommen
+SIMPLIFIED_CHARS = set("这们说会对时国来为个后发过请问题们见们还没样经现实关开进么产东车长门马")
+TRADITIONAL_CHARS = set("這們說會對時國來為個後發過請問題見還沒樣經現實關開進麼產東車長門馬")
+
+NON_LETTER_PATTERN = re.compile(r'[\W\d_]+')
+
+
+def character_script(char: str) -> str:
+    codepoint = ord(char)
+    for script, ranges in SCRIPT_RANGES:
+        for start, end in ranges:
+            if start <= codepoint <= end:
+                return script
+    return "other"
+
+
+def extract_ngrams(text: str) -> Counter:
+    """Counts the character n-grams of the lowercased words of a text (words padded with spaces)."""
+    ngrams = Counter()
+    for word in NON_LETTER_PATTERN.split(text.lower()):
+        if not word:
+            continue
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for start in range(len(padded) - size + 1):
+                ngram = padded[start:start + size]
+                if ngram.strip():
+                    ngrams[ngram] += 1
+    return ngrams
+
+
+@lru_cache(maxsize=1)
+def load_profiles() -> dict:
+    """Builds {script: {language: (log-probabilities, log-probability of unseen n-grams)}} from the samples."""
+    with open(SAMPLES_PATH, encoding="utf-8") as samples_file:
+        samples = json.load(samples_file)
+
+    profiles = {}
+    for language, text in samples.items():
+        counts = extract_ngrams(text)
+        letters = [char for char in text if char.isalpha()]
+        script = Counter(character_script(char) for char in letters).most_common(1)[0][0]
+        total = sum(counts.values())
+        vocabulary = len(counts) + 1
+        log_probabilities = {ngram: math.log((count + 1) / (total + vocabulary)) for ngram, count in counts.items()}
+        profiles.setdefault(script, {})[language] = (log_probabilities, math.log(1 / (total + vocabulary)))
+    return profiles
+
+
+def detect_language(text: str):
+    """Detects the language of a segment offline.
+
+    Returns (language, confidence). The language is an ISO code as used in the apps
+    ("de", "en", "zh-CN", ...), "zh" for Chinese without simplified/traditional markers, or NEUTRAL
+    for segments without letters. The confidence is between 0 and 1.
+    """
+    letters = [char for char in str(text) if char.isalpha()]
+    if not letters:
+        return NEUTRAL, 1.0
+
+    script_counts = Counter(character_script(char) for char in letters)
+    length_factor = min(1.0, len(letters) / MIN_CONFIDENT_LETTERS)
+
+    # Japanisch: Kana kommen in fast jedem japanischen Satz vor, Kanji allein wären Chinesisch
+    if script_counts["kana"]:
+        share = (script_counts["kana"] + script_counts["han"]) / len(letters)
+        return "ja", share
+    script, script_count = script_counts.most_common(1)[0]
+    share = script_count / len(letters)
+
+    if script in SCRIPT_LANGUAGES:
+        return SCRIPT_LANGUAGES[script], share
+    if script == "han":
+        han_chars = set(letters)
+        simplified = len(han_chars & SIMPLIFIED_CHARS)
+        traditional = len(han_chars & TRADITIONAL_CHARS)
+        if simplified > traditional:
+            return "zh-CN", share
+        if traditional > simplified:
+            return "zh-TW", share
+        return "zh", share
+
+    scores = language_scores(text, script)
+    if not scores:
+        return "unknown", 0.0
+    best_language = max(scores, key=scores.get)
+    # Softmax über die Log-Likelihoods als Konfidenz
+    best_score = scores[best_language]
+    normalizer = sum(math.exp(score - best_score) for score in scores.values())
+    confidence = share * length_factor / normalizer
+    return best_language, confidence
+
+
+def language_scores(text: str, script: str) -> dict:
+    """Log-likelihoods {language: score} of the text under the n-gram profiles of a script ({} if none)."""
+    candidates = load_profiles().get(script)
+    if not candidates:
+        return {}
+    ngrams = extract_ngrams(text)
+    return {
+        language: sum(count * log_probabilities.get(ngram, unseen) for ngram, count in ngrams.items())
+        for language, (log_probabilities, unseen) in candidates.items()
+    }
+
+
+def is_reliably_language(text: str, target: str) -> bool:
+    """True only if the text is clearly written in the target language and may stay untranslated.
+
+    The confidence of detect_language is a softmax over closely related languages and not calibrated,
+    so this decision uses the per-n-gram log-likelihood margin between the best and the second best
+    language instead, and requires at least MIN_SKIP_LETTERS letters.
+    """
+    language, confidence = detect_language(text)
+    if language == NEUTRAL or not is_same_language(language, target):
+        return False
+    letters = [char for char in str(text) if char.isalpha()]
+    script = Counter(character_script(char) for char in letters).most_common(1)[0][0]
+    scores = language_scores(text, script)
+    if len(scores) < 2:
+        # Schriften mit genau einer Sprache (Griechisch, Thai, ...) und CJK: der Schriftanteil entscheidet
+        return confidence >= 0.9
+    if len(letters) < MIN_SKIP_LETTERS:
+        return False
+    best, second = sorted(scores.values(), reverse=True)[:2]
+    return (best - second) / sum(extract_ngrams(text).values()) >= MIN_SKIP_MARGIN
+
+
+def is_same_language(detected: str, target: str) -> bool:
+    """Compares a detected language with a target language code ("zh" matches zh-CN and zh-TW)."""
+    if detected == target:
+        return True
+    if detected == "zh" and target.startswith("zh"):
+        return True
+    return False
@@ -1,14 +1,23 @@
 import streamlit as st
 import pandas as pd
-import re
 import openai
 from io import BytesIO
 from config import set_page_config, apply_global_css
 from utils import select_app, toggle_info
-from github import Github
 import base64
 import json
 import os
+import asyncio
+import time
+from openai import AsyncOpenAI
+from matching_engine import (
+    FUZZY_THRESHOLD, MEMORY_COLUMN, REQUIRED_COLUMNS, SOURCE_COLUMN, apply_fuzzy_matches, build_fuzzy_index,
+    apply_known_translations, build_translation_index, clean_series_for_matching, export_frame, match_export,
+    memory_pairs, merge_translation_indexes, restore_text,
+)
+from document_cache import DocumentCache, document_cache_key
+from matching_rules import DEFAULT_RULES, RuleSet, compile_rules
+from template_store import TEMPLATE_BACKEND, GitHubTemplateStore, get_sqlite_store, template_label
 
 def matching_app():
         # Einstellungen für die allgemeine App
@@ -23,67 +32,6 @@ def matching_app():
         st.button("Home", on_click=lambda: select_app(None), key="home_button_allgemein")
         st.markdown("</div>", unsafe_allow_html=True)
 
-    # Funktion zur Bereinigung des Textes für das Matching
-    def clean_text_for_matching(text):
-        if pd.isna(text):
-            return ''
-        text = str(text)
-        clean_line = re.sub(r'!%.*?%!', '', text)
-        clean_line = re.sub(r'{!%.*?%!}', '', clean_line)
-        clean_line = clean_line.strip()
-        return clean_line
-
-    # Funktion zur Bereinigung des Textes mit Platzhaltern
-    def clean_text_with_placeholders(text):
-        if pd.isna(text):
-            return '', []
-        text = str(text)
-        placeholders = []
-        def replace_with_placeholder(match):
-            start_pos = match.start()
-            placeholders.append((match.group(0), start_pos))
-            return ''
-        clean_line = re.sub(r'!%.*?%!', replace_with_placeholder, text)
-        clean_line = re.sub(r'{!%.*?%!}', replace_with_placeholder, clean_line)
-        clean_line = clean_line.strip()
-        return clean_line, placeholders
-
-    # Funktion zur Wiederherstellung des Textes mit Platzhaltern
-    def restore_text(cleaned_text, placeholders):
-        cleaned_text = str(cleaned_text)
-        placeholders.sort(key=lambda x: x[1])
-        for placeholder, position in reversed(placeholders):
-            cleaned_text = cleaned_text[:position] + placeholder + cleaned_text[position:]
-        return cleaned_text
-
-    # Funktion zur Überprüfung, ob der Text immer dupliziert werden soll
-    def should_always_duplicate(text):
-        special_cases = [
-            r'\{!%I-progress.txt%!}',
-            r'<div style="display:none;">&nbsp;</div>',
-            r'&nbsp;years'
-        ]
-        for case in special_cases:
-            if re.search(case, text):
-                return True
-        if text.startswith('<') and text.endswith('>'):
-            return True
-        if text.startswith('!%') and text.endswith('%!'):
-            return True
-        if text.startswith('!') and text.endswith('!'):
-            return True
-        if text.startswith('ZC:'):
-            return True
-        if re.fullmatch(r'\d+(\.\d+)?', text):
-            return True
-        if text.strip().lower() in {"result:", "kommentar", "general remarks", "allgemeine bemerkungen", "screenout", "quotafull", "&#10148"}:
-            return True
-        if re.search(r'Brand\s+\d+', text):
-            return True
-        if text.startswith('Neue Antwort'):
-            return True
-        return False
-
     # Funktion zur Generierung der Systemnachricht für GPT
     def generate_system_message(source_language, respondent_group, survey_topic, target_language, survey_content):
         return (
@@ -100,6 +48,87 @@ def matching_app():
             f"For reference, here is background information on the questionnaire's purpose and target audience:\n{survey_content}"
         )
 
+    # KI-Übersetzung: parallele Batch-Anfragen pro Sitzung und Versuche pro Anfrage
+    GPT_CONCURRENCY = 8
+    GPT_MAX_RETRIES = 3
+    BATCH_JSON_INSTRUCTION = (
+        "\n\nInput format: You receive a JSON object {\"texts\": {\"<id>\": \"<text>\", ...}}. "
+        "Translate every text independently according to the instructions above and answer only with a JSON object "
+        "{\"translations\": {\"<id>\": \"<translation>\", ...}} that contains every id exactly once."
+    )
+
+    async def translate_text_batch(client, system_message, batch, model):
+        """Translates a batch {id: text} in one JSON request; returns {id: translation} (missing ids are left out)."""
+        for attempt in range(GPT_MAX_RETRIES):
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_message + BATCH_JSON_INSTRUCTION},
+                        {"role": "user", "content": json.dumps({"texts": batch}, ensure_ascii=False)}
+                    ],
+                    response_format={"type": "json_object"}
+                )
+                translations = json.loads(response.choices[0].message.content).get("translations", {})
+                if not isinstance(translations, dict):
+                    continue
+                return {
+                    text_id: translation.strip()
+                    for text_id, translation in translations.items()
+                    if text_id in batch and isinstance(translation, str) and translation.strip()
+                }
+            except openai.RateLimitError:
+                await asyncio.sleep(2 ** attempt)
+            except (json.JSONDecodeError, AttributeError, TypeError):
+                continue
+            except Exception:
+                await asyncio.sleep(2 ** attempt)
+        return {}
+
+    async def translate_single_text(client, system_message, text, model):
+        """Fallback for texts a batch answer did not cover: one plain request per text (None if it failed)."""
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": text}
+                ]
+            )
+            return response.choices[0].message.content.strip() or None
+        except Exception:
+            return None
+
+    async def translate_texts(api_key, system_message, texts, model, batch_size, on_batch_done):
+        """Translates the distinct texts in batches of batch_size with at most GPT_CONCURRENCY requests in flight.
+
+        Uses a client for this session only (no global API key). on_batch_done receives {text: translation}
+        for every finished batch, including the texts translated by the per-text fallback. Texts that could
+        not be translated are left out, so they stay open and a later run requests them again.
+        """
+        client = AsyncOpenAI(api_key=api_key, timeout=60.0)
+        semaphore = asyncio.Semaphore(GPT_CONCURRENCY)
+        distinct_texts = list(dict.fromkeys(texts))
+        batches = [distinct_texts[start:start + batch_size] for start in range(0, len(distinct_texts), batch_size)]
+
+        async def translate_fallback(text):
+            async with semaphore:
+                return await translate_single_text(client, system_message, text, model)
+
+        async def run_batch(batch_texts):
+            batch = {str(position): text for position, text in enumerate(batch_texts, start=1)}
+            async with semaphore:
+                translations = await translate_text_batch(client, system_message, batch, model)
+            missing = [text_id for text_id in batch if text_id not in translations]
+            fallbacks = await asyncio.gather(*(translate_fallback(batch[text_id]) for text_id in missing))
+            translations.update((text_id, fallback) for text_id, fallback in zip(missing, fallbacks) if fallback is not None)
+            on_batch_done({batch[text_id]: translation for text_id, translation in translations.items()})
+
+        try:
+            await asyncio.gather(*(run_batch(batch_texts) for batch_texts in batches))
+        finally:
+            await client.close()
+
     # Tutorial und Info-Texte
     info_texts = {
         "api_key": "Hier trägst du deinen OpenAI API-Schlüssel ein. Ohne diesen können wir leider nicht loslegen. Den aktuellen API-Schlüssel erhältst du von Jonathan Heeckt oder Tobias Bucher.",
@@ -116,10 +145,42 @@ def matching_app():
         st.session_state.tutorial_done = False  # Tutorial zu Beginn anzeigen
     if 'tutorial_step' not in st.session_state:
         st.session_state.tutorial_step = 0
-    if 'template_loaded' not in st.session_state:
-        st.session_state.template_loaded = False
-    if 'translation_file' not in st.session_state:
-        st.session_state.translation_file = None
+    if 'memory_candidates' not in st.session_state:
+        st.session_state.memory_candidates = {}  # KI-Übersetzungen dieser Sitzung {Ausgangstext: Übersetzung}
+    if 'matching_cache' not in st.session_state:
+        st.session_state.matching_cache = {}
+    if 'gpt_results' not in st.session_state:
+        st.session_state.gpt_results = {}  # {Schlüssel aus Modell und Systemanweisung: {Ausgangstext: Übersetzung}}
+
+    def memoized(key, compute):
+        """Ergebnis aus dem Sitzungs-Cache, sonst berechnet; nur die zuletzt benutzten Einträge bleiben erhalten"""
+        cache = st.session_state.matching_cache
+        if key in cache:
+            cache[key] = cache.pop(key)
+            return cache[key]
+        value = compute()
+        cache[key] = value
+        while len(cache) > MATCHING_CACHE_ENTRIES:
+            cache.pop(next(iter(cache)))
+        return value
+
+    def gpt_results_for(prompt_key):
+        """KI-Übersetzungen für Modell und Systemanweisung; beim ersten Zugriff aus dem lokalen Cache geladen"""
+        if prompt_key not in st.session_state.gpt_results:
+            cached = DocumentCache().get(prompt_key)
+            results = json.loads(cached[0].decode("utf-8")) if cached else {}
+            # Ältere Läufe haben Fehlermeldungen als Übersetzung gespeichert; diese Texte werden erneut übersetzt
+            st.session_state.gpt_results[prompt_key] = {
+                text: translation for text, translation in results.items() if not translation.startswith("Fehler: ")
+            }
+        return st.session_state.gpt_results[prompt_key]
+
+    def store_gpt_results(prompt_key, model):
+        results = st.session_state.gpt_results.get(prompt_key)
+        if results:
+            DocumentCache().put(
+                prompt_key, json.dumps(results, ensure_ascii=False).encode("utf-8"), {"app": "matching", "model": model}
+            )
 
     def reset_tutorial():
         st.session_state.tutorial_done = False
@@ -140,14 +201,18 @@ def matching_app():
             st.session_state[key] = False
         st.session_state[key] = not st.session_state[key]
 
-    # Funktion zum Highlighten der Zellen
-    def highlight_cells(row):
-        if row['Quelle'] == 'Match':
-            return ['background-color: transparent'] * len(row)  # Hellgrün
-        elif row['Quelle'] == 'GPT':
-            return ['background-color: transparent'] * len(row)  # Hellorange
-        else:
-            return [''] * len(row)
+    # Farbkennzeichnung der Quelle in der Übersicht (nur Anzeige, die Exportdatei bleibt unverändert)
+    SOURCE_MARKERS = {'Match': '🟢 Match', 'Fuzzy-Match': '🟡 Fuzzy-Match', 'GPT': '🟠 GPT'}
+    # Während der KI-Übersetzung wird die Anzeige höchstens alle UI_REFRESH_SECONDS Sekunden aktualisiert
+    UI_REFRESH_SECONDS = 2.0
+    # Anzahl der Zwischenergebnisse (eingelesene Dateien, Abgleiche, Downloads), die je Sitzung erhalten bleiben
+    MATCHING_CACHE_ENTRIES = 8
+
+    def overview_column_config():
+        return {
+            'Quelle': st.column_config.TextColumn('Quelle', help="🟢 Übersetzungsdatei/feste Regel, 🟡 ähnlicher Eintrag, 🟠 KI"),
+            'Fuzzy-Score': st.column_config.ProgressColumn('Fuzzy-Score', min_value=0, max_value=100, format="%d %%"),
+        }
 
     def show_tutorial():
         st.title("Tutorial")
@@ -214,7 +279,7 @@ def matching_app():
         
         **So funktioniert's:**
         1. Lade deine **Rogator-Exportdatei** hoch (im `.xlsx` Format).
-        2. Lade deine **Übersetzungsdatei** hoch (im `.xlsx` Format), die die englischen und übersetzten Texte enthält.
+        2. Lade deine **Übersetzungsdateien** hoch (im `.xlsx` Format), die die englischen und übersetzten Texte enthalten, und/oder wähle **Vorlagen** aus. Bei mehreren Quellen legst du die Priorität fest.
         3. Klicke auf den **"Starte KI-Übersetzung"** Button, um den Übersetzungsprozess zu starten.
         4. Die App gleicht die Texte aus Spalte C in der Rogator-Datei mit den Texten in der Übersetzungsdatei ab.
         5. Die App fügt die Übersetzungen in Spalte B der Rogator-Datei ein.
@@ -298,208 +363,298 @@ def matching_app():
         with st.expander("Systemanweisung für die KI (Achtung: Nur für fortgeschrittene Anwender)"):
             custom_system_message = st.text_area("Gib die Systemanweisung ein", value=system_message, height=200)
 
+        # Widget-Schlüssel der festen Regeln -> Schlüssel in der Regelkonfiguration
+        rule_widget_keys = {
+            "special_cases": "rule_special_cases",
+            "tag_start_end": "rule_tag_start_end",
+            "exclamation_mark": "rule_exclamation_mark",
+            "single_exclamation": "rule_single_exclamation",
+            "starts_with_zc": "rule_starts_with_zc",
+            "numeric_match": "rule_numeric_match",
+            "keywords": "rule_keywords",
+            "brand_match": "rule_brand_match",
+            "starts_with_neue": "rule_starts_with_neue",
+        }
+
+        def apply_rule_config(config):
+            for rule, widget_key in rule_widget_keys.items():
+                value = config[rule]
+                st.session_state[widget_key] = "\n".join(value) if isinstance(value, list) else value
+
+        if "rule_special_cases" not in st.session_state:
+            apply_rule_config(DEFAULT_RULES)
+
         # Füge das Menü für die festen Regeln direkt darunter ein
         with st.expander("Feste Regeln für das Matching (Achtung: Nur für fortgeschrittene Anwender)"):
+            # Gespeicherte Regelsätze aus anderen Projekten übernehmen (nur beim ersten Lauf nach dem Upload)
+            rule_file = st.file_uploader("Regelsatz laden (.json)", type=["json"], key="rule_file")
+            if rule_file is not None and st.session_state.get("rule_file_id") != rule_file.file_id:
+                st.session_state.rule_file_id = rule_file.file_id
+                try:
+                    apply_rule_config(RuleSet.from_json(rule_file.getvalue().decode("utf-8")).config)
+                    st.success(f"✅ Regelsatz '{rule_file.name}' übernommen.")
+                except (ValueError, UnicodeDecodeError) as e:
+                    st.error(f"❌ Fehler beim Laden des Regelsatzes: {e}")
+
             st.markdown("### Bearbeite die Regeln, um festzulegen, wann ein Text immer dupliziert werden soll:")
             
             # Bearbeitung der speziellen Fälle (RegEx-Muster)
             special_cases_input = st.text_area(
                 "Spezielle Fälle (RegEx-Muster, ein Muster pro Zeile):",
-                value="\n".join([
-                    r'\{!%I-progress.txt%!}',
-                    r'<div style="display:none;">&nbsp;</div>',
-                    r'&nbsp;years'
-                ]),
+                key="rule_special_cases",
                 height=150
             )
             
             # Weitere Bedingungen als Checkboxen oder Eingabefelder
-            tag_start_end = st.checkbox("Texte, die mit '<' beginnen und mit '>' enden sollen immer dupliziert werden", value=True)
-            exclamation_mark = st.checkbox("Texte, die mit '!%' beginnen und mit '%!' enden sollen immer dupliziert werden", value=True)
-            single_exclamation = st.checkbox("Texte, die mit '!' beginnen und mit '!' enden sollen immer dupliziert werden", value=True)
-            starts_with_zc = st.checkbox("Texte, die mit 'ZC:' beginnen sollen immer dupliziert werden", value=True)
-            numeric_match = st.checkbox("Numerische Texte (Ganzzahlen oder Dezimalzahlen) sollen immer dupliziert werden", value=True)
+            tag_start_end = st.checkbox("Texte, die mit '<' beginnen und mit '>' enden sollen immer dupliziert werden", key="rule_tag_start_end")
+            exclamation_mark = st.checkbox("Texte, die mit '!%' beginnen und mit '%!' enden sollen immer dupliziert werden", key="rule_exclamation_mark")
+            single_exclamation = st.checkbox("Texte, die mit '!' beginnen und mit '!' enden sollen immer dupliziert werden", key="rule_single_exclamation")
+            starts_with_zc = st.checkbox("Texte, die mit 'ZC:' beginnen sollen immer dupliziert werden", key="rule_starts_with_zc")
+            numeric_match = st.checkbox("Numerische Texte (Ganzzahlen oder Dezimalzahlen) sollen immer dupliziert werden", key="rule_numeric_match")
             additional_terms = st.text_area(
                 "Zusätzliche Schlüsselwörter (ein Begriff pro Zeile, case-insensitive):",
-                value="\n".join([
-                    "result:", "kommentar", "general remarks", 
-                    "allgemeine bemerkungen", "screenout", "quotafull", "&#10148"
-                ]),
+                key="rule_keywords",
                 height=100
             )
-            brand_match = st.checkbox("Texte, die mit 'Brand' gefolgt von einer Nummer beginnen, sollen immer dupliziert werden", value=True)
-            starts_with_neue = st.checkbox("Texte, die mit 'Neue Antwort' beginnen, sollen immer dupliziert werden", value=True)
-
-        # Aktualisierte Funktion zur Überprüfung, ob der Text immer dupliziert werden soll
-        def should_always_duplicate(text):
-            # Verarbeite die spezielle Fälle aus dem UI
-            special_cases = special_cases_input.splitlines()
-            for case in special_cases:
-                if re.search(case.strip(), text):
-                    return True
-            
-            # Überprüfung der weiteren Bedingungen
-            if tag_start_end and text.startswith('<') and text.endswith('>'):
-                return True
-            if exclamation_mark and text.startswith('!%') and text.endswith('%!'):
-                return True
-            if single_exclamation and text.startswith('!') and text.endswith('!'):
-                return True
-            if starts_with_zc and text.startswith('ZC:'):
-                return True
-            if numeric_match and re.fullmatch(r'\d+(\.\d+)?', text):
-                return True
-            
-            # Zusätzliche Schlüsselwörter überprüfen
-            additional_terms_list = [term.strip().lower() for term in additional_terms.splitlines() if term.strip()]
-            if text.strip().lower() in additional_terms_list:
-                return True
-            
-            if brand_match and re.search(r'Brand\s+\d+', text):
-                return True
-            if starts_with_neue and text.startswith('Neue Antwort'):
-                return True
-            
-            return False
+            brand_match = st.checkbox("Texte, die mit 'Brand' gefolgt von einer Nummer beginnen, sollen immer dupliziert werden", key="rule_brand_match")
+            starts_with_neue = st.checkbox("Texte, die mit 'Neue Antwort' beginnen, sollen immer dupliziert werden", key="rule_starts_with_neue")
+
+            explain_rules = st.checkbox("Erklärmodus: In der Übersicht anzeigen, welche Regel gegriffen hat", value=False)
+
+            # Regelkonfiguration aus dem UI; sie wird nur bei Änderungen neu kompiliert
+            matching_rules = {
+                "special_cases": special_cases_input.splitlines(),
+                "keywords": additional_terms.splitlines(),
+                "tag_start_end": tag_start_end,
+                "exclamation_mark": exclamation_mark,
+                "single_exclamation": single_exclamation,
+                "starts_with_zc": starts_with_zc,
+                "numeric_match": numeric_match,
+                "brand_match": brand_match,
+                "starts_with_neue": starts_with_neue,
+            }
+            try:
+                rule_set = compile_rules(matching_rules)
+            except ValueError as e:
+                st.error(f"❌ Die festen Regeln sind ungültig: {e}")
+                st.stop()
+
+            st.download_button(
+                label="💾 Regelsatz speichern (.json)",
+                data=rule_set.to_json(),
+                file_name="matching_regeln.json",
+                mime="application/json"
+            )
+
+        # Ähnliche Einträge der Übersetzungsdatei übernehmen, statt sie an GPT zu schicken
+        with st.expander("Fuzzy-Matching (Achtung: Nur für fortgeschrittene Anwender)"):
+            fuzzy_enabled = st.checkbox(
+                "Ähnliche Texte aus der Übersetzungsdatei übernehmen (Fuzzy-Match)", value=True,
+                help="Texte, die sich nur leicht unterscheiden (Satzzeichen, Leerzeichen, Groß-/Kleinschreibung, einzelne Zeichen), "
+                     "erhalten die Übersetzung des ähnlichsten Eintrags. Sie sind in der Spalte 'Quelle' als 'Fuzzy-Match' markiert."
+            )
+            fuzzy_threshold = st.slider(
+                "Mindestähnlichkeit (%)", min_value=70, max_value=99, value=int(FUZZY_THRESHOLD * 100), step=1,
+                disabled=not fuzzy_enabled
+            )
+
+        def overview_frame(df):
+            """Tabelle für die Übersicht mit farbig markierter Quelle; im Erklärmodus mit der Spalte 'Regel'."""
+            df = df.assign(Quelle=df['Quelle'].map(SOURCE_MARKERS).fillna(df['Quelle']))
+            if not explain_rules:
+                return df
+            return df.assign(Regel=rule_set.explain_series(df['Vergleichstext Ursprungsversion']))
         
         st.markdown("---")
 
         # Datei-Upload oder Template verwenden
         rogator_file = st.file_uploader("Lade deine Rogator-Exportdatei hoch", type=["xlsx"])
         
-        # Übersetzungsdatei-Upload-Bereich
-        st.subheader("Übersetzungsdatei")
-        upload_method = st.radio(
-            "Wähle eine Option:",
-            ["Neue Übersetzungsdatei hochladen", "Vorlage verwenden"],
-            index=0
+        # Übersetzungsquellen: mehrere Dateien und Vorlagen, nach Priorität zu einem Index zusammengeführt
+        st.subheader("Übersetzungsdateien")
+        translation_uploads = st.file_uploader(
+            "Lade deine Übersetzungsdateien hoch", type=["xlsx"], accept_multiple_files=True
         )
-
-        if upload_method == "Neue Übersetzungsdatei hochladen":
-            translation_file = st.file_uploader("Lade deine Übersetzungsdatei hoch", type=["xlsx"])
-        else:
-            # Template-Auswahl
-            templates = load_templates_from_github()
+        # Vorlagen nur mit konfigurierter Vorlagenablage und erst auf Wunsch laden
+        template_store = configured_template_store()
+        templates = []
+        selected_templates = []
+        if template_store is not None and st.checkbox("Übersetzungsvorlagen verwenden", key="use_templates"):
+            templates = load_templates()
             if templates:
-                selected_template = st.selectbox(
-                    "Verfügbare Übersetzungsvorlagen",
+                selected_templates = st.multiselect(
+                    "Übersetzungsvorlagen",
                     options=[t['name'] for t in templates],
-                    index=None,
-                    placeholder="Wähle eine Vorlage..."
+                    format_func=lambda name: template_label(next(t for t in templates if t['name'] == name)),
+                    placeholder="Wähle eine oder mehrere Vorlagen..."
                 )
-                
-                if selected_template:
-                    if st.button("🔄 Vorlage laden", key="load_template"):
-                        try:
-                            g = Github(st.secrets["github"]["token"])
-                            repo = g.get_repo(st.secrets["github"]["repo"])
-                            template = next(t for t in templates if t['name'] == selected_template)
-                            content = repo.get_contents(template['path'])
-                            file_content = content.decoded_content  # Korrekte Binärdaten
-                            
-                            # Behandle die Datei wie einen normalen File-Upload
-                            file_like = BytesIO(file_content)
-                            file_like.name = template['path']  # Setze einen Dateinamen
-                            
-                            # Speichere die Datei im Session State
-                            st.session_state.translation_file = file_like
-                            st.session_state.template_loaded = True
-                            st.success(f"✅ Vorlage '{selected_template}' erfolgreich geladen!")
-                            st.rerun()
-                            
-                        except Exception as e:
-                            st.error(f"❌ Fehler beim Laden der Vorlage: {str(e)}")
             else:
                 st.info("🔍 Keine Vorlagen verfügbar.")
-            
-            # Verwende die geladene Template-Datei wenn vorhanden
-            if st.session_state.get("template_loaded", False) and st.session_state.get("translation_file") is not None:
-                translation_file = st.session_state.translation_file
-            else:
-                translation_file = None
 
-        if rogator_file and translation_file:
+        # (Name, hochgeladene Datei oder Vorlage) je Quelle
+        translation_sources = [(upload.name, upload) for upload in translation_uploads or []]
+        translation_sources += [
+            (name, next(t for t in templates if t['name'] == name)) for name in selected_templates
+        ]
+        if len(translation_sources) > 1:
+            st.caption("Gibt es einen Text in mehreren Quellen, gewinnt die Quelle mit der kleineren Priorität (1 = höchste).")
+            priorities = st.data_editor(
+                pd.DataFrame({
+                    'Priorität': range(1, len(translation_sources) + 1),
+                    'Übersetzungsquelle': [
+                        f"{'📚' if isinstance(source, dict) else '📄'} {name}" for name, source in translation_sources
+                    ],
+                }),
+                disabled=['Übersetzungsquelle'],
+                hide_index=True,
+            )
+            order = priorities['Priorität'].fillna(len(translation_sources)).to_numpy().argsort(kind='stable')
+            translation_sources = [translation_sources[position] for position in order]
+
+        def show_memory_feedback(templates, selected_templates):
+            candidates = memory_pairs(st.session_state.memory_candidates)
+            if candidates.empty or template_store is None:
+                return
+            with st.expander(f"🧠 KI-Übersetzungen in eine Vorlage übernehmen ({len(candidates)})"):
+                st.markdown(
+                    "Prüfe die Übersetzungen dieser Sitzung und übernimm sie in eine Vorlage. "
+                    "Alle ausgewählten Paare werden in einem Schritt gespeichert."
+                )
+                reviewed = st.data_editor(
+                    pd.DataFrame({
+                        'Übernehmen': True,
+                        'Ausgangstext': candidates['source'],
+                        'Übersetzung': candidates['target'],
+                    }),
+                    disabled=['Ausgangstext'],
+                    hide_index=True,
+                    key="memory_review",
+                )
+                templates = templates or load_templates()
+                if not templates:
+                    st.info("🔍 Keine Vorlagen verfügbar. Lege zuerst unter „Vorlagen verwalten“ eine Vorlage an.")
+                    return
+                names = [t['name'] for t in templates]
+                target_name = st.selectbox(
+                    "Ziel-Vorlage",
+                    options=names,
+                    index=names.index(selected_templates[0]) if selected_templates else 0,
+                    format_func=lambda name: template_label(next(t for t in templates if t['name'] == name)),
+                )
+                if st.button("💾 In Vorlage übernehmen", key="save_memory"):
+                    accepted = reviewed[reviewed['Übernehmen'] & reviewed['Übersetzung'].fillna('').str.strip().ne('')]
+                    try:
+                        with st.spinner("Speichere Übersetzungen..."):
+                            # Ein Aufruf: eine Transaktion (Translation Memory) bzw. ein Commit (GitHub)
+                            count = template_store.add_segments(
+                                next(t for t in templates if t['name'] == target_name),
+                                zip(accepted['Ausgangstext'], accepted['Übersetzung'].str.strip()),
+                            )
+                    except Exception as e:
+                        st.error(f"❌ Fehler beim Speichern der Übersetzungen: {str(e)}")
+                        return
+                    st.session_state.memory_candidates = {}
+                    st.success(f"✅ {count} Übersetzungen in die Vorlage '{target_name}' übernommen!")
+
+        def source_key(source):
+            # Vorlagen über ihre Version, hochgeladene Dateien über den Inhalt
+            return f"template:{source['version']}" if isinstance(source, dict) else document_cache_key(source.getvalue())
+
+        def load_translation_source(source, wanted_texts):
+            if isinstance(source, dict):
+                # Vorlagen liefert die Vorlagenablage bereits indiziert
+                return template_store.load_index(source, wanted_texts)
+            translation_df = pd.read_excel(BytesIO(source.getvalue()), engine='openpyxl')
+            translation_df.columns = ['Master / English', 'DE']
+            return build_translation_index(translation_df)
+
+        def match_all(rogator_df, export_key):
+            # Ohne Fuzzy-Matching genügen aus den Vorlagen die Einträge zu den Texten des Exports
+            wanted_texts = None if fuzzy_enabled else clean_series_for_matching(
+                pd.Series(rogator_df[SOURCE_COLUMN].astype(object).map(str).unique(), dtype=object)
+            )
+            # Alle Quellen einmal zu einem Index zusammenführen, der die Herkunft jedes Eintrags kennt
+            translation_index, translation_origins = merge_translation_indexes(
+                (name, memoized(
+                    ("source", source_key(source), export_key if wanted_texts is not None and isinstance(source, dict) else None),
+                    lambda source=source: load_translation_source(source, wanted_texts),
+                ))
+                for name, source in translation_sources
+            )
+
+            # Abgleich aller Zeilen in einem Durchlauf (Regeln, Bereinigung und Lookup vektorisiert)
+            processed, unmatched_indices = match_export(
+                rogator_df, translation_index, rule_set.mask, translation_origins
+            )
+            if fuzzy_enabled and unmatched_indices:
+                processed, unmatched_indices = apply_fuzzy_matches(
+                    processed, unmatched_indices, build_fuzzy_index(translation_index, translation_origins),
+                    fuzzy_threshold / 100
+                )
+            return processed, unmatched_indices
+
+        def export_download(processed):
+            output = BytesIO()
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                export_frame(processed).to_excel(writer, index=False)
+            return base64.b64encode(output.getvalue()).decode()
+
+        if rogator_file and translation_sources:
             try:
-                # Einlesen der Rogator-Datei
-                rogator_df = pd.read_excel(rogator_file, engine='openpyxl')
+                # Einlesen der Rogator-Datei (je Dateiinhalt nur einmal pro Sitzung)
+                rogator_bytes = rogator_file.getvalue()
+                export_key = document_cache_key(rogator_bytes)
+                rogator_df = memoized(("export", export_key), lambda: pd.read_excel(BytesIO(rogator_bytes), engine='openpyxl'))
 
-                required_columns = ['Frage-ID (gesperrt)', 'Text zur Übersetzung / Versionsanpassung', 'Vergleichstext Ursprungsversion']
-                if not all(col in rogator_df.columns for col in required_columns):
-                    st.error(f"Die Rogator-Datei muss die folgenden Spalten enthalten: {required_columns}")
+                if not all(col in rogator_df.columns for col in REQUIRED_COLUMNS):
+                    st.error(f"Die Rogator-Datei muss die folgenden Spalten enthalten: {REQUIRED_COLUMNS}")
                     st.stop()
 
-                # Einlesen der Übersetzungsdatei
-                translation_df = pd.read_excel(translation_file, engine='openpyxl')
-                translation_df.columns = ['Master / English', 'DE']
-
-                translation_df['Master / English'] = translation_df['Master / English'].astype(str)
-                translation_df['Clean English'] = translation_df['Master / English'].apply(clean_text_for_matching)
-                translation_dict = pd.Series(
-                    translation_df['DE'].values, index=translation_df['Clean English']
-                ).to_dict()
-
-                rogator_df_processed = rogator_df.copy()
-                rogator_df_processed['Quelle'] = 'Match'  # Initialisieren als 'Match'
-                unmatched_texts = []
-                unmatched_indices = []
-
-                # Process Rogator DataFrame and match texts with the translation file
-                unmatched_texts = []
-                unmatched_indices = []
-
-                for index, row in rogator_df_processed.iterrows():
-                    text_to_translate = str(row['Vergleichstext Ursprungsversion'])
-                    
-                    # Bereinigung für Platzhalter
-                    clean_text_to_translate, placeholders = clean_text_with_placeholders(text_to_translate)
-
-                    # Überprüfung auf spezielle Fälle
-                    if should_always_duplicate(text_to_translate):
-                        rogator_df_processed.at[index, 'Text zur Übersetzung / Versionsanpassung'] = text_to_translate
-                        rogator_df_processed.at[index, 'Quelle'] = 'Match'
-                        continue
-
-                    # Bereinigung für Matching
-                    cleaned_for_matching = clean_text_for_matching(text_to_translate)
-
-                    # Versuchen, eine bestehende ��bersetzung zu finden
-                    if cleaned_for_matching in translation_dict:
-                        translation = translation_dict[cleaned_for_matching]
-                        # Überprüfen, ob die Übersetzung leer, "nan" oder None ist
-                        if pd.isna(translation) or translation is None or translation.strip() == "":
-                            # Wenn die Übersetzung leer ist, zur KI-Übersetzungsliste hinzufügen
-                            unmatched_texts.append(text_to_translate)
-                            unmatched_indices.append(index)
-                            print(f"Leere Übersetzung zur KI-Übersetzung hinzugefügt: {text_to_translate}")  # Debug-Ausgabe
-                        else:
-                            restored_translation = restore_text(translation, placeholders)
-                            rogator_df_processed.at[index, 'Text zur Übersetzung / Versionsanpassung'] = restored_translation
-                            rogator_df_processed.at[index, 'Quelle'] = 'Match'
-                    else:
-                        # Statt alle nicht gematchten Texte zu sammeln, prüfen wir, ob die Zelle nach dem Matching leer ist
-                        existing_translation = row.get('Text zur Übersetzung / Versionsanpassung', "")
-                        # Prüfen, ob die ��bersetzungszelle leer, `None`, oder nur aus Whitespaces besteht
-                        if pd.isna(existing_translation) or existing_translation is None or existing_translation.strip() == "":
-                            unmatched_texts.append(text_to_translate)
-                            unmatched_indices.append(index)
-                            print(f"Text zur Übersetzung hinzugefügt: {text_to_translate}")  # Debug-Ausgabe
+                # Abgleich nur neu berechnen, wenn sich Dateien, Vorlagen, Reihenfolge, Regeln oder Fuzzy-Einstellungen ändern
+                match_key = document_cache_key(
+                    rogator_bytes,
+                    sources=[source_key(source) for _, source in translation_sources],
+                    names=[name for name, _ in translation_sources],
+                    rules=rule_set.to_json(),
+                    fuzzy=fuzzy_threshold if fuzzy_enabled else None,
+                )
+                rogator_df_processed, unmatched_indices = memoized(
+                    ("match", match_key), lambda: match_all(rogator_df, export_key)
+                )
+
+                # Bereits bezahlte KI-Übersetzungen (gleiches Modell, gleiche Systemanweisung) wieder einsetzen
+                prompt_key = document_cache_key(b"matching-gpt", model=selected_model, system_message=custom_system_message)
+                known_translations = gpt_results_for(prompt_key)
+                num_open_texts = len(unmatched_indices)
+                rogator_df_processed, unmatched_indices = apply_known_translations(
+                    rogator_df_processed, unmatched_indices, known_translations
+                )
+                # Eigene Kopie: die KI-Übersetzung schreibt in die Tabelle, der Cache-Eintrag bleibt unverändert
+                rogator_df_processed = rogator_df_processed.copy()
+                num_known_texts = num_open_texts - len(unmatched_indices)
+                unmatched_texts = rogator_df_processed.loc[unmatched_indices, 'Vergleichstext Ursprungsversion'].map(str).tolist()
 
                 # Count matched and unmatched texts
                 num_matched_texts = rogator_df_processed[rogator_df_processed['Quelle'] == 'Match'].shape[0]
+                num_fuzzy_texts = rogator_df_processed[rogator_df_processed['Quelle'] == 'Fuzzy-Match'].shape[0]
                 num_unmatched_texts = len(unmatched_texts)
 
                 # Display the counts in the Streamlit app
                 st.info(f"**{num_matched_texts}** Texte wurden in der Übersetzungsdatei gefunden. ✨")
+                if len(translation_sources) > 1:
+                    hits_per_source = rogator_df_processed[MEMORY_COLUMN].value_counts()
+                    st.caption(" · ".join(f"{origin}: {count}" for origin, count in hits_per_source.items()))
+                if num_fuzzy_texts:
+                    st.info(f"**{num_fuzzy_texts}** Texte wurden über einen ähnlichen Eintrag übernommen (Fuzzy-Match, mindestens {fuzzy_threshold} % Ähnlichkeit). Bitte prüfe diese Zeilen. 🔍")
+                if num_known_texts:
+                    st.info(f"**{num_known_texts}** Texte wurden aus bereits vorliegenden KI-Übersetzungen übernommen. ♻️")
                 st.info(f"**{num_unmatched_texts}** Texte sind noch offen und können von der KI übersetzt werden.\nKlicke hierfür auf den Button unter der Übersicht. 👇")
 
                 # Display DataFrame in Streamlit
                 st.header("Übersicht")
                 dataframe_placeholder = st.empty()
 
-                # Function for cell highlighting is already defined above (highlight_cells)
-                styled_df = rogator_df_processed.style.apply(highlight_cells, axis=1)
-
-                dataframe_placeholder.dataframe(styled_df)
+                dataframe_placeholder.dataframe(overview_frame(rogator_df_processed), column_config=overview_column_config())
 
                 # Hinzufügen des "Start Translation" Buttons
                 if st.button("Starte KI-Übersetzung"):
@@ -507,76 +662,83 @@ def matching_app():
                         st.header("Übersetzung der nicht gefundenen Texte mit KI")
                         st.info(f"{len(unmatched_texts)} Texte werden jetzt von der KI übersetzt. ⏳")
 
-                        # Initialize the GPT translations list and placeholder
+                        # Live-Ansicht nur der geänderten Zeilen; die vollständige Übersicht wird erst am Ende neu gesendet
                         gpt_translations = []
                         gpt_placeholder = st.empty()
                         gpt_placeholder.dataframe(pd.DataFrame(columns=['Index', 'Original Text', 'Translated Text']))
 
-                        # Initialisierung der OpenAI API
-                        openai.api_key = api_key
-
                         # Fortschrittsbalken und Status-Text
                         progress_bar = st.progress(0)
                         status_text = st.empty()
 
-                        translated_texts = []
-
-                        for i, text in enumerate(unmatched_texts):
-                            try:
-                                response = openai.chat.completions.create(
-                                    model=selected_model,
-                                    messages=[
-                                        {"role": "system", "content": custom_system_message},
-                                        {"role": "user", "content": text}
-                                    ]
-                                )
-                                translation = response.choices[0].message.content.strip()
-                                restored_translation = restore_text(translation, [])
-                                translated_texts.append(restored_translation)
-                                rogator_df_processed.at[unmatched_indices[i], 'Text zur Übersetzung / Versionsanpassung'] = restored_translation
-                                rogator_df_processed.at[unmatched_indices[i], 'Quelle'] = 'GPT'
-                            except Exception as e:
-                                restored_translation = f"Fehler: {e}"
-                                translated_texts.append(restored_translation)
-                                rogator_df_processed.at[unmatched_indices[i], 'Text zur Übersetzung / Versionsanpassung'] = restored_translation
-                                rogator_df_processed.at[unmatched_indices[i], 'Quelle'] = 'GPT'
-                            
-                            # Append the translation to the GPT translations list
-                            gpt_translations.append({
-                                'Index': unmatched_indices[i],
-                                'Original Text': text,
-                                'Translated Text': restored_translation
-                            })
-
-                            # Convert the GPT translations list to a DataFrame
-                            gpt_translations_df = pd.DataFrame(gpt_translations)
-
-                            # Update the GPT translations placeholder with the new DataFrame
-                            gpt_placeholder.dataframe(gpt_translations_df)
-
-                            # Fortschritts aktualisieren
-                            progress = (i + 1) / len(unmatched_texts)
-                            progress_bar.progress(progress)
-                            status_text.text(f"Übersetzung {i + 1} von {len(unmatched_texts)} abgeschlossen.")
-                            
-                            # Update des Haupt-DataFrames im UI mit neuem Styling
-                            styled_df = rogator_df_processed.style.apply(highlight_cells, axis=1)
-                            dataframe_placeholder.dataframe(styled_df)
-
-                        st.success("Die KI-Übersetzung ist abgeschlossen. Die vollständige Übersetzung kann jetzt heruntergeladen werden. 🏆")
+                        # Zeilen je Text: gleiche Texte werden nur einmal übersetzt
+                        rows_by_text = {}
+                        for index, text in zip(unmatched_indices, unmatched_texts):
+                            rows_by_text.setdefault(text, []).append(index)
+
+                        last_render = {"time": 0.0, "rows": 0}
+
+                        def render_progress(final=False):
+                            # Gedrosselt: höchstens alle UI_REFRESH_SECONDS Sekunden und nur bei neuen Zeilen
+                            if not final and time.monotonic() - last_render["time"] < UI_REFRESH_SECONDS:
+                                return
+                            if len(gpt_translations) == last_render["rows"] and not final:
+                                return
+                            last_render.update(time=time.monotonic(), rows=len(gpt_translations))
+                            gpt_placeholder.dataframe(pd.DataFrame(gpt_translations))
+                            progress_bar.progress(len(gpt_translations) / len(unmatched_texts))
+                            status_text.text(f"Übersetzung {len(gpt_translations)} von {len(unmatched_texts)} abgeschlossen.")
+
+                        def on_batch_done(translations):
+                            batch_rows = [
+                                {'Index': index, 'Original Text': text, 'Translated Text': restore_text(translation, [])}
+                                for text, translation in translations.items()
+                                for index in rows_by_text[text]
+                            ]
+                            gpt_translations.extend(batch_rows)
+                            # Schreiben in einem Schritt je Batch statt Zelle für Zelle
+                            changed = [row['Index'] for row in batch_rows]
+                            rogator_df_processed.loc[changed, 'Text zur Übersetzung / Versionsanpassung'] = [
+                                row['Translated Text'] for row in batch_rows
+                            ]
+                            rogator_df_processed.loc[changed, 'Quelle'] = 'GPT'
+                            # Nur erfolgreiche Übersetzungen werden zur Übernahme in eine Vorlage angeboten
+                            st.session_state.memory_candidates.update(
+                                (text, translation) for text, translation in translations.items() if translation
+                            )
+                            known_translations.update(translations)
+                            render_progress()
+
+                        # Nur Texte ohne gespeichertes KI-Ergebnis für dieses Modell und diese Systemanweisung senden
+                        texts_to_translate = [text for text in rows_by_text if text not in known_translations]
+
+                        try:
+                            asyncio.run(translate_texts(
+                                api_key, custom_system_message, texts_to_translate, selected_model, batch_size, on_batch_done
+                            ))
+                        finally:
+                            # Auch bei Abbruch bleiben die bisher bezahlten Übersetzungen erhalten
+                            store_gpt_results(prompt_key, selected_model)
+                        render_progress(final=True)
+
+                        # Vollständige Übersicht einmal nach Abschluss aktualisieren
+                        dataframe_placeholder.dataframe(overview_frame(rogator_df_processed), column_config=overview_column_config())
+
+                        num_failed_texts = sum(text not in known_translations for text in texts_to_translate)
+                        if num_failed_texts:
+                            st.warning(f"**{num_failed_texts}** Texte konnten nicht übersetzt werden und bleiben offen. Starte die KI-Übersetzung erneut, um sie nachzuholen.")
+                        else:
+                            st.success("Die KI-Übersetzung ist abgeschlossen. Die vollständige Übersetzung kann jetzt heruntergeladen werden. 🏆")
                     elif not api_key and unmatched_texts:
                         st.warning("Es gibt nicht gefundende Texte, aber kein OpenAI API-Schlüssel wurde eingegeben. Bitte gib einen API-Schlüssel ein, um diese Texte zu übersetzen.")
                     else:
                         st.info("Alle Texte sind bereits übersetzt. Keine weiteren Aktionen erforderlich.")
 
-                # Download der verarbeiteten Datei
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    rogator_df_processed.to_excel(writer, index=False)
-                output.seek(0)
-
-                # Konvertiere die Excel-Datei in base64
-                b64 = base64.b64encode(output.getvalue()).decode()
+                # Download der verarbeiteten Datei (Excel und base64 nur bei geändertem Ergebnis neu erzeugen)
+                b64 = memoized(
+                    ("download", match_key, prompt_key, len(known_translations)),
+                    lambda: export_download(rogator_df_processed),
+                )
                 
                 # Erstelle den HTML-Button mit Download-Funktionalität
                 download_link = f'''
@@ -617,37 +779,56 @@ def matching_app():
                 # Zeige den Download-Button an
                 st.markdown(download_link, unsafe_allow_html=True)
 
+                # Geprüfte KI-Übersetzungen in eine Vorlage übernehmen, damit die nächste Welle sie findet
+                if st.session_state.memory_candidates:
+                    show_memory_feedback(templates, selected_templates)
+
             except Exception as e:
                 st.error(f"Es ist ein Fehler aufgetreten: {e}")
 
         st.markdown("---")
         
-        # Template Management (optional)
-        with st.expander("📚 Vorlagen verwalten"):
-            st.header("Übersetzungsvorlagen")
-            st.markdown("""
-            Hier können Übersetzungsdateien als Vorlagen gespeichert und wiederverwendet werden.
-            """)
+        # Template Management (optional, nur mit konfigurierter Vorlagenablage)
+        if template_store is not None:
+            with st.expander("📚 Vorlagen verwalten"):
+                st.header("Übersetzungsvorlagen")
+                st.markdown("""
+                Hier können Übersetzungsdateien als Vorlagen gespeichert und wiederverwendet werden.
+                """)
             
-            new_template = st.file_uploader(
-                "Excel-Datei (.xlsx)",
-                type=["xlsx"],
-                key="template_uploader",
-                help="Die Datei sollte zwei Spalten enthalten: 'Master / English' und 'DE'"
-            )
+                new_template = st.file_uploader(
+                    "Excel-Datei (.xlsx)",
+                    type=["xlsx"],
+                    key="template_uploader",
+                    help="Die Datei sollte zwei Spalten enthalten: 'Master / English' und 'DE'"
+                )
             
-            template_description = st.text_input(
-                "Beschreibung/Name der Vorlage",
-                placeholder="z.B. Henkel Waschmaittel Spanisch",
-                help="Geben Sie einen beschreibenden Namen für die Vorlage ein"
-            )
+                template_description = st.text_input(
+                    "Beschreibung/Name der Vorlage",
+                    placeholder="z.B. Henkel Waschmaittel Spanisch",
+                    help="Geben Sie einen beschreibenden Namen für die Vorlage ein"
+                )
+
+                # Schlagworte (werden nur im lokalen Translation Memory gespeichert)
+                tag_col1, tag_col2, tag_col3, tag_col4 = st.columns(4)
+                template_tags = {
+                    "source_language": tag_col1.text_input("Ausgangssprache", key="template_source_language"),
+                    "target_language": tag_col2.text_input("Zielsprache", key="template_target_language"),
+                    "client": tag_col3.text_input("Kunde", key="template_client"),
+                    "project": tag_col4.text_input("Projekt", key="template_project"),
+                }
             
-            if new_template and template_description:
-                if st.button("💾 Als Vorlage speichern", key="save_template"):
-                    with st.spinner("Speichere Vorlage..."):
-                        if save_translation_to_github(new_template, template_description):
-                            st.success("✅ Vorlage erfolgreich gespeichert!")
-                            st.rerun()
+                if new_template and template_description:
+                    if st.button("💾 Als Vorlage speichern", key="save_template"):
+                        with st.spinner("Speichere Vorlage..."):
+                            if save_template(new_template, template_description, template_tags):
+                                st.success("✅ Vorlage erfolgreich gespeichert!")
+                                st.rerun()
+
+                if template_store.supports_search:
+                    search_query = st.text_input("🔎 Translation Memory durchsuchen", key="template_search")
+                    if search_query:
+                        st.dataframe(template_store.search(search_query), use_container_width=True, hide_index=True)
 
     # Zeige Hauptanwendung oder Tutorial
     if st.session_state.tutorial_done:
@@ -685,80 +866,36 @@ def matching_app():
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
-def save_translation_to_github(translation_file, description):
+def get_template_store():
+    """Ablage der Übersetzungsvorlagen: GitHub-Repository oder lokales Translation Memory (BONSAI_TEMPLATE_BACKEND)"""
+    if TEMPLATE_BACKEND == "sqlite":
+        return get_sqlite_store()
+    return GitHubTemplateStore(st.secrets["github"]["token"], st.secrets["github"]["repo"])
+
+def configured_template_store():
+    """Vorlagenablage oder None, wenn keine konfiguriert ist (z.B. fehlende GitHub-Secrets)"""
+    try:
+        return get_template_store()
+    except Exception:
+        return None
+
+def save_template(translation_file, description, tags):
     """
-    Speichert eine Übersetzungsdatei auf GitHub als Template
+    Speichert eine Übersetzungsdatei als Vorlage
     """
     try:
-        # Lese die Excel-Datei als DataFrame
-        df = pd.read_excel(translation_file, engine='openpyxl')
-        
-        # Erstelle eine neue Excel-Datei
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False)
-        output.seek(0)
-        
-        g = Github(st.secrets["github"]["token"])
-        repo = g.get_repo(st.secrets["github"]["repo"])
-        
-        # Dateiname generieren
-        file_name = f"templates/{description.lower().replace(' ', '_')}.xlsx"
-        
-        # Datei als Binärdaten
-        content = output.getvalue()  # Entfernt base64 Encoding
-        
-        try:
-            # Versuche existierende Datei zu aktualisieren
-            contents = repo.get_contents(file_name)
-            repo.update_file(
-                file_name,
-                f"Update translation template: {description}",
-                content,  # Direkte Binärdaten
-                contents.sha,
-                branch="main"  # Sicherstellen, dass der Branch korrekt ist
-            )
-        except:
-            # Wenn Datei nicht existiert, neue erstellen
-            repo.create_file(
-                file_name,
-                f"Add translation template: {description}",
-                content,
-                branch="main"  # Sicherstellen, dass der Branch korrekt ist
-            )
+        get_template_store().save_template(description, translation_file.getvalue(), tags)
         return True
     except Exception as e:
         st.error(f"Fehler beim Speichern der Vorlage: {str(e)}")
         return False
 
-def load_templates_from_github():
+def load_templates():
     """
-    Lädt verfügbare Übersetzungsvorlagen von GitHub
+    Lädt verfügbare Übersetzungsvorlagen aus der Vorlagenablage
     """
     try:
-        g = Github(st.secrets["github"]["token"])
-        repo = g.get_repo(st.secrets["github"]["repo"])
-        templates = []
-        
-        try:
-            # Prüfe ob templates Verzeichnis existiert
-            contents = repo.get_contents("templates")
-        except Exception as e:
-            # Wenn nicht, erstelle es
-            repo.create_file(
-                "templates/README.md",
-                "Initialize templates directory",
-                "# Translation Templates\nThis directory contains translation templates."
-            )
-            contents = repo.get_contents("templates")
-            
-        for content in contents:
-            if content.name.endswith('.xlsx'):
-                templates.append({
-                    'name': content.name.replace('.xlsx', '').replace('_', ' ').title(),
-                    'path': content.path
-                })
-        return templates
+        return get_template_store().list_templates()
     except Exception as e:
         st.error(f"Fehler beim Laden der Vorlagen: {str(e)}")
         return []
@@ -0,0 +1,233 @@
+# matching_engine.py
+import re
+
+import numpy as np
+import pandas as pd
+
+from fuzzy_index import FuzzyIndex
+from matching_rules import DEFAULT_RULES, compile_rules
+
+# Spalten der Rogator-Exportdatei
+QUESTION_ID_COLUMN = 'Frage-ID (gesperrt)'
+TARGET_COLUMN = 'Text zur Übersetzung / Versionsanpassung'
+SOURCE_COLUMN = 'Vergleichstext Ursprungsversion'
+ORIGIN_COLUMN = 'Quelle'
+FUZZY_SCORE_COLUMN = 'Fuzzy-Score'
+MEMORY_COLUMN = 'Übersetzungsquelle'
+REQUIRED_COLUMNS = [QUESTION_ID_COLUMN, TARGET_COLUMN, SOURCE_COLUMN]
+# Nur für die Übersicht in der App; die Datei für den Re-Import in Rogator enthält sie nicht
+DISPLAY_ONLY_COLUMNS = [FUZZY_SCORE_COLUMN, MEMORY_COLUMN]
+
+# Fuzzy-Matching: Mindestähnlichkeit (Levenshtein-Ratio) und Mindestlänge des bereinigten Texts;
+# kurze Texte ("Ja", "Nein", "Item 1") unterscheiden sich schon durch ein Zeichen inhaltlich
+FUZZY_THRESHOLD = 0.9
+FUZZY_MIN_LENGTH = 10
+
+# Rogator-Platzhalter (!%...%!), die für den Abgleich entfernt und danach wieder eingesetzt werden.
+# Die beiden Durchläufe entsprechen der bisherigen Bereinigung (erst !%...%!, dann {!%...%!}).
+PLACEHOLDER_PATTERNS = (re.compile(r'!%.*?%!'), re.compile(r'{!%.*?%!}'))
+
+
+def clean_text_for_matching(text) -> str:
+    if pd.isna(text):
+        return ''
+    clean_line = str(text)
+    for pattern in PLACEHOLDER_PATTERNS:
+        clean_line = pattern.sub('', clean_line)
+    return clean_line.strip()
+
+
+def clean_text_with_placeholders(text):
+    """Removes the Rogator placeholders and returns (cleaned text, [(placeholder, position), ...])."""
+    if pd.isna(text):
+        return '', []
+    clean_line = str(text)
+    placeholders = []
+
+    def replace_with_placeholder(match):
+        placeholders.append((match.group(0), match.start()))
+        return ''
+
+    for pattern in PLACEHOLDER_PATTERNS:
+        clean_line = pattern.sub(replace_with_placeholder, clean_line)
+    return clean_line.strip(), placeholders
+
+
+def restore_text(cleaned_text, placeholders) -> str:
+    cleaned_text = str(cleaned_text)
+    for placeholder, position in sorted(placeholders, key=lambda item: item[1], reverse=True):
+        cleaned_text = cleaned_text[:position] + placeholder + cleaned_text[position:]
+    return cleaned_text
+
+
+def clean_series_for_matching(texts: pd.Series) -> pd.Series:
+    """Vectorized clean_text_for_matching over a whole column."""
+    cleaned = texts.astype(object)
+    for pattern in PLACEHOLDER_PATTERNS:
+        cleaned = cleaned.str.replace(pattern, '', regex=True)
+    return cleaned.str.strip()
+
+
+def is_blank(values: pd.Series) -> pd.Series:
+    """True for missing values and for values that are empty or whitespace only."""
+    return values.isna() | values.astype(str).str.strip().eq('')
+
+
+def build_translation_index(translation_df: pd.DataFrame) -> pd.Series:
+    """Builds the lookup index cleaned source text -> translation (later rows win, as before with to_dict())."""
+    sources = translation_df.iloc[:, 0].astype(object).map(str)
+    index = pd.Series(translation_df.iloc[:, 1].to_numpy(dtype=object), index=clean_series_for_matching(sources))
+    return index[~index.index.duplicated(keep='last')]
+
+
+def merge_translation_indexes(indexes):
+    """Merges several translation indexes into one, given as [(label, index), ...] in priority order.
+
+    Returns (merged index, label of the source per entry). For a text found in several sources the
+    first source with a usable translation wins; an empty entry of a higher-priority source does not
+    hide the translation of a lower one.
+    """
+    indexes = list(indexes)
+    if not indexes:
+        return pd.Series(dtype=object), pd.Series(dtype=object)
+    combined = pd.concat([
+        pd.DataFrame({'translation': index.to_numpy(dtype=object), 'origin': label}, index=index.index)
+        for label, index in indexes
+    ])
+    # Stabil sortiert: erst alle brauchbaren Einträge, innerhalb davon bleibt die Priorität erhalten
+    usable = ~is_blank(combined['translation']).to_numpy()
+    combined = combined.iloc[np.argsort(~usable, kind='stable')]
+    combined = combined[~combined.index.duplicated(keep='first')]
+    return combined['translation'], combined['origin']
+
+
+def match_export(rogator_df: pd.DataFrame, translation_index: pd.Series, duplicate_mask=None,
+                 translation_origins: pd.Series = None):
+    """Matches a Rogator export against the translation index in one vectorized pass.
+
+    Returns (processed copy with the column Quelle, index labels of the rows left for GPT). Rows
+    matching the fixed rules are copied unchanged, rows found in the index get the translation with
+    their placeholders restored, and rows without a usable translation and an empty target cell are
+    left for GPT. duplicate_mask receives the source texts and returns the boolean rule mask
+    (default: the compiled DEFAULT_RULES). With translation_origins (see merge_translation_indexes)
+    the column Übersetzungsquelle names the source of each match.
+
+    Exports repeat the same texts many times (scales, answer options, codes), so rules, cleaning
+    and lookup run once per distinct text and the results are broadcast back to the rows.
+    """
+    if duplicate_mask is None:
+        duplicate_mask = compile_rules(DEFAULT_RULES).mask
+    processed = rogator_df.copy()
+    processed[TARGET_COLUMN] = processed[TARGET_COLUMN].astype(object)
+    processed[ORIGIN_COLUMN] = 'Match'
+
+    # str() wie bisher, fehlende Werte werden zu "nan"
+    codes, uniques = pd.factorize(processed[SOURCE_COLUMN].astype(object).map(str))
+    texts = pd.Series(uniques, dtype=object)
+    duplicate = duplicate_mask(texts).to_numpy()
+    cleaned = clean_series_for_matching(texts)
+
+    in_index = cleaned.isin(translation_index.index).to_numpy()
+    translations = cleaned.map(translation_index).where(in_index & ~duplicate)
+    empty_translation = in_index & ~duplicate & is_blank(translations).to_numpy()
+    matched = in_index & ~duplicate & ~empty_translation
+
+    # Platzhalter nur dort zurücksetzen, wo der Originaltext welche enthält
+    results = texts.where(duplicate)
+    results[matched] = translations[matched].map(str)
+    with_placeholders = matched & texts.str.contains('!%', regex=False).to_numpy()
+    results[with_placeholders] = [
+        restore_text(translation, clean_text_with_placeholders(text)[1])
+        for translation, text in zip(translations[with_placeholders], texts[with_placeholders])
+    ]
+
+    written = (duplicate | matched)[codes]
+    processed.loc[written, TARGET_COLUMN] = results.to_numpy()[codes[written]]
+    if translation_origins is not None:
+        origins = cleaned.map(translation_origins).where(matched).to_numpy(dtype=object)
+        processed[MEMORY_COLUMN] = origins[codes]
+
+    open_cells = (~in_index & ~duplicate)[codes] & is_blank(rogator_df[TARGET_COLUMN]).to_numpy()
+    unmatched = open_cells | empty_translation[codes]
+    return processed, processed.index[unmatched].tolist()
+
+
+def apply_known_translations(processed: pd.DataFrame, unmatched_indices: list, translations: dict,
+                             origin: str = 'GPT'):
+    """Fills rows left for GPT whose source text was already translated ({source text: translation}).
+
+    Used for GPT results of earlier runs, so a rerun neither loses nor pays for them again. Returns
+    (processed, index labels still left for GPT).
+    """
+    if not unmatched_indices or not translations:
+        return processed, unmatched_indices
+    texts = processed.loc[unmatched_indices, SOURCE_COLUMN].astype(object).map(str)
+    known = texts.isin(translations.keys())
+    if not known.any():
+        return processed, unmatched_indices
+    processed = processed.copy()
+    processed.loc[texts.index[known], TARGET_COLUMN] = [translations[text] for text in texts[known]]
+    processed.loc[texts.index[known], ORIGIN_COLUMN] = origin
+    return processed, texts.index[~known].tolist()
+
+
+def memory_pairs(translations: dict) -> pd.DataFrame:
+    """Turns {source text: translation} into pairs for the translation memory.
+
+    Placeholders are removed on both sides (matching restores them from the export), pairs without
+    text or without a translation (failed requests) are dropped and every cleaned source text appears
+    once (the last translation wins).
+    """
+    translations = {text: translation for text, translation in translations.items() if isinstance(translation, str)}
+    pairs = pd.DataFrame({
+        'source': clean_series_for_matching(pd.Series(list(translations.keys()), dtype=object).map(str)),
+        'target': clean_series_for_matching(pd.Series(list(translations.values()), dtype=object).map(str)),
+    })
+    pairs = pairs[(pairs['source'] != '') & (pairs['target'] != '')]
+    return pairs.drop_duplicates('source', keep='last').reset_index(drop=True)
+
+
+def export_frame(processed: pd.DataFrame) -> pd.DataFrame:
+    """The processed export in the Rogator upload format (without the display-only columns)."""
+    return processed.drop(columns=DISPLAY_ONLY_COLUMNS, errors='ignore')
+
+
+def build_fuzzy_index(translation_index: pd.Series, translation_origins: pd.Series = None) -> FuzzyIndex:
+    """Fuzzy index over all entries of the translation index that have a usable translation."""
+    usable = translation_index[~is_blank(translation_index).to_numpy()]
+    labels = None if translation_origins is None else translation_origins.reindex(usable.index).tolist()
+    return FuzzyIndex(usable.index, usable.map(str), labels)
+
+
+def apply_fuzzy_matches(processed: pd.DataFrame, unmatched_indices: list, fuzzy_index: FuzzyIndex,
+                        threshold: float = FUZZY_THRESHOLD):
+    """Fills rows left for GPT with the most similar translation memory entry above the threshold.
+
+    Each distinct text is looked up once. Hits are written with their placeholders restored,
+    marked as 'Fuzzy-Match' in the column Quelle and get their similarity in percent in the column
+    Fuzzy-Score; if the index has labels, the column Übersetzungsquelle names the source of the hit.
+    Returns (processed, index labels still left for GPT).
+    """
+    processed = processed.copy()
+    processed[FUZZY_SCORE_COLUMN] = pd.Series(pd.NA, index=processed.index, dtype="Int64")
+    if not unmatched_indices or not len(fuzzy_index):
+        return processed, unmatched_indices
+
+    texts = processed.loc[unmatched_indices, SOURCE_COLUMN].astype(object).map(str)
+    hits = {}
+    for text in texts.unique():
+        cleaned = clean_text_for_matching(text)
+        if len(cleaned) >= FUZZY_MIN_LENGTH:
+            hit = fuzzy_index.lookup_entry(cleaned, threshold)
+            if hit is not None:
+                entry, score = hit
+                translation = restore_text(fuzzy_index.targets[entry], clean_text_with_placeholders(text)[1])
+                hits[text] = (translation, score, fuzzy_index.labels[entry])
+
+    found = texts[texts.isin(hits.keys())]
+    processed.loc[found.index, TARGET_COLUMN] = [hits[text][0] for text in found]
+    processed.loc[found.index, ORIGIN_COLUMN] = 'Fuzzy-Match'
+    processed.loc[found.index, FUZZY_SCORE_COLUMN] = [int(hits[text][1] * 100) for text in found]
+    if MEMORY_COLUMN in processed.columns:
+        processed.loc[found.index, MEMORY_COLUMN] = [hits[text][2] for text in found]
+    return processed, [index for index in unmatched_indices if texts[index] not in hits]
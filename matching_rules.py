@@ -0,0 +1,186 @@
+# matching_rules.py
+import json
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Feste Regeln: Schlüssel in der Konfiguration -> Bezeichnung im Erklärmodus
+RULE_LABELS = {
+    "special_cases": "Spezieller Fall",
+    "tag_start_end": "Tag <...>",
+    "exclamation_mark": "Platzhalter !%...%!",
+    "single_exclamation": "!...!",
+    "starts_with_zc": "ZC:",
+    "numeric_match": "Zahl",
+    "keywords": "Schlüsselwort",
+    "brand_match": "Brand + Nummer",
+    "starts_with_neue": "Neue Antwort",
+}
+
+# Muster der festen Regeln, die am Textanfang verankert sind; die Lookaheads bilden startswith/endswith
+# nach (auch bei überlappenden Texten wie "!" oder "!%!")
+ANCHORED_RULE_PATTERNS = {
+    "tag_start_end": r'(?=<)(?=[\s\S]*>\Z)',
+    "exclamation_mark": r'(?=!%)(?=[\s\S]*%!\Z)',
+    "single_exclamation": r'(?=!)(?=[\s\S]*!\Z)',
+    "starts_with_zc": r'ZC:',
+    "numeric_match": r'\d+(?:\.\d+)?\Z',
+    "starts_with_neue": r'Neue Antwort',
+}
+# Muster, die an jeder Stelle des Texts passen dürfen
+FLOATING_RULE_PATTERNS = {
+    "brand_match": r'Brand\s+\d+',
+}
+
+# Rückverweise (\1, \g<name>, (?P=name), (?(1)...)) und benannte Gruppen hängen an der Gruppennummerierung
+# bzw. an eindeutigen Namen; solche Muster werden nicht in die gemeinsame Alternation übernommen
+GROUP_REFERENCE_PATTERN = re.compile(r'(?<!\\)(?:\\\\)*\\(?:[1-9]|g<)|\(\?P[<=]|\(\?<(?![=!])|\(\?\(')
+
+DEFAULT_RULES = {
+    "special_cases": [
+        r'\{!%I-progress.txt%!}',
+        r'<div style="display:none;">&nbsp;</div>',
+        r'&nbsp;years',
+    ],
+    "keywords": [
+        "result:", "kommentar", "general remarks",
+        "allgemeine bemerkungen", "screenout", "quotafull", "&#10148",
+    ],
+    "tag_start_end": True,
+    "exclamation_mark": True,
+    "single_exclamation": True,
+    "starts_with_zc": True,
+    "numeric_match": True,
+    "brand_match": True,
+    "starts_with_neue": True,
+}
+
+
+class RuleSet:
+    """The fixed matching rules compiled into one alternation plus a keyword hash set.
+
+    Every enabled rule becomes a named group of a single regex, so checking a text costs one regex
+    scan and one set lookup, independent of the number of rules. Special cases that cannot be merged
+    (group references, named groups or global inline flags such as "(?i)") stay separate regexes. The configuration is a plain dict
+    (see DEFAULT_RULES) and can be exported and imported as JSON to share rule sets between projects.
+    """
+
+    def __init__(self, config: dict):
+        self.config = normalize_rules(config)
+        groups = []
+        self.separate_patterns = []
+        for position, case in enumerate(self.config["special_cases"]):
+            try:
+                compiled = re.compile(case)
+            except re.error as error:
+                raise ValueError(f"Ungültiges RegEx-Muster in Zeile {position + 1} ('{case}'): {error}") from error
+            if is_mergeable(case):
+                groups.append(f"(?P<special_cases_{position}>{case})")
+            else:
+                self.separate_patterns.append((position, compiled))
+        groups += [f"(?P<{name}>{pattern})" for name, pattern in FLOATING_RULE_PATTERNS.items() if self.config[name]]
+        # Die verankerten Regeln stehen gemeinsam hinter einem \A, damit sie ab der zweiten Stelle
+        # mit einer einzigen Prüfung ausscheiden
+        anchored = [f"(?P<{name}>{pattern})" for name, pattern in ANCHORED_RULE_PATTERNS.items() if self.config[name]]
+        if anchored:
+            groups.insert(0, r"\A(?:" + "|".join(anchored) + ")")
+        self.keywords = frozenset(term.lower() for term in self.config["keywords"])
+        try:
+            self.pattern = re.compile("|".join(groups)) if groups else None
+        except re.error as error:
+            # z.B. gleichnamige Gruppen oder Inline-Flags in mehreren Mustern
+            raise ValueError(f"Die speziellen Fälle lassen sich nicht kombinieren: {error}") from error
+
+    @classmethod
+    def from_json(cls, data) -> "RuleSet":
+        try:
+            config = json.loads(data)
+        except ValueError as error:
+            raise ValueError(f"Die Regeldatei ist kein gültiges JSON: {error}") from error
+        if not isinstance(config, dict):
+            raise ValueError("Die Regeldatei muss ein JSON-Objekt enthalten.")
+        return cls(config)
+
+    def to_json(self) -> str:
+        return json.dumps(self.config, ensure_ascii=False, indent=2)
+
+    def explain(self, text: str):
+        """Returns the label of the rule that fires for the text, or None."""
+        # Der früheste Treffer gewinnt, bei gleicher Stelle die gemeinsame Alternation
+        first = None
+        if self.pattern is not None:
+            match = self.pattern.search(text)
+            if match is not None:
+                # Die Regelgruppe schließt zuletzt, lastgroup ist also immer der Regelname
+                name = match.lastgroup
+                if name.startswith("special_cases_"):
+                    first = (match.start(), self._special_case_label(int(name.rsplit("_", 1)[1])))
+                else:
+                    first = (match.start(), RULE_LABELS[name])
+        for position, compiled in self.separate_patterns:
+            match = compiled.search(text)
+            if match is not None and (first is None or match.start() < first[0]):
+                first = (match.start(), self._special_case_label(position))
+        if first is not None:
+            return first[1]
+        if text.strip().lower() in self.keywords:
+            return RULE_LABELS["keywords"]
+        return None
+
+    def _special_case_label(self, position: int) -> str:
+        return f"{RULE_LABELS['special_cases']}: {self.config['special_cases'][position]}"
+
+    def mask(self, texts: pd.Series) -> pd.Series:
+        """Vectorized check over a column: True for texts that are copied unchanged."""
+        texts = texts.astype(object).map(str)
+        mask = texts.str.strip().str.lower().isin(self.keywords)
+        patterns = [compiled for _, compiled in self.separate_patterns]
+        if self.pattern is not None:
+            patterns.insert(0, self.pattern)
+        for pattern in patterns:
+            search = pattern.search
+            mask |= np.fromiter((search(text) is not None for text in texts), dtype=bool, count=len(texts))
+        return mask
+
+    def explain_series(self, texts: pd.Series) -> pd.Series:
+        """Vectorized explain(): the label of the firing rule per text ("" if none fires)."""
+        return texts.astype(object).map(lambda text: self.explain(str(text)) or "")
+
+
+def is_mergeable(case: str) -> bool:
+    """True if a special case keeps its meaning as one branch of the combined alternation."""
+    if GROUP_REFERENCE_PATTERN.search(case):
+        return False
+    try:
+        # Globale Inline-Flags ("(?i)...") sind nur am Anfang des gesamten Musters erlaubt
+        re.compile(f"x|(?P<case>{case})")
+    except re.error:
+        return False
+    return True
+
+
+def normalize_rules(config: dict) -> dict:
+    """Fills missing keys with the defaults and drops empty lines from the pattern and keyword lists."""
+    normalized = {}
+    for key, default in DEFAULT_RULES.items():
+        value = config.get(key, default)
+        if isinstance(default, list):
+            if isinstance(value, str):
+                value = value.splitlines()
+            # Leere Zeilen im Regelfeld würden sonst auf jeden Text passen
+            normalized[key] = [str(item).strip() for item in value if str(item).strip()]
+        else:
+            normalized[key] = bool(value)
+    return normalized
+
+
+@lru_cache(maxsize=32)
+def _compile_rules(config_json: str) -> RuleSet:
+    return RuleSet(json.loads(config_json))
+
+
+def compile_rules(config: dict) -> RuleSet:
+    """Returns the compiled rule set for a configuration; each configuration is compiled only once."""
+    return _compile_rules(json.dumps(normalize_rules(config), sort_keys=True, ensure_ascii=False))
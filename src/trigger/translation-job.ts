@@ -82,6 +82,68 @@ async function askAssistantQmCheck(
   }, 5, 2000);
 }
 
+// Lokale QA-Prüfung (analog zu translation_qa.py): nur auffällige Zeilen gehen an den LLM-QM-Check
+// Eckige Klammern nur mit Code-Inhalt ([ZC:A1]); Hinweise wie "[Bitte nur eine Antwort]" werden übersetzt
+const PLACEHOLDER_PATTERN = /\{\{?[^{}]*\}\}?|%(?:\d+\$)?[sdfi]|<\/?[A-Za-z][\w:-]*(?:\s[^<>]*)?\/?>|\[[A-Z0-9_]+(?::[A-Za-z0-9_]+)?\]/g;
+const NUMBER_PATTERN = /\d+(?:[.,'\u00a0\u202f]\d+)*/g;
+const GROUPED_NUMBER_PATTERN = /^(\d{1,3}(?:([.,'\u00a0\u202f])\d{3})+)(?:(?!\2)[.,](\d+))?$/;
+const DECIMAL_NUMBER_PATTERN = /^(\d+)[.,](\d+)$/;
+const LENGTH_CHECK_MIN_CHARS = 20;
+const LENGTH_RATIO_BOUNDS: [number, number] = [0.33, 3.0];
+
+function sortedTokens(text: string, pattern: RegExp): string {
+  return (text.match(pattern) || []).sort().join("\u0000");
+}
+
+function numericValue(token: string): string | null {
+  const grouped = token.match(GROUPED_NUMBER_PATTERN);
+  if (grouped) {
+    return String(Number(`${grouped[1].replace(/\D/g, "")}.${grouped[3] || "0"}`));
+  }
+  const decimal = token.match(DECIMAL_NUMBER_PATTERN);
+  return decimal ? String(Number(`${decimal[1]}.${decimal[2]}`)) : null;
+}
+
+// (Ziffergruppen, Zahlenwerte) als Mengen, analog zu numeric_signature in translation_qa.py
+function numericSignature(text: string): [string, string] {
+  const plain = text.replace(PLACEHOLDER_PATTERN, " ");
+  const groups = new Set<string>();
+  const values = new Set<string>();
+  for (const token of plain.match(NUMBER_PATTERN) || []) {
+    const tokenGroups = (token.match(/\d+/g) || []).map((digits) => String(parseInt(digits, 10)));
+    tokenGroups.forEach((group) => groups.add(group));
+    const value = numericValue(token);
+    (value !== null ? [value] : tokenGroups).forEach((item) => values.add(item));
+  }
+  return [[...groups].sort().join(","), [...values].sort().join(",")];
+}
+
+function numbersDiffer(source: string, target: string): boolean {
+  const [sourceGroups, sourceValues] = numericSignature(source);
+  const [targetGroups, targetValues] = numericSignature(target);
+  return sourceGroups !== targetGroups && sourceValues !== targetValues;
+}
+
+function localQaFindings(source: string, target: string): string[] {
+  const findings: string[] = [];
+  if (sortedTokens(source, PLACEHOLDER_PATTERN) !== sortedTokens(target, PLACEHOLDER_PATTERN)) {
+    findings.push("Platzhalter/Tags");
+  }
+  if (numbersDiffer(source, target)) {
+    findings.push("Zahlen/Datum");
+  }
+  if (source.length >= LENGTH_CHECK_MIN_CHARS) {
+    const ratio = target.length / source.length;
+    if (ratio < LENGTH_RATIO_BOUNDS[0] || ratio > LENGTH_RATIO_BOUNDS[1]) {
+      findings.push("Länge");
+    }
+  }
+  if (source.trim() === target.trim() && (source.match(/\p{L}/gu) || []).length >= 2) {
+    findings.push("Unübersetzt");
+  }
+  return findings;
+}
+
 export const translationTask = task({
   id: "translation-job",
   run: async (payload: any, params: any) => {
@@ -263,13 +325,21 @@ export const translationTask = task({
         }
       }
 
-      // Qualitätssicherung und QMS-Prüfung für jede Übersetzung
+      // Qualitätssicherung: lokale Prüfung für alle Zeilen, LLM-QM-Check nur für auffällige Zeilen
       logger.info("Starte Qualitätsprüfung");
+      let flaggedRows = 0;
       for (let i = 0; i < rows.length; i++) {
         const source = rows[i]["Vergleichstext Ursprungsversion"];
         const target = rows[i]["Text zur Übersetzung / Versionsanpassung"];
+        const findings =
+          typeof source === "string" && typeof target === "string" ? localQaFindings(source, target) : [];
+
+        if (findings.length > 0) {
+          flaggedRows++;
+          rows[i]["QMS"] = findings.join(", ");
+        }
 
-        if (source && target && source.trim() !== target.trim()) {
+        if (findings.length > 0 && source && target && source.trim() !== target.trim()) {
           try {
             const qmCheckMessages = [
               {
@@ -286,13 +356,13 @@ export const translationTask = task({
               },
               {
                 role: "user",
-                content: `Original (${source_language}): ${source}\n\nTranslation (${target_language}): ${target}`,
+                content: `Original (${source_language}): ${source}\n\nTranslation (${target_language}): ${target}\n\nAutomatic checks flagged: ${findings.join(", ")}`,
               },
             ];
 
             const qmCheckResult = await askAssistantQmCheck(openai, model, qmCheckMessages);
             if (qmCheckResult.toLowerCase() !== "ok") {
-              rows[i]["QMS"] = qmCheckResult;
+              rows[i]["QMS"] = `${findings.join(", ")}: ${qmCheckResult}`;
             }
           } catch (error) {
             logger.error("Fehler bei QM-Check", { row: i, error });
@@ -312,6 +382,7 @@ export const translationTask = task({
           logger.info("QM-Fortschritt aktualisiert", { progress, qmRow: i });
         }
       }
+      logger.info("Qualitätsprüfung abgeschlossen", { auffaellig: flaggedRows, zeilen: rows.length });
 
       // Rückkonvertierung in Excel
       logger.info("Konvertiere Daten zurück in Excel");
@@ -0,0 +1,227 @@
+# template_cache.py
+import json
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+import pandas as pd
+import requests
+
+from matching_engine import build_translation_index
+
+# Lokaler Spiegel der Vorlagen (gemeinsam für alle Sitzungen und Prozesse dieses Benutzers auf dem Server)
+DEFAULT_TEMPLATE_CACHE_DIR = os.environ.get(
+    "BONSAI_TEMPLATE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), f"bonsai_template_cache_{os.getuid() if hasattr(os, 'getuid') else 'user'}"),
+)
+# Nach so vielen Sekunden wird die Vorlagenliste im Hintergrund neu validiert
+REFRESH_SECONDS = int(os.environ.get("BONSAI_TEMPLATE_REFRESH_SECONDS", "300"))
+TEMPLATE_DIRECTORY = "templates"
+GITHUB_API = "https://api.github.com"
+REQUEST_TIMEOUT = 15
+
+
+def template_name(file_name: str) -> str:
+    """Display name of a template file ("henkel_ps_spanisch.xlsx" -> "Henkel Ps Spanisch")."""
+    return file_name.replace('.xlsx', '').replace('_', ' ').title()
+
+
+def read_translation_index(file_bytes: bytes) -> pd.Series:
+    """Parses a translation file (two columns: source, translation) into the matching lookup index."""
+    translation_df = pd.read_excel(BytesIO(file_bytes), engine='openpyxl')
+    translation_df.columns = ['Master / English', 'DE']
+    return build_translation_index(translation_df)
+
+
+def make_private_directory(path: str) -> None:
+    """Creates path readable and writable only by the current user; refuses a directory owned by someone else."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        if os.stat(path).st_uid != os.getuid():
+            raise PermissionError(f"Cache-Verzeichnis gehört einem anderen Benutzer: {path}")
+        os.chmod(path, 0o700)
+
+
+def dump_translation_index(translation_index: pd.Series) -> bytes:
+    """Serializes a translation index as JSON (missing translations become null)."""
+    translations = [None if pd.isna(value) else value for value in translation_index.to_numpy(dtype=object)]
+    return json.dumps(
+        {"sources": translation_index.index.tolist(), "translations": translations}, ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def parse_translation_index(content: bytes) -> pd.Series:
+    stored = json.loads(content.decode("utf-8"))
+    return pd.Series(stored["translations"], index=pd.Index(stored["sources"], dtype=object), dtype=object)
+
+
+class TemplateCache:
+    """Local mirror of the translation templates in the GitHub repository.
+
+    The template listing is revalidated with its ETag (a 304 answer costs no rate limit) and file
+    contents are stored by their git blob sha, so a template is downloaded and parsed only once per
+    version. Next to each file the parsed translation index is kept as JSON, which makes loading
+    a template a single file read. The mirror lives in a directory only the current user can access. If GitHub is slow, rate-limits or fails, the mirror keeps serving
+    the last known state.
+    """
+
+    def __init__(self, token: str, repo: str, directory: str = DEFAULT_TEMPLATE_CACHE_DIR, refresh_seconds: int = REFRESH_SECONDS):
+        self.token = token
+        self.repo = repo
+        self.refresh_seconds = refresh_seconds
+        self.directory = os.path.join(directory, repo.replace("/", "__"))
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        make_private_directory(directory)
+        make_private_directory(self.directory)
+        make_private_directory(os.path.join(self.directory, "blobs"))
+        make_private_directory(os.path.join(self.directory, "indexes"))
+
+    # ----- Ablage -----
+    def _listing_path(self) -> str:
+        return os.path.join(self.directory, "listing.json")
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.directory, "blobs", f"{sha}.xlsx")
+
+    def _index_path(self, sha: str) -> str:
+        return os.path.join(self.directory, "indexes", f"{sha}.json")
+
+    def _write(self, path: str, content: bytes) -> None:
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as temp_file:
+            temp_file.write(content)
+        os.replace(temp_path, path)
+
+    def _read_listing(self) -> dict:
+        try:
+            with open(self._listing_path(), encoding="utf-8") as listing_file:
+                return json.load(listing_file)
+        except (OSError, ValueError):
+            return {}
+
+    # ----- GitHub -----
+    def _headers(self, **extra) -> dict:
+        return {"Authorization": f"Bearer {self.token}", "X-GitHub-Api-Version": "2022-11-28", **extra}
+
+    def _fetch_blob(self, sha: str) -> bytes:
+        response = requests.get(
+            f"{GITHUB_API}/repos/{self.repo}/git/blobs/{sha}",
+            headers=self._headers(Accept="application/vnd.github.raw"),
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.content
+
+    def refresh(self, prefetch: bool = True) -> None:
+        """Revalidates the listing (If-None-Match); with prefetch, new or changed templates are mirrored with their indexes."""
+        with self._refresh_lock:
+            listing = self._read_listing()
+            headers = self._headers(Accept="application/vnd.github+json")
+            if listing.get("etag"):
+                headers["If-None-Match"] = listing["etag"]
+            response = requests.get(
+                f"{GITHUB_API}/repos/{self.repo}/contents/{TEMPLATE_DIRECTORY}", headers=headers, timeout=REQUEST_TIMEOUT
+            )
+            if response.status_code == 304:
+                templates = listing.get("templates", [])
+            elif response.status_code == 404:
+                templates = []
+            else:
+                response.raise_for_status()
+                templates = [
+                    {"name": template_name(item["name"]), "path": item["path"], "sha": item["sha"]}
+                    for item in response.json()
+                    if item.get("type") == "file" and item["name"].endswith(".xlsx")
+                ]
+                listing["etag"] = response.headers.get("ETag")
+            listing.update(templates=templates, fetched_at=time.time())
+            self._write(self._listing_path(), json.dumps(listing, ensure_ascii=False).encode("utf-8"))
+            self.last_error = None
+        if prefetch:
+            self.prefetch(templates)
+
+    def prefetch(self, templates: list) -> None:
+        """Mirrors and indexes the given templates so that loading them later is immediate."""
+        for template in templates:
+            try:
+                self.load_index(template)
+            except Exception:
+                # Nicht lesbare Vorlagen bleiben in der Liste; der Fehler zeigt sich erst beim Laden
+                continue
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            self.last_error = e
+
+    def refresh_in_background(self, force: bool = False) -> None:
+        """Starts a background refresh if the listing is older than refresh_seconds (or force is set)."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        if not force and time.time() - self._read_listing().get("fetched_at", 0) < self.refresh_seconds:
+            return
+        self._start_background(self._refresh_quietly)
+
+    def _start_background(self, target, *args) -> None:
+        self._refresh_thread = threading.Thread(target=target, args=args, daemon=True)
+        self._refresh_thread.start()
+
+    def invalidate(self) -> None:
+        """Forces a refresh on the next access (e.g. after saving a template)."""
+        listing = self._read_listing()
+        listing["fetched_at"] = 0
+        self._write(self._listing_path(), json.dumps(listing, ensure_ascii=False).encode("utf-8"))
+        self.refresh_in_background(force=True)
+
+    # ----- Zugriff -----
+    def list_templates(self) -> list:
+        """Returns [{name, path, sha}] from the mirror; only the very first call waits for GitHub (listing only)."""
+        listing = self._read_listing()
+        if "templates" not in listing:
+            self.refresh(prefetch=False)
+            listing = self._read_listing()
+            # Vorlagen und Indizes werden danach im Hintergrund gespiegelt
+            self._start_background(self.prefetch, listing.get("templates", []))
+        else:
+            self.refresh_in_background()
+        return listing.get("templates", [])
+
+    def load_bytes(self, template: dict) -> bytes:
+        path = self._blob_path(template["sha"])
+        try:
+            with open(path, "rb") as blob_file:
+                return blob_file.read()
+        except OSError:
+            content = self._fetch_blob(template["sha"])
+            self._write(path, content)
+            return content
+
+    def load_index(self, template: dict) -> pd.Series:
+        """Returns the pre-built translation index of a template version (parsed at most once)."""
+        path = self._index_path(template["sha"])
+        try:
+            with open(path, "rb") as index_file:
+                return parse_translation_index(index_file.read())
+        except Exception:
+            # Fehlende oder unlesbare Indexdatei: neu aufbauen
+            pass
+        translation_index = read_translation_index(self.load_bytes(template))
+        self._write(path, dump_translation_index(translation_index))
+        return translation_index
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_template_cache(token: str, repo: str) -> TemplateCache:
+    """One cache instance per repository and process, shared by all sessions."""
+    with _caches_lock:
+        if repo not in _caches:
+            _caches[repo] = TemplateCache(token, repo)
+        return _caches[repo]
@@ -0,0 +1,319 @@
+# template_store.py
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from matching_engine import clean_series_for_matching
+from template_cache import TEMPLATE_DIRECTORY, get_template_cache
+
+# Ablage der Übersetzungsvorlagen: "github" (Excel-Dateien im Repository) oder "sqlite" (lokales Translation Memory)
+TEMPLATE_BACKEND = os.environ.get("BONSAI_TEMPLATE_BACKEND", "github").strip().lower()
+DEFAULT_TM_PATH = os.environ.get(
+    "BONSAI_TM_PATH", os.path.join(tempfile.gettempdir(), "bonsai_translation_memory.sqlite")
+)
+# Schlagworte einer Vorlage (Sprache, Kunde, Projekt)
+TEMPLATE_TAGS = ("source_language", "target_language", "client", "project")
+SEARCH_LIMIT = 20
+
+
+def read_segment_pairs(file_bytes: bytes) -> pd.DataFrame:
+    """Reads a translation file (first column source, second column translation) into source/target pairs."""
+    translation_df = pd.read_excel(BytesIO(file_bytes), engine='openpyxl')
+    if translation_df.shape[1] < 2:
+        raise ValueError("Die Übersetzungsdatei braucht zwei Spalten (Ausgangstext, Übersetzung).")
+    pairs = translation_df.iloc[:, :2].set_axis(["source", "target"], axis=1)
+    return pairs[pairs["source"].notna()]
+
+
+def template_label(template: dict) -> str:
+    """Display label of a template: its name plus the tags that are set."""
+    tags = template.get("tags") or {}
+    languages = " → ".join(tags[key] for key in ("source_language", "target_language") if tags.get(key))
+    details = [value for value in (languages, tags.get("client"), tags.get("project")) if value]
+    return f"{template['name']} ({', '.join(details)})" if details else template['name']
+
+
+class TemplateStore:
+    """Storage interface for translation templates (translation memories).
+
+    A template is described by a dict with at least "name", "version" (changes with every write) and
+    "tags". Implementations return the matching lookup index (cleaned source -> translation) and
+    accept whole files as well as single segment pairs.
+    """
+
+    # Ob search() eine Volltextsuche über alle Segmente anbietet
+    supports_search = False
+
+    def list_templates(self) -> list:
+        raise NotImplementedError
+
+    def load_index(self, template: dict, texts=None) -> pd.Series:
+        """Returns the lookup index of a template; with texts (cleaned) only entries for those are required."""
+        raise NotImplementedError
+
+    def save_template(self, name: str, file_bytes: bytes, tags: dict = None) -> None:
+        """Creates or replaces a template from an uploaded translation file."""
+        raise NotImplementedError
+
+    def add_segments(self, template: dict, pairs) -> int:
+        """Adds or updates (source, target) pairs in a template and returns their number."""
+        raise NotImplementedError
+
+    def search(self, query: str, template: dict = None, limit: int = SEARCH_LIMIT) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class GitHubTemplateStore(TemplateStore):
+    """Templates as Excel files in the templates directory of a GitHub repository.
+
+    Reading goes through the local mirror (template_cache). Tags are not stored; adding segments
+    rewrites the whole file, because the repository only holds complete files.
+    """
+
+    def __init__(self, token: str, repo: str, branch: str = "main"):
+        self.token = token
+        self.repo_name = repo
+        self.branch = branch
+        self.cache = get_template_cache(token, repo)
+
+    def _repo(self):
+        from github import Github
+        return Github(self.token).get_repo(self.repo_name)
+
+    def _commit(self, path: str, content: bytes, message: str, sha: str = None) -> None:
+        repo = self._repo()
+        if sha is None:
+            try:
+                sha = repo.get_contents(path, ref=self.branch).sha
+            except Exception:
+                sha = None
+        if sha is None:
+            repo.create_file(path, message, content, branch=self.branch)
+        else:
+            repo.update_file(path, message, content, sha, branch=self.branch)
+        self.cache.invalidate()
+
+    def list_templates(self) -> list:
+        return [{**template, "version": template["sha"], "tags": {}} for template in self.cache.list_templates()]
+
+    def load_index(self, template: dict, texts=None) -> pd.Series:
+        return self.cache.load_index(template)
+
+    def save_template(self, name: str, file_bytes: bytes, tags: dict = None) -> None:
+        # Die hochgeladene Datei wird unverändert übernommen; nur prüfen, ob sie lesbar ist
+        read_segment_pairs(file_bytes)
+        path = f"{TEMPLATE_DIRECTORY}/{name.lower().replace(' ', '_')}.xlsx"
+        self._commit(path, file_bytes, f"Add or update translation template: {name}")
+
+    def add_segments(self, template: dict, pairs) -> int:
+        additions = pd.DataFrame(list(pairs), columns=["source", "target"])
+        if additions.empty:
+            return 0
+        current = read_segment_pairs(self.cache.load_bytes(template))
+        merged = pd.concat([current, additions], ignore_index=True)
+        merged = merged[~clean_series_for_matching(merged["source"].astype(object).map(str)).duplicated(keep="last")]
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            merged.set_axis(['Master / English', 'DE'], axis=1).to_excel(writer, index=False)
+        self._commit(
+            template["path"], output.getvalue(),
+            f"Add {len(additions)} segments to translation template: {template['name']}", sha=template["sha"],
+        )
+        return len(additions)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    source_language TEXT NOT NULL DEFAULT '',
+    target_language TEXT NOT NULL DEFAULT '',
+    client TEXT NOT NULL DEFAULT '',
+    project TEXT NOT NULL DEFAULT '',
+    revision INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    template_id INTEGER NOT NULL REFERENCES templates(id) ON DELETE CASCADE,
+    clean_source TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT,
+    UNIQUE (template_id, clean_source)
+);
+CREATE INDEX IF NOT EXISTS segments_by_source ON segments (clean_source);
+"""
+
+# Volltextindex über Ausgangstext und Übersetzung, per Trigger synchron zur Tabelle segments
+FULL_TEXT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(source, target, content='segments', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS segments_fts_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, source, target) VALUES (new.id, new.source, new.target);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_fts_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, source, target) VALUES ('delete', old.id, old.source, old.target);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_fts_update AFTER UPDATE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, source, target) VALUES ('delete', old.id, old.source, old.target);
+    INSERT INTO segments_fts (rowid, source, target) VALUES (new.id, new.source, new.target);
+END;
+"""
+
+UPSERT_SEGMENT = """
+INSERT INTO segments (template_id, clean_source, source, target) VALUES (?, ?, ?, ?)
+ON CONFLICT (template_id, clean_source) DO UPDATE SET source = excluded.source, target = excluded.target
+"""
+
+
+def fts_query(query: str) -> str:
+    """Quotes every word as a prefix term, so user input is searched literally instead of as FTS5 syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in query.split())
+
+
+class SQLiteTemplateStore(TemplateStore):
+    """Local translation memory in SQLite: one row per segment pair, tagged per template.
+
+    Segments are unique per template and cleaned source text, so adding pairs is an upsert and a
+    lookup is an indexed query instead of parsing a whole Excel file. If the SQLite build has FTS5,
+    a full-text index over source and target is kept in sync by triggers.
+    """
+
+    supports_search = True
+
+    def __init__(self, path: str = DEFAULT_TM_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            try:
+                connection.executescript(FULL_TEXT_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite ohne FTS5: die Suche fällt auf LIKE zurück
+                self.full_text = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @staticmethod
+    def _template(row) -> dict:
+        template_id, name, source_language, target_language, client, project, revision, segments = row
+        return {
+            "id": template_id,
+            "name": name,
+            "path": f"tm:{template_id}",
+            "version": f"{template_id}:{revision}",
+            "segments": segments,
+            "tags": {
+                "source_language": source_language, "target_language": target_language,
+                "client": client, "project": project,
+            },
+        }
+
+    def list_templates(self) -> list:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT t.id, t.name, t.source_language, t.target_language, t.client, t.project, t.revision,"
+                " (SELECT COUNT(*) FROM segments s WHERE s.template_id = t.id)"
+                " FROM templates t ORDER BY t.name"
+            ).fetchall()
+        return [self._template(row) for row in rows]
+
+    def load_index(self, template: dict, texts=None) -> pd.Series:
+        with self._connect() as connection:
+            if texts is None:
+                rows = connection.execute(
+                    "SELECT clean_source, target FROM segments WHERE template_id = ?", (template["id"],)
+                ).fetchall()
+            else:
+                # Nur die gesuchten Texte über den Index (template_id, clean_source) abfragen
+                connection.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (clean_source TEXT PRIMARY KEY)")
+                connection.execute("DELETE FROM wanted")
+                connection.executemany(
+                    "INSERT OR IGNORE INTO wanted VALUES (?)", ((str(text),) for text in texts)
+                )
+                rows = connection.execute(
+                    "SELECT s.clean_source, s.target FROM wanted w"
+                    " JOIN segments s ON s.template_id = ? AND s.clean_source = w.clean_source",
+                    (template["id"],),
+                ).fetchall()
+        return pd.Series([target for _, target in rows], index=[source for source, _ in rows], dtype=object)
+
+    def _upsert(self, connection, template_id: int, pairs: pd.DataFrame) -> int:
+        sources = pairs["source"].astype(object).map(str)
+        targets = pairs["target"].astype(object).where(pairs["target"].notna(), None)
+        connection.executemany(
+            UPSERT_SEGMENT,
+            zip([template_id] * len(pairs), clean_series_for_matching(sources), sources,
+                [None if target is None else str(target) for target in targets]),
+        )
+        connection.execute(
+            "UPDATE templates SET revision = revision + 1, updated_at = ? WHERE id = ?", (time.time(), template_id)
+        )
+        return len(pairs)
+
+    def save_template(self, name: str, file_bytes: bytes, tags: dict = None) -> None:
+        pairs = read_segment_pairs(file_bytes)
+        tags = {key: str((tags or {}).get(key) or "").strip() for key in TEMPLATE_TAGS}
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO templates (name, source_language, target_language, client, project, updated_at)"
+                " VALUES (:name, :source_language, :target_language, :client, :project, :updated_at)"
+                " ON CONFLICT (name) DO UPDATE SET source_language = excluded.source_language,"
+                " target_language = excluded.target_language, client = excluded.client, project = excluded.project",
+                {"name": name.strip(), "updated_at": time.time(), **tags},
+            )
+            template_id = connection.execute("SELECT id FROM templates WHERE name = ?", (name.strip(),)).fetchone()[0]
+            # Eine gespeicherte Datei ersetzt den bisherigen Inhalt der Vorlage
+            connection.execute("DELETE FROM segments WHERE template_id = ?", (template_id,))
+            self._upsert(connection, template_id, pairs)
+
+    def add_segments(self, template: dict, pairs) -> int:
+        additions = pd.DataFrame(list(pairs), columns=["source", "target"])
+        if additions.empty:
+            return 0
+        with self._connect() as connection:
+            return self._upsert(connection, template["id"], additions)
+
+    def search(self, query: str, template: dict = None, limit: int = SEARCH_LIMIT) -> pd.DataFrame:
+        """Full-text search over source and target texts (optionally within one template)."""
+        if not query.strip():
+            return pd.DataFrame(columns=["Vorlage", "Ausgangstext", "Übersetzung"])
+        if self.full_text:
+            sql = ("SELECT t.name, s.source, s.target FROM segments_fts f JOIN segments s ON s.id = f.rowid"
+                   " JOIN templates t ON t.id = s.template_id WHERE segments_fts MATCH ?")
+            parameters = [fts_query(query)]
+        else:
+            sql = ("SELECT t.name, s.source, s.target FROM segments s JOIN templates t ON t.id = s.template_id"
+                   " WHERE (s.source LIKE ? OR s.target LIKE ?)")
+            parameters = [f"%{query.strip()}%"] * 2
+        if template is not None:
+            sql += " AND s.template_id = ?"
+            parameters.append(template["id"])
+        sql += " LIMIT ?"
+        parameters.append(limit)
+        with self._connect() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        return pd.DataFrame(rows, columns=["Vorlage", "Ausgangstext", "Übersetzung"])
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_sqlite_store(path: str = DEFAULT_TM_PATH) -> SQLiteTemplateStore:
+    """One store per database file and process (the schema is set up once)."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SQLiteTemplateStore(path)
+        return _stores[path]
@@ -0,0 +1,77 @@
+# tests/test_batch_controller.py
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch_controller import (  # noqa: E402
+    ADJUST_EVERY, HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES, INITIAL_CONCURRENCY, INITIAL_TOKEN_BUDGET, LATENCY_TARGET_SECONDS,
+    BatchController, CircuitBreaker, load_tuning,
+)
+
+
+def test_healthy_window_increases_additively(tmp_path):
+    controller = BatchController("m", tuning_path=str(tmp_path / "tuning.json"))
+    for _ in range(ADJUST_EVERY):
+        controller.record(1.0)
+    assert controller.token_budget > INITIAL_TOKEN_BUDGET and controller.concurrency == INITIAL_CONCURRENCY + 1
+    assert controller.increases == 1
+
+
+def test_rate_limits_halve_concurrency_and_slow_batches_halve_budget(tmp_path):
+    controller = BatchController("m", tuning_path=str(tmp_path / "tuning.json"))
+    for _ in range(ADJUST_EVERY):
+        controller.record(LATENCY_TARGET_SECONDS + 1, rate_limited=True)
+    assert controller.concurrency == INITIAL_CONCURRENCY // 2
+    assert controller.token_budget == INITIAL_TOKEN_BUDGET // 2
+    assert controller.decreases == 1 and not controller.samples
+
+
+def test_hedge_delay_needs_samples(tmp_path):
+    controller = BatchController("m", tuning_path=str(tmp_path / "tuning.json"))
+    assert controller.hedge_delay() is None
+    for _ in range(HEDGE_MIN_SAMPLES):
+        controller.record(0.5)
+    assert controller.hedge_delay() == HEDGE_MIN_DELAY
+
+
+def test_tuned_values_are_restored_per_model(tmp_path):
+    path = str(tmp_path / "tuning.json")
+    controller = BatchController("a", token_budget=1234, concurrency=5, tuning_path=path)
+    controller.save()
+    restored = BatchController.for_model("a", tuning_path=path)
+    assert (restored.token_budget, restored.concurrency) == (1234, 5)
+    assert BatchController.for_model("b", tuning_path=path).token_budget == INITIAL_TOKEN_BUDGET
+
+
+def test_concurrent_saves_keep_every_model(tmp_path):
+    path = str(tmp_path / "tuning.json")
+    threads = [
+        threading.Thread(target=BatchController(f"model-{number}", tuning_path=path).save) for number in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(load_tuning(path)) == sorted(f"model-{number}" for number in range(16))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_unreadable_tuning_file_is_ignored(tmp_path):
+    path = tmp_path / "tuning.json"
+    path.write_text("{not json")
+    assert load_tuning(str(path)) == {}
+    BatchController("m", tuning_path=str(path)).save()
+    assert "m" in json.loads(path.read_text())
+
+
+def test_circuit_breaker_opens_after_enough_failures():
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_samples=4)
+    for failed in (True, True, False):
+        breaker.record(failed)
+    assert not breaker.is_open
+    breaker.record(True)
+    assert breaker.is_open
+    breaker.record(False)
+    assert breaker.is_open
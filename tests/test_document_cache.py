@@ -0,0 +1,46 @@
+# tests/test_document_cache.py
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from document_cache import DocumentCache, document_cache_key  # noqa: E402
+
+
+def test_key_depends_on_content_and_parameters():
+    key = document_cache_key(b"docx", model="gpt-4.1-mini", fallback_model=None)
+    assert key == document_cache_key(b"docx", fallback_model=None, model="gpt-4.1-mini")
+    assert key != document_cache_key(b"docx", model="gpt-4.1-mini", fallback_model="gpt-4o")
+    assert key != document_cache_key(b"xlsx", model="gpt-4.1-mini", fallback_model=None)
+    assert document_cache_key(b"x", prompt="a\r\nb ") == document_cache_key(b"x", prompt="a\nb")
+
+
+def test_put_and_get(tmp_path):
+    cache = DocumentCache(str(tmp_path))
+    cache.put("key", b"translated", {"model": "m"})
+    data, metadata = cache.get("key")
+    assert data == b"translated" and metadata["model"] == "m" and metadata["size"] == len(b"translated")
+    assert cache.get("missing") is None
+
+
+def test_concurrent_puts_of_the_same_key(tmp_path):
+    cache = DocumentCache(str(tmp_path))
+    payloads = [bytes([value]) * 200_000 for value in range(8)]
+    threads = [threading.Thread(target=cache.put, args=("key", payload, {})) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    data, _ = cache.get("key")
+    assert data in payloads
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = DocumentCache(str(tmp_path), max_bytes=25)
+    cache.put("old", b"x" * 10, {})
+    os.utime(os.path.join(tmp_path, "old.bin"), (1, 1))
+    cache.put("new", b"y" * 10, {})
+    cache.put("newest", b"z" * 10, {})
+    assert cache.get("old") is None
+    assert cache.get("newest") is not None
@@ -0,0 +1,77 @@
+# tests/test_fuzzy_index.py
+import os
+import random
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fuzzy_index import FuzzyIndex, levenshtein_distance, levenshtein_ratio  # noqa: E402
+from matching_engine import (  # noqa: E402
+    FUZZY_SCORE_COLUMN, MEMORY_COLUMN, ORIGIN_COLUMN, SOURCE_COLUMN, TARGET_COLUMN, apply_fuzzy_matches,
+    build_fuzzy_index,
+)
+
+
+def reference_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for row, char_a in enumerate(a, start=1):
+        current = [row]
+        for column, char_b in enumerate(b, start=1):
+            current.append(min(previous[column] + 1, current[-1] + 1, previous[column - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def test_bit_parallel_distance_matches_the_reference():
+    random.seed(3)
+    for _ in range(300):
+        a = "".join(random.choices("abcä ", k=random.randint(0, 90)))
+        b = "".join(random.choices("abcä ", k=random.randint(0, 90)))
+        assert levenshtein_distance(a, b) == reference_distance(a, b)
+    assert levenshtein_ratio("", "") == 1.0
+
+
+def test_lookup_entry_finds_the_most_similar_entry_above_the_threshold():
+    index = FuzzyIndex(
+        ["How satisfied are you with the product?", "How satisfied are you with the service?", "Something else"],
+        ["Produkt", "Service", "Anderes"],
+        ["A", "B", "C"],
+    )
+    entry, score = index.lookup_entry("How  satisfied are you with the product ?")
+    assert index.targets[entry] == "Produkt" and index.labels[entry] == "A" and score >= 0.9
+    assert index.lookup("HOW SATISFIED ARE YOU WITH THE SERVICE?") == ("Service", 1.0)
+    assert index.lookup("A completely different question?") is None
+    assert FuzzyIndex([], []).lookup_entry("anything") is None
+
+
+def test_lookup_agrees_with_a_brute_force_scan():
+    random.seed(5)
+    words = ["brand", "product", "satisfied", "recommend", "service", "price", "quality", "friend"]
+    sources = [" ".join(random.choices(words, k=6)) for _ in range(400)]
+    index = FuzzyIndex(sources, range(len(sources)))
+    for source in random.sample(sources, 40):
+        query = source[:-2] + "x"
+        best = max(levenshtein_ratio(query, candidate) for candidate in index.sources)
+        hit = index.lookup_entry(query, 0.85)
+        assert (hit is None) == (best < 0.85)
+        if hit is not None:
+            assert hit[1] == best
+
+
+def test_apply_fuzzy_matches_marks_score_and_origin():
+    processed = pd.DataFrame({
+        TARGET_COLUMN: [None, None, None],
+        SOURCE_COLUMN: ["How satisfied are you with !%brand%!?", "Ja", "Completely unrelated text"],
+        ORIGIN_COLUMN: "Match",
+        MEMORY_COLUMN: None,
+    })
+    translation_index = pd.Series(["Wie zufrieden sind Sie mit?", "Ja"], index=["How satisfied are you with ?", "Ja!"])
+    origins = pd.Series(["Vorlage A", "Vorlage B"], index=translation_index.index)
+    fuzzy_index = build_fuzzy_index(translation_index, origins)
+    processed, remaining = apply_fuzzy_matches(processed, [0, 1, 2], fuzzy_index, threshold=0.9)
+    assert processed.loc[0, TARGET_COLUMN] == "Wie zufrieden sind Sie mit?!%brand%!"
+    assert processed.loc[0, ORIGIN_COLUMN] == "Fuzzy-Match" and processed.loc[0, MEMORY_COLUMN] == "Vorlage A"
+    assert processed.loc[0, FUZZY_SCORE_COLUMN] >= 90
+    # Kurze Texte werden nie unscharf übernommen
+    assert remaining == [1, 2]
@@ -0,0 +1,46 @@
+# tests/test_glossary.py
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from glossary import TermBase, is_inflection, read_term_file  # noqa: E402
+
+
+def term_base(pairs):
+    return TermBase(pd.DataFrame(pairs, columns=["source", "target"]))
+
+
+def test_find_terms_matches_whole_words_case_insensitively():
+    terms = term_base([("customer", "Kunde"), ("car", "Auto"), ("customer survey", "Kundenbefragung")])
+    found = terms.find_terms("Every Customer takes the customer survey by car, not by cart.")
+    assert found == {"customer": "Kunde", "customer survey": "Kundenbefragung", "car": "Auto"}
+    assert terms.find_terms("Customers and cars") == {}
+
+
+def test_find_terms_checks_word_boundaries_per_match_with_sharp_s():
+    terms = term_base([("Maß", "measure"), ("straße", "street"), ("tag", "day")])
+    # "ß" wird beim Falten länger; die Wortgrenzen gelten trotzdem für jeden Treffer
+    assert terms.find_terms("Das Maß der Straße, ein Tag") == {"Maß": "measure", "straße": "street", "tag": "day"}
+    assert terms.find_terms("Maßnahme in der Großstraße am Dienstag") == {}
+
+
+def test_inflected_target_terms_are_not_violations():
+    terms = term_base([("measure", "Maßnahme"), ("contract", "Vertrag"), ("customer", "Kunde")])
+    assert terms.find_violations("Both measures are in the contract", "Beide Maßnahmen stehen in den Verträgen") == {}
+    assert terms.find_violations("The customer", "Den Kunden") == {}
+    assert terms.find_violations("The customer", "Der Klient") == {"customer": "Kunde"}
+
+
+def test_inflection_keeps_the_stem():
+    assert is_inflection("Verträge", "Vertrag")
+    assert not is_inflection("Vertretung", "Vertrag")
+    assert not is_inflection("Kundenzufriedenheitsbefragung", "Kunde")
+    assert not is_inflection("Autos", "Art")
+
+
+def test_read_term_file_picks_target_language_column():
+    csv = "Begriff;EN;DE\ncustomer;customer;Kunde\n;x;y\n".encode("utf-8")
+    terms = read_term_file(csv, "terms.csv", "de")
+    assert terms.to_dict("records") == [{"source": "customer", "target": "Kunde"}]
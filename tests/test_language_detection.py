@@ -0,0 +1,25 @@
+# tests/test_language_detection.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from language_detection import detect_language, is_reliably_language  # noqa: E402
+
+
+def test_related_language_confuser_is_not_skipped():
+    # Indonesisch und Malaiisch teilen fast alle n-Gramme; die Softmax-Konfidenz ist trotzdem hoch
+    text = "Apakah Anda puas dengan produk ini?"
+    language, confidence = detect_language(text)
+    assert language == "ms" and confidence > 0.9
+    assert not is_reliably_language(text, "ms")
+    assert not is_reliably_language("Anda dapat memilih lebih dari satu jawaban.", "id")
+
+
+def test_short_segments_are_not_skipped():
+    assert not is_reliably_language("Ja, gerne", "de")
+
+
+def test_clear_target_language_is_skipped():
+    assert is_reliably_language("Bitte wählen Sie eine Antwort aus der Liste.", "de")
+    assert is_reliably_language("Πόσο ικανοποιημένοι είστε με αυτό το προϊόν;", "el")
+    assert not is_reliably_language("Bitte wählen Sie eine Antwort aus der Liste.", "en")
@@ -0,0 +1,70 @@
+# tests/test_matching_engine.py
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.matching_benchmark import build_data, legacy_match, vectorized_match  # noqa: E402
+from matching_engine import (  # noqa: E402
+    FUZZY_SCORE_COLUMN, MEMORY_COLUMN, ORIGIN_COLUMN, SOURCE_COLUMN, TARGET_COLUMN, apply_known_translations,
+    build_translation_index, export_frame, match_export, memory_pairs, merge_translation_indexes,
+)
+
+
+def export(*texts, targets=None):
+    return pd.DataFrame({
+        'Frage-ID (gesperrt)': [f"Q{index}" for index in range(len(texts))],
+        TARGET_COLUMN: targets or [None] * len(texts),
+        SOURCE_COLUMN: list(texts),
+    })
+
+
+def index(pairs):
+    return build_translation_index(pd.DataFrame(pairs, columns=['Master / English', 'DE']))
+
+
+def test_vectorized_match_equals_the_previous_loop():
+    rogator_df, translation_df = build_data(3000, 400, seed=7)
+    processed, unmatched = vectorized_match(rogator_df, translation_df)
+    legacy_processed, legacy_unmatched = legacy_match(rogator_df, translation_df)
+    assert unmatched == legacy_unmatched
+    assert processed[TARGET_COLUMN].equals(legacy_processed[TARGET_COLUMN])
+
+
+def test_placeholders_rules_and_open_rows():
+    rogator_df = export("Hello !%name%!", "<br>", "Unknown", "Unknown", "Empty", targets=[None, None, None, "da", None])
+    processed, unmatched = match_export(rogator_df, index([("Hello", "Hallo"), ("Empty", "")]))
+    assert processed[TARGET_COLUMN].fillna("").tolist() == ["Hallo!%name%!", "<br>", "", "da", ""]
+    assert unmatched == [2, 4]
+    assert (processed[ORIGIN_COLUMN] == 'Match').all()
+
+
+def test_merged_sources_prefer_usable_translations_in_priority_order():
+    first = index([("Yes", "Ja"), ("No", "")])
+    second = index([("Yes", "Jawohl"), ("No", "Nein"), ("Maybe", "Vielleicht")])
+    merged, origins = merge_translation_indexes([("A", first), ("B", second)])
+    assert merged.to_dict() == {"Yes": "Ja", "No": "Nein", "Maybe": "Vielleicht"}
+    assert origins.to_dict() == {"Yes": "A", "No": "B", "Maybe": "B"}
+
+    processed, _ = match_export(export("No", "Other"), merged, translation_origins=origins)
+    assert processed[MEMORY_COLUMN].fillna("").tolist() == ["B", ""]
+
+
+def test_export_frame_drops_display_only_columns():
+    processed = export("Yes").assign(**{MEMORY_COLUMN: "A", FUZZY_SCORE_COLUMN: 95, ORIGIN_COLUMN: "Match"})
+    assert export_frame(processed).columns.tolist() == ['Frage-ID (gesperrt)', TARGET_COLUMN, SOURCE_COLUMN, ORIGIN_COLUMN]
+    assert export_frame(export("Yes")).columns.tolist() == ['Frage-ID (gesperrt)', TARGET_COLUMN, SOURCE_COLUMN]
+
+
+def test_known_translations_fill_open_rows():
+    processed, unmatched = match_export(export("A", "B", "A"), index([]))
+    processed, remaining = apply_known_translations(processed, unmatched, {"A": "a"})
+    assert processed[TARGET_COLUMN].fillna("").tolist() == ["a", "", "a"]
+    assert processed[ORIGIN_COLUMN].tolist() == ["GPT", "Match", "GPT"]
+    assert remaining == [1]
+
+
+def test_memory_pairs_clean_and_deduplicate():
+    pairs = memory_pairs({"Hi !%x%!": "Hallo", "Hi": "Servus", "Leer": "", "Fehlgeschlagen": None})
+    assert pairs.to_dict("records") == [{"source": "Hi", "target": "Servus"}]
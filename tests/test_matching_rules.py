@@ -0,0 +1,48 @@
+# tests/test_matching_rules.py
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from matching_rules import DEFAULT_RULES, RuleSet, compile_rules, is_mergeable  # noqa: E402
+
+
+def test_default_rules():
+    rules = RuleSet(DEFAULT_RULES)
+    texts = pd.Series(["<b>Hallo</b>", "!%Q1%!", "ZC: 12", "42", "3.5", "Brand 7", "Neue Antwort 1",
+                       " Kommentar ", "&nbsp;years", "Wie zufrieden sind Sie?", "Auto 3"])
+    assert rules.mask(texts).tolist() == [True] * 9 + [False, False]
+    assert rules.explain("<b>Hallo</b>") == "Tag <...>"
+    assert rules.explain("Kommentar") == "Schlüsselwort"
+    assert rules.explain("&nbsp;years") == "Spezieller Fall: &nbsp;years"
+    assert rules.explain("Wie zufrieden sind Sie?") is None
+
+
+def test_backreferences_keep_their_group():
+    rules = RuleSet({"special_cases": [r"^x+$", r"(\w)\1"]})
+    assert rules.mask(pd.Series(["xx", "aab", "abc"])).tolist() == [True, True, False]
+    assert rules.explain("aab") == r"Spezieller Fall: (\w)\1"
+
+
+def test_global_inline_flags_stay_valid():
+    rules = RuleSet({"special_cases": [r"(?i)^kein text$", r"^foo$"]})
+    assert rules.mask(pd.Series(["KEIN TEXT", "foo", "FOO"])).tolist() == [True, True, False]
+
+
+def test_mergeable_patterns():
+    assert is_mergeable(r"&nbsp;years") and is_mergeable(r"(?i:abc)") and is_mergeable(r"\\1")
+    assert not is_mergeable(r"(\w)\1") and not is_mergeable(r"(?i)abc") and not is_mergeable(r"(?P<n>a)")
+
+
+def test_invalid_pattern_names_the_line():
+    with pytest.raises(ValueError, match="Zeile 2"):
+        RuleSet({"special_cases": ["ok", "(unclosed"]})
+
+
+def test_rule_sets_round_trip_and_are_compiled_once():
+    rules = compile_rules({"keywords": "a\n\nb", "brand_match": False})
+    assert rules is compile_rules({"keywords": ["a", "b"], "brand_match": False})
+    assert RuleSet.from_json(rules.to_json()).config == rules.config
+    assert not rules.mask(pd.Series(["Brand 7"])).iloc[0]
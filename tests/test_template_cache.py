@@ -0,0 +1,33 @@
+# tests/test_template_cache.py
+import os
+import stat
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from template_cache import TemplateCache, dump_translation_index, parse_translation_index  # noqa: E402
+
+
+def test_translation_index_round_trip():
+    index = pd.Series(["Hallo", None, 5], index=["hello", "empty", "five"], dtype=object)
+    restored = parse_translation_index(dump_translation_index(index))
+    assert restored.index.tolist() == ["hello", "empty", "five"]
+    assert restored["hello"] == "Hallo" and restored["empty"] is None and restored["five"] == 5
+
+
+def test_cache_directory_is_private(tmp_path):
+    cache = TemplateCache("token", "owner/repo", directory=str(tmp_path / "cache"))
+    assert stat.S_IMODE(os.stat(cache.directory).st_mode) == 0o700
+
+
+def test_unreadable_index_is_rebuilt(tmp_path, monkeypatch):
+    cache = TemplateCache("token", "owner/repo", directory=str(tmp_path))
+    template = {"name": "A", "path": "templates/a.xlsx", "sha": "abc"}
+    with open(cache._index_path("abc"), "wb") as index_file:
+        index_file.write(b"\x80\x04not json")
+    rebuilt = pd.Series(["Hallo"], index=["hello"], dtype=object)
+    monkeypatch.setattr(cache, "load_bytes", lambda _: b"")
+    monkeypatch.setattr("template_cache.read_translation_index", lambda _: rebuilt)
+    assert cache.load_index(template).tolist() == ["Hallo"]
+    assert cache.load_index(template).tolist() == ["Hallo"]
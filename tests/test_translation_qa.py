@@ -0,0 +1,34 @@
+# tests/test_translation_qa.py
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from translation_qa import numbers_differ, run_qa_checks  # noqa: E402
+
+
+def qa(source, target, target_language="de", same_language=False):
+    segments = pd.DataFrame({"source": [source], "target": [target], "same_language": [same_language]})
+    return run_qa_checks(segments, target_language).iloc[0]
+
+
+def test_reformatted_numbers_are_not_flagged():
+    assert not numbers_differ("am 15.03.2024", "on 03/15/2024")
+    assert not numbers_differ("1.000 Befragte", "1,000 respondents")
+    assert not numbers_differ("3,5 Punkte", "3.5 points")
+    assert numbers_differ("15 Minuten", "50 minutes")
+
+
+def test_placeholders_and_bracketed_instructions():
+    assert qa("Hallo {name}, <b>danke</b>", "Hello <b>thanks</b>", "en")["placeholder_mismatch"]
+    assert not qa("Hallo {name} [BRAND]", "Hello {name} [BRAND]", "en")["placeholder_mismatch"]
+    finding = qa("Wie oft? [Bitte nur eine Antwort]", "How often? [Please select one answer only]", "en")
+    assert not finding["placeholder_mismatch"] and finding["qa"] == ""
+
+
+def test_untranslated_and_wrong_script():
+    assert qa("Please rate the product", "Please rate the product")["untranslated"]
+    assert not qa("Bitte bewerten Sie", "Bitte bewerten Sie", same_language=True)["untranslated"]
+    assert qa("How satisfied are you?", "How satisfied are you now?", "el")["wrong_script"]
+    assert not qa("How satisfied are you?", "Πόσο ικανοποιημένοι είστε;", "el")["wrong_script"]
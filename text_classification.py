@@ -0,0 +1,87 @@
+# text_classification.py
+import re
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+
+# Vorkompilierte, Unicode-fähige Muster für die Zellklassifikation.
+# [^\W\d_] entspricht einem Buchstaben in beliebiger Schrift (Latein, Kyrillisch, Griechisch, CJK, Arabisch, ...)
+LETTER_PATTERN = re.compile(r'[^\W\d_]')
+NUMERIC_PATTERN = re.compile(r'[+\-−]?[\d.,\s  \']*\d[\d.,]*\s*[%‰€$£¥]?')
+DATE_PATTERN = re.compile(
+    r'\d{1,4}[./\-]\d{1,2}[./\-]\d{1,4}(?:[ T]\d{1,2}:\d{2}(?::\d{2})?)?'
+    r'|\d{1,2}:\d{2}(?::\d{2})?'
+)
+EMAIL_PATTERN = re.compile(r'[\w.+\-]+@[\w\-]+(?:\.[\w\-]+)+')
+URL_PATTERN = re.compile(r'(?i:https?://|ftp://|www\.)\S+')
+# Kurze Codes wie "Q1", "S2a", "AB-123", "V_12" oder "ZC:A1"
+CODE_PATTERN = re.compile(r'(?:[A-Za-z]{1,4}[_\-:]?\d+[A-Za-z\d_\-.]*|[A-Z\d]+(?:[_\-][A-Z\d]+)+)')
+
+# Eine kombinierte Alternation: fullmatch liefert die erste passende Kategorie in einem Durchlauf
+NON_TEXT_PATTERN = re.compile("|".join(
+    f"(?P<{name}>{pattern.pattern})"
+    for name, pattern in (
+        ("numeric", NUMERIC_PATTERN),
+        ("date", DATE_PATTERN),
+        ("email", EMAIL_PATTERN),
+        ("url", URL_PATTERN),
+        ("code", CODE_PATTERN),
+    )
+))
+
+CELL_CATEGORIES = ("text", "numeric", "date", "code", "email", "url", "other")
+
+
+def classify_value(value) -> str:
+    """Classifies a single cell value into one of CELL_CATEGORIES."""
+    if isinstance(value, str):
+        text = value.strip()
+        match = NON_TEXT_PATTERN.fullmatch(text)
+        if match:
+            return match.lastgroup
+        if len(text) > 1 and LETTER_PATTERN.search(text):
+            return "text"
+        return "other"
+    if isinstance(value, (datetime, date, time)):
+        return "date"
+    if value is None or pd.isna(value):
+        return "other"
+    return "numeric"
+
+
+def classify_values(values: pd.Series) -> pd.Series:
+    """Classifies cell values into CELL_CATEGORIES.
+
+    The values are factorized first, so every distinct value is matched only once against the
+    precompiled patterns; the categories are then broadcast back to all cells in one take().
+    Survey sheets repeat answer scales and labels heavily, which keeps the number of regex
+    evaluations far below the number of cells. Only "text" values should be sent for translation.
+    """
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    unique_categories = np.array([classify_value(value) for value in uniques] + ["other"], dtype=object)
+    # Code -1 (fehlende Werte) landet auf dem letzten Eintrag "other"
+    return pd.Series(unique_categories[codes], index=values.index, dtype=object)
+
+
+def classify_sheet(rows) -> pd.DataFrame:
+    """Classifies all cells of a worksheet given as an iterable of value tuples (row 1, column A first).
+
+    Returns one row per non-empty cell with the 1-based columns row and column, the value and its
+    category. Coordinates are returned as integer arrays; callers format "A1" only for the cells
+    they keep.
+    """
+    rows = list(rows)
+    width = max(map(len, rows), default=0)
+    grid = np.full((len(rows), width), None, dtype=object)
+    for row_index, row in enumerate(rows):
+        grid[row_index, :len(row)] = row
+
+    row_indices, column_indices = np.nonzero(pd.notna(grid))
+    values = pd.Series(grid[row_indices, column_indices], dtype=object)
+    return pd.DataFrame({
+        "row": row_indices + 1,
+        "column": column_indices + 1,
+        "value": values,
+        "category": classify_values(values),
+    })
@@ -0,0 +1,155 @@
+# translation_qa.py
+import re
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from language_detection import SCRIPT_RANGES
+
+# Platzhalter und Tags, die in der Übersetzung unverändert vorkommen müssen:
+# {name}, {{name}}, %s/%1$s, <r0>/</r0>, <b>, [ZC:A1]. Eckige Klammern nur mit Code-Inhalt, Hinweise
+# wie "[Bitte nur eine Antwort]" werden übersetzt
+PLACEHOLDER_PATTERN = r'\{\{?[^{}]*\}\}?|%(?:\d+\$)?[sdfi]|</?[A-Za-z][\w:-]*(?:\s[^<>]*)?/?>|\[[A-Z0-9_]+(?::[A-Za-z0-9_]+)?\]'
+# Zahlen mit Tausender-, Dezimal- oder Datumstrennern ("1.000", "3,5", "15.03.2024")
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,'\u00a0\u202f]\d+)*")
+# Tausendergruppen mit einheitlichem Trenner, optional mit Nachkommastellen ("1.000", "1,000.50", "1 000")
+GROUPED_NUMBER_PATTERN = re.compile(r"(\d{1,3}(?:([.,'\u00a0\u202f])\d{3})+)(?:(?!\2)[.,](\d+))?")
+DECIMAL_NUMBER_PATTERN = re.compile(r"(\d+)[.,](\d+)")
+LETTER_PATTERN = r'[^\W\d_]'
+
+# Ab dieser Länge des Ausgangstexts wird das Längenverhältnis geprüft (kurze Texte schwanken zu stark)
+LENGTH_CHECK_MIN_CHARS = 20
+# Feste Grenzen für das Längenverhältnis Übersetzung/Original
+LENGTH_RATIO_BOUNDS = (0.33, 3.0)
+# Zusätzlich: Abweichung vom Median des Dokuments in MADs (log-Verhältnis)
+LENGTH_RATIO_MAX_MADS = 4.0
+# Untergrenze für die MAD, damit kleine oder sehr einheitliche Dokumente nicht jede Abweichung melden
+LENGTH_RATIO_MIN_MAD = 0.1
+# Mindestanteil der Buchstaben in der erwarteten Schrift
+SCRIPT_MIN_SHARE = 0.5
+SCRIPT_CHECK_MIN_LETTERS = 3
+
+# Erwartete Schriften der Zielsprachen (alle übrigen Sprachen: Latein)
+TARGET_SCRIPTS = {
+    "ru": ("cyrillic",),
+    "uk": ("cyrillic",),
+    "bg": ("cyrillic",),
+    "sr": ("cyrillic", "latin"),
+    "el": ("greek",),
+    "he": ("hebrew",),
+    "ar": ("arabic",),
+    "hi": ("devanagari",),
+    "th": ("thai",),
+    "ko": ("hangul",),
+    "ja": ("kana", "han"),
+    "zh-CN": ("han",),
+    "zh-TW": ("han",),
+}
+
+# Spaltenname der Prüfung -> Bezeichnung im QA-Bericht
+QA_CHECKS = {
+    "placeholder_mismatch": "Platzhalter/Tags",
+    "number_mismatch": "Zahlen/Datum",
+    "length_outlier": "Länge",
+    "untranslated": "Unübersetzt",
+    "wrong_script": "Schrift",
+}
+
+
+def script_pattern(scripts) -> str:
+    """Builds a character class matching the Unicode ranges of the given scripts."""
+    ranges = dict(SCRIPT_RANGES)
+    return "[" + "".join(
+        f"\\u{start:04x}-\\u{end:04x}" if end <= 0xFFFF else f"\\U{start:08x}-\\U{end:08x}"
+        for script in scripts
+        for start, end in ranges[script]
+    ) + "]"
+
+
+def sorted_tokens(texts: pd.Series, pattern: str) -> pd.Series:
+    """Extracts all pattern matches per text as a sorted tuple (order-independent comparison)."""
+    return texts.str.findall(pattern).map(lambda tokens: tuple(sorted(tokens)))
+
+
+def numeric_value(token: str) -> Decimal:
+    grouped = GROUPED_NUMBER_PATTERN.fullmatch(token)
+    if grouped:
+        digits = re.sub(r"\D", "", grouped.group(1))
+        return Decimal(f"{digits}.{grouped.group(3)}" if grouped.group(3) else digits).normalize()
+    decimal = DECIMAL_NUMBER_PATTERN.fullmatch(token)
+    if decimal:
+        return Decimal(f"{decimal.group(1)}.{decimal.group(2)}").normalize()
+    return None
+
+
+def numeric_signature(text: str):
+    """Returns (set of digit groups, set of numeric values) of a text.
+
+    The digit groups ignore order and separators ("15.03.2024" == "03/15/2024"), the values ignore
+    the number format ("1.000" == "1,000" == "1000", "3,5" == "3.5"). Leading zeros do not count.
+    """
+    groups, values = set(), set()
+    for token in NUMBER_PATTERN.findall(text):
+        token_groups = [int(digits) for digits in re.findall(r"\d+", token)]
+        groups.update(token_groups)
+        value = numeric_value(token)
+        values.update([value] if value is not None else (Decimal(number) for number in token_groups))
+    return frozenset(groups), frozenset(values)
+
+
+def numbers_differ(source: str, target: str) -> bool:
+    """True if the numbers differ both as digit groups and as values (i.e. not just reformatted)."""
+    source_groups, source_values = numeric_signature(source)
+    target_groups, target_values = numeric_signature(target)
+    return source_groups != target_groups and source_values != target_values
+
+
+def run_qa_checks(segments: pd.DataFrame, target_language: str) -> pd.DataFrame:
+    """Runs the local QA checks over all translated segments at once.
+
+    segments needs the columns source and target; an optional column same_language marks segments
+    that were already in the target language (identical output is expected there). Returns a copy
+    with one boolean column per entry of QA_CHECKS and a column qa listing the findings in German
+    ("" for segments without findings).
+    """
+    result = segments.copy()
+    # object statt Arrow-Strings, damit die Regex-Klassen Unicode-fähig bleiben
+    source = result["source"].fillna("").astype(str).astype(object)
+    target = result["target"].fillna("").astype(str).astype(object)
+    if "same_language" in result:
+        same_language = result["same_language"].fillna(False).astype(bool)
+    else:
+        same_language = pd.Series(False, index=result.index)
+
+    result["placeholder_mismatch"] = sorted_tokens(source, PLACEHOLDER_PATTERN) != sorted_tokens(target, PLACEHOLDER_PATTERN)
+    # Ziffern in Platzhaltern (<r0>, {1}) zählen nicht als Zahlen; führende Nullen werden ignoriert ("01.03." == "1.3.")
+    source_plain = source.str.replace(PLACEHOLDER_PATTERN, " ", regex=True)
+    target_plain = target.str.replace(PLACEHOLDER_PATTERN, " ", regex=True)
+    result["number_mismatch"] = [
+        numbers_differ(source_text, target_text) for source_text, target_text in zip(source_plain, target_plain)
+    ]
+
+    source_length = source.str.len()
+    target_length = target.str.len()
+    checked = source_length >= LENGTH_CHECK_MIN_CHARS
+    ratio = target_length / source_length.where(checked)
+    log_ratio = np.log(ratio.where(ratio > 0))
+    median = log_ratio.median()
+    mad = (log_ratio - median).abs().median()
+    outside_bounds = (ratio < LENGTH_RATIO_BOUNDS[0]) | (ratio > LENGTH_RATIO_BOUNDS[1])
+    if pd.notna(mad):
+        outside_bounds |= (log_ratio - median).abs() > LENGTH_RATIO_MAX_MADS * max(mad, LENGTH_RATIO_MIN_MAD)
+    result["length_outlier"] = checked & (outside_bounds | (target_length == 0))
+
+    source_letters = source.str.count(LETTER_PATTERN)
+    result["untranslated"] = (source.str.strip() == target.str.strip()) & (source_letters >= 2) & ~same_language
+
+    target_letters = target.str.count(LETTER_PATTERN)
+    expected = target.str.count(script_pattern(TARGET_SCRIPTS.get(target_language, ("latin",))))
+    result["wrong_script"] = (target_letters >= SCRIPT_CHECK_MIN_LETTERS) & (expected < SCRIPT_MIN_SHARE * target_letters)
+
+    flags = result[list(QA_CHECKS)].to_numpy()
+    labels = np.array(list(QA_CHECKS.values()), dtype=object)
+    result["qa"] = [", ".join(labels[row]) for row in flags]
+    return result
@@ -6,8 +6,20 @@ from pathlib import Path
 import difflib
 from html import escape
 from docx import Document
+from docx.opc.constants import CONTENT_TYPE as DOCX_CONTENT_TYPE
+from docx.opc.part import XmlPart
+from docx.opc.oxml import serialize_part_xml as serialize_docx_xml
+from docx.oxml import parse_xml as parse_docx_xml
+from docx.oxml.ns import qn as qn_docx
+from docx.text.paragraph import Paragraph
 from openpyxl import load_workbook, Workbook
+from openpyxl.utils import get_column_letter
 from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.text.text import _Paragraph
+from lxml import etree
 from io import BytesIO
 import re
 from docx.shared import Pt, RGBColor
@@ -22,6 +34,74 @@ from openai import AsyncOpenAI
 import asyncio
 import tempfile
 import io
+import math
+import time
+import threading
+from collections import deque, defaultdict
+from text_classification import classify_sheet
+from language_detection import NEUTRAL, detect_language, is_reliably_language
+from glossary import TermBase, read_term_file
+from translation_qa import PLACEHOLDER_PATTERN, run_qa_checks
+from document_cache import DocumentCache, document_cache_key
+from batch_controller import BatchController, CircuitBreaker
+
+class TranslationProgress:
+    """Tracks completed batches and renders progress, throughput and ETA."""
+
+    def __init__(self, total_segments: int, window: int = 8):
+        self.total_segments = total_segments
+        self.done_segments = 0
+        self.done_tokens = 0
+        self.retries = 0
+        self.started_at = time.monotonic()
+        # Gleitendes Fenster aus (Zeitpunkt, Segmente, Tokens) für die Raten
+        self.samples = deque([(self.started_at, 0, 0)], maxlen=window + 1)
+        self.progress_bar = st.progress(0)
+        self.status_text = st.empty()
+        self.status_text.text(f"0/{total_segments} Segmente übersetzt – warte auf erste Antwort...")
+
+    def record_batch(self, segments: int, tokens: int = 0, retries: int = 0) -> None:
+        """Registers one completed batch and refreshes the display."""
+        self.done_segments += segments
+        self.done_tokens += tokens
+        self.retries += retries
+        self.samples.append((time.monotonic(), self.done_segments, self.done_tokens))
+        self.render()
+
+    def rates(self):
+        """Returns (segments/sec, tokens/sec) over the moving window."""
+        (t_start, seg_start, tok_start), (t_end, seg_end, tok_end) = self.samples[0], self.samples[-1]
+        elapsed = t_end - t_start
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (seg_end - seg_start) / elapsed, (tok_end - tok_start) / elapsed
+
+    def eta_seconds(self):
+        """Estimated seconds until all segments are done, or None if unknown."""
+        seg_rate, _ = self.rates()
+        if seg_rate <= 0:
+            return None
+        return max(self.total_segments - self.done_segments, 0) / seg_rate
+
+    def render(self) -> None:
+        fraction = self.done_segments / self.total_segments if self.total_segments else 1.0
+        self.progress_bar.progress(min(fraction, 1.0))
+        seg_rate, tok_rate = self.rates()
+        eta = self.eta_seconds()
+        eta_text = f"{int(eta // 60)}:{int(eta % 60):02d} min" if eta is not None else "–"
+        self.status_text.text(
+            f"{self.done_segments}/{self.total_segments} Segmente | "
+            f"{seg_rate:.1f} Segmente/s | {tok_rate:.0f} Tokens/s | "
+            f"Wiederholungen: {self.retries} | Restzeit: ca. {eta_text}"
+        )
+
+    def finish(self) -> None:
+        self.progress_bar.progress(1.0)
+        elapsed = time.monotonic() - self.started_at
+        self.status_text.text(
+            f"Übersetzung abgeschlossen! {self.done_segments} Segmente in {elapsed:.1f} s "
+            f"({self.done_tokens} Tokens, {self.retries} Wiederholungen)"
+        )
 
 def unified_document_app():
     # Titel der App
@@ -38,6 +118,12 @@ def unified_document_app():
         "GPT-4o": "gpt-4o"
     }
 
+    # Kaskade: schnellstes und günstigstes Modell aus MODEL_OPTIONS für den Entwurf
+    CASCADE_DRAFT_MODEL = "gpt-4.1-mini"
+    # Segmente ab dieser Tokenzahl oder mit mehr Sätzen gehen direkt an das Premium-Modell
+    CASCADE_COMPLEX_TOKENS = 60
+    CASCADE_COMPLEX_SENTENCES = 3
+
     # Language options for the dropdown
     LANGUAGE_OPTIONS = {
         "Deutsch": "de",
@@ -90,6 +176,48 @@ Der übersetzte Text sollte ungefähr die gleiche Zeichenlänge wie der ursprün
 Verwende korrekte Umlaute und Sonderzeichen für die Zielsprache.
 Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<übersetzter Text>"}}"""
 
+    # Story parts of a DOCX package that contain translatable paragraphs
+    WORD_STORY_CONTENT_TYPES = {
+        DOCX_CONTENT_TYPE.WML_DOCUMENT_MAIN: "document",
+        DOCX_CONTENT_TYPE.WML_HEADER: "header",
+        DOCX_CONTENT_TYPE.WML_FOOTER: "footer",
+        DOCX_CONTENT_TYPE.WML_FOOTNOTES: "footnote",
+        DOCX_CONTENT_TYPE.WML_ENDNOTES: "endnote",
+        DOCX_CONTENT_TYPE.WML_COMMENTS: "comment",
+    }
+    XML_SPACE_ATTRIBUTE = "{http://www.w3.org/XML/1998/namespace}space"
+
+    # Segments above this (estimated) token count are split at sentence boundaries
+    LONG_SEGMENT_TOKEN_LIMIT = 800
+    CHUNK_TOKEN_TARGET = 400
+    CHUNK_CONTEXT_CHARS = 200
+
+    # Wie oft Segmente mit verletzter Terminologie erneut angefragt werden
+    GLOSSARY_RETRY_ROUNDS = 1
+    GLOSSARY_INSTRUCTION = ("Use the term pairs in 'glossary' (source term -> required target term) exactly as given "
+                            "wherever the source term occurs; adjust only inflection where the grammar requires it.")
+
+    # Satzgrenzen inkl. des folgenden Whitespace (wird beim Zusammensetzen wiederverwendet)
+    SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?;:。！？])\s+|\n+')
+
+    # Inline-Marker für Runs in PowerPoint-Absätzen: <r0>Text</r0>
+    RUN_MARKER_PATTERN = re.compile(r'<r(\d+)>(.*?)</r\1>', re.DOTALL)
+    RUN_MARKER_TAG_PATTERN = re.compile(r'</?r\d+>')
+
+    # SmartArt (DrawingML-Diagramme)
+    SMARTART_URI = "http://schemas.openxmlformats.org/drawingml/2006/diagram"
+    DRAWING_NS = "http://schemas.microsoft.com/office/drawing/2008/diagram"
+
+    # Wie oft auffällige Segmente nach der lokalen QA erneut angefragt werden
+    QA_RETRY_ROUNDS = 1
+
+    # Obergrenze der Segmente pro Batch (die Batchgröße selbst regelt der BatchController über das Token-Budget)
+    MAX_BATCH_SEGMENTS = 40
+    BATCH_INSTRUCTIONS = ("Translate each text, maintaining original meaning and formatting. Use correct umlauts and special characters. "
+                          "Keep inline run markers such as <r0>...</r0> and place each translated phrase inside the marker of its source phrase.")
+    CHUNK_INSTRUCTIONS = (BATCH_INSTRUCTIONS + " The text is part of a longer passage; 'context' holds the preceding source text "
+                          "for reference only - do not translate or return it.")
+
     # --- Helper Functions ---
 
     def generate_prompt_hash(prompt: str) -> str:
@@ -150,6 +278,60 @@ Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<
         }
         return names.get(file_type, 'Unbekannter Dateityp')
 
+    def estimate_tokens(text: str) -> int:
+        """Rough token estimate (~4 UTF-8 bytes per token, works for Latin and CJK)."""
+        return len(text.encode('utf-8')) // 4 + 1
+
+    def is_complex_segment(text: str) -> bool:
+        """Cascade heuristic: long, multi-sentence or formatting-heavy segments need the premium model."""
+        if estimate_tokens(text) >= CASCADE_COMPLEX_TOKENS:
+            return True
+        if len(SENTENCE_BOUNDARY_PATTERN.split(text.strip())) >= CASCADE_COMPLEX_SENTENCES:
+            return True
+        return bool(RUN_MARKER_TAG_PATTERN.search(text) or re.search(PLACEHOLDER_PATTERN, text))
+
+    def split_long_segment(text: str) -> List[Dict]:
+        """Splits a long segment at sentence boundaries into chunks of about CHUNK_TOKEN_TARGET tokens.
+
+        Each chunk keeps the whitespace that followed it in the original text ("separator")
+        and the tail of the preceding chunk as read-only context for the model.
+        """
+        sentences = []
+        position = 0
+        for match in SENTENCE_BOUNDARY_PATTERN.finditer(text):
+            sentences.append((text[position:match.start()], match.group(0)))
+            position = match.end()
+        sentences.append((text[position:], ""))
+
+        # Sätze, die allein zu lang sind, werden an Wortgrenzen weiter zerlegt
+        pieces = []
+        for sentence, separator in sentences:
+            if estimate_tokens(sentence) <= CHUNK_TOKEN_TARGET:
+                pieces.append((sentence, separator))
+                continue
+            words = sentence.split(" ")
+            current = []
+            for word in words:
+                if current and estimate_tokens(" ".join(current + [word])) > CHUNK_TOKEN_TARGET:
+                    pieces.append((" ".join(current), " "))
+                    current = []
+                current.append(word)
+            pieces.append((" ".join(current), separator))
+
+        chunks = []
+        current_text = ""
+        for piece, separator in pieces:
+            if current_text and estimate_tokens(current_text + piece) > CHUNK_TOKEN_TARGET:
+                chunks.append({"text": current_text.rstrip(), "separator": current_text[len(current_text.rstrip()):]})
+                current_text = ""
+            current_text += piece + separator
+        if current_text.strip():
+            chunks.append({"text": current_text.rstrip(), "separator": current_text[len(current_text.rstrip()):]})
+
+        for index, chunk in enumerate(chunks):
+            chunk["context"] = chunks[index - 1]["text"][-CHUNK_CONTEXT_CHARS:] if index > 0 else ""
+        return chunks
+
     async def translate_text_with_openai(prompt: str, target_language: str, cache: Dict, model: str = "gpt-4.1-mini", system_prompt: str = None, max_retries: int = 3) -> str:
         """Translates text using the OpenAI API, with caching and retries."""
         # Ensure proper text encoding
@@ -208,52 +390,82 @@ Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<
         return prompt
 
     # ===== WORD DOCUMENT FUNCTIONS =====
+    def paragraph_text_nodes(p_element) -> List:
+        """Returns the w:t nodes owned by a paragraph (runs, hyperlinks, insertions), without nested text boxes."""
+        return [
+            t for t in p_element.iter(qn_docx('w:t'))
+            if next(t.iterancestors(qn_docx('w:p')), None) is p_element
+        ]
+
+    def iter_document_stories(doc, raw_roots: List = None):
+        """Streams all paragraphs of all story parts of a DOCX package.
+
+        Covers the main document (including nested tables and text boxes), headers, footers,
+        footnotes, endnotes and comments. Yields (element_id, story_name, p_element) with locators
+        that only depend on the part name and the paragraph position, so the same walk can be used
+        for write-back. Story parts that python-docx only loads as raw parts are parsed here and
+        appended to ``raw_roots`` as (part, root) so the caller can serialize them again.
+        """
+        for part in doc.part.package.iter_parts():
+            story_kind = WORD_STORY_CONTENT_TYPES.get(part.content_type)
+            if story_kind is None:
+                continue
+            if isinstance(part, XmlPart):
+                root = part.element
+            else:
+                root = parse_docx_xml(part.blob)
+                if raw_roots is not None:
+                    raw_roots.append((part, root))
+            story_name = os.path.splitext(os.path.basename(str(part.partname)))[0]
+            for p_index, p_element in enumerate(root.iter(qn_docx('w:p'))):
+                yield f"{story_name}_p{p_index}", story_kind, p_element
+
     def extract_text_from_document(document_path: str) -> List[Dict]:
-        """Extracts text and context from a Word document."""
+        """Extracts text and context from all story parts of a Word document."""
         try:
             doc = Document(document_path)
             text_data = []
 
-            # Extract text from paragraphs
-            for para_index, paragraph in enumerate(doc.paragraphs):
-                if paragraph.text.strip():
-                    # Safely extract and normalize text
-                    clean_text = safe_text_extraction(paragraph.text)
-                    if clean_text:
-                        # Determine paragraph type based on style
-                        para_type = "BODY"
-                        if paragraph.style.name.startswith('Heading'):
-                            para_type = "HEADING"
-                        elif paragraph.style.name.startswith('Title'):
-                            para_type = "TITLE"
-                        elif paragraph.style.name.startswith('Subtitle'):
-                            para_type = "SUBTITLE"
+            for element_id, story_kind, p_element in iter_document_stories(doc):
+                paragraph_text = "".join(t.text or "" for t in paragraph_text_nodes(p_element))
+                if not paragraph_text.strip():
+                    continue
+                # Safely extract and normalize text
+                clean_text = safe_text_extraction(paragraph_text)
+                if not clean_text:
+                    continue
 
-                        text_data.append({
-                            "element_type": "paragraph",
-                            "element_id": f"para_{para_index}",
-                            "text": clean_text,
-                            "style": paragraph.style.name,
-                            "para_type": para_type,
-                            "para_index": para_index
-                        })
+                # Determine paragraph type based on style
+                style_name = ""
+                try:
+                    style_name = Paragraph(p_element, doc).style.name
+                except Exception:
+                    pass
+                para_type = "BODY"
+                if style_name.startswith('Heading'):
+                    para_type = "HEADING"
+                elif style_name.startswith('Title'):
+                    para_type = "TITLE"
+                elif style_name.startswith('Subtitle'):
+                    para_type = "SUBTITLE"
+
+                if next(p_element.iterancestors(qn_docx('w:txbxContent')), None) is not None:
+                    element_type = "textbox"
+                elif next(p_element.iterancestors(qn_docx('w:tbl')), None) is not None:
+                    element_type = "table"
+                elif story_kind == "document":
+                    element_type = "paragraph"
+                else:
+                    element_type = story_kind
 
-            # Extract text from tables
-            for table_index, table in enumerate(doc.tables):
-                for row_index, row in enumerate(table.rows):
-                    for col_index, cell in enumerate(row.cells):
-                        if cell.text.strip():
-                            # Safely extract and normalize text
-                            clean_text = safe_text_extraction(cell.text)
-                            if clean_text:
-                                text_data.append({
-                                    "element_type": "table",
-                                    "element_id": f"table_{table_index}_row_{row_index}_col_{col_index}",
-                                    "text": clean_text,
-                                    "table_index": table_index,
-                                    "row_index": row_index,
-                                    "col_index": col_index
-                                })
+                text_data.append({
+                    "element_type": element_type,
+                    "element_id": element_id,
+                    "text": clean_text,
+                    "style": style_name,
+                    "para_type": para_type,
+                    "story": story_kind
+                })
 
             return text_data
 
@@ -265,43 +477,36 @@ Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<
     def extract_text_from_excel(file_path: str) -> List[Dict]:
         """Extracts text and context from an Excel file."""
         try:
-            # Load the workbook
-            workbook = load_workbook(file_path, data_only=True)
+            # Read-only: Werte werden zeilenweise gestreamt statt als Zellobjekte aufgebaut
+            workbook = load_workbook(file_path, data_only=True, read_only=True)
             text_data = []
 
             # Extract text from all worksheets
             for sheet_index, sheet_name in enumerate(workbook.sheetnames):
                 worksheet = workbook[sheet_name]
-                
-                # Iterate through all cells in the worksheet
-                for row in worksheet.iter_rows():
-                    for cell in row:
-                        if cell.value is not None and str(cell.value).strip():
-                            # Only process text cells (not numbers, dates, etc.)
-                            cell_value = str(cell.value).strip()
-                            # Skip cells that are purely numeric
-                            try:
-                                float(cell_value)
-                                continue  # Skip numeric values
-                            except ValueError:
-                                pass  # Continue with text processing
-                            
-                            # Check if it looks like text (contains letters)
-                            if re.search(r'[a-zA-ZäöüÄÖÜß]', cell_value):
-                                # Safely extract and normalize text
-                                clean_text = safe_text_extraction(cell_value)
-                                if clean_text and len(clean_text) > 1:  # Skip single characters
-                                    text_data.append({
-                                        "element_type": "cell",
-                                        "element_id": f"sheet_{sheet_index}_cell_{cell.coordinate}",
-                                        "text": clean_text,
-                                        "sheet_name": sheet_name,
-                                        "sheet_index": sheet_index,
-                                        "coordinate": cell.coordinate,
-                                        "row": cell.row,
-                                        "column": cell.column
-                                    })
+                rows = worksheet.iter_rows(min_row=1, min_col=1, max_col=worksheet.max_column, values_only=True)
+
+                # Classify all cells at once; only "text" cells are translated (no numbers, dates, codes, e-mails, URLs)
+                cells = classify_sheet(rows)
+                text_cells = cells[cells["category"] == "text"]
+
+                for row, column, value in zip(text_cells["row"], text_cells["column"], text_cells["value"]):
+                    coordinate = f"{get_column_letter(column)}{row}"
+                    # Safely extract and normalize text
+                    clean_text = safe_text_extraction(value)
+                    if clean_text:
+                        text_data.append({
+                            "element_type": "cell",
+                            "element_id": f"sheet_{sheet_index}_cell_{coordinate}",
+                            "text": clean_text,
+                            "sheet_name": sheet_name,
+                            "sheet_index": sheet_index,
+                            "coordinate": coordinate,
+                            "row": int(row),
+                            "column": int(column)
+                        })
 
+            workbook.close()
             return text_data
 
         except Exception as e:
@@ -309,51 +514,143 @@ Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<
             return []
 
     # ===== POWERPOINT FUNCTIONS =====
+    def build_marked_paragraph_text(paragraph) -> str:
+        """Joins the runs of a paragraph into one segment with inline run markers (<r0>...</r0>)."""
+        runs = paragraph.runs
+        if len(runs) == 1:
+            return runs[0].text
+        return "".join(f"<r{run_index}>{run.text}</r{run_index}>" for run_index, run in enumerate(runs))
+
+    def apply_marked_paragraph_text(paragraph, translated_text: str) -> None:
+        """Maps a translated, marker-annotated paragraph back onto the original runs."""
+        runs = paragraph.runs
+        if not runs:
+            return
+        if len(runs) == 1:
+            runs[0].text = translated_text
+            return
+
+        run_texts = [""] * len(runs)
+        last_run_index = 0
+        found_marker = False
+        position = 0
+        for match in RUN_MARKER_PATTERN.finditer(translated_text):
+            run_index = int(match.group(1))
+            if run_index >= len(runs):
+                continue
+            # Text außerhalb der Marker dem vorherigen Run zuschlagen
+            run_texts[last_run_index] += translated_text[position:match.start()]
+            run_texts[run_index] += match.group(2)
+            last_run_index = run_index
+            found_marker = True
+            position = match.end()
+        run_texts[last_run_index] += translated_text[position:]
+
+        if not found_marker:
+            # Marker verloren gegangen: gesamten Text in den ersten Run, Formatierung der übrigen bleibt leer
+            run_texts = [RUN_MARKER_TAG_PATTERN.sub("", translated_text)] + [""] * (len(runs) - 1)
+
+        for run, run_text in zip(runs, run_texts):
+            run.text = RUN_MARKER_TAG_PATTERN.sub("", run_text)
+
+    def build_slide_shape_index(shapes, parent_id: str, title_shape_id) -> List[Dict]:
+        """Flattens a (group) shape tree once into [{"id", "shape", "shape_type"}] with hierarchical ids."""
+        index = []
+        for shape_index, shape in enumerate(shapes):
+            shape_id = f"{parent_id}_shape{shape_index}"
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                index.extend(build_slide_shape_index(shape.shapes, shape_id, title_shape_id))
+                continue
+            if title_shape_id is not None and shape.shape_id == title_shape_id:
+                shape_type = "TITLE"
+            elif getattr(shape, "has_table", False):
+                shape_type = "TABLE"
+            elif getattr(shape, "has_chart", False):
+                shape_type = "CHART"
+            elif shape._element.xpath(f'.//a:graphicData[@uri="{SMARTART_URI}"]'):
+                shape_type = "SMARTART"
+            else:
+                shape_type = "BODY"
+            index.append({"id": shape_id, "shape": shape, "shape_type": shape_type})
+        return index
+
+    def iter_smartart_parts(slide, shape):
+        """Yields (kind, part) for the data and drawing parts behind a SmartArt graphic frame."""
+        rel_ids = next(shape._element.iter(f"{{{SMARTART_URI}}}relIds"), None)
+        if rel_ids is None:
+            return
+        data_part = slide.part.related_part(rel_ids.get(qn('r:dm')))
+        yield "data", data_part
+        # Der Drawing-Part ist der gerenderte Cache, den PowerPoint anzeigt
+        data_root = parse_xml(data_part.blob)
+        for ext in data_root.iter(f"{{{DRAWING_NS}}}dataModelExt"):
+            drawing_rel_id = ext.get("relId")
+            if drawing_rel_id and drawing_rel_id in slide.part.rels:
+                yield "drawing", slide.part.related_part(drawing_rel_id)
+
+    def iter_presentation_stories(prs, smartart_roots: List = None):
+        """Single pass over all text in a presentation.
+
+        Yields (story_id, slide_number, shape_type, paragraphs) for shape text frames (including
+        grouped shapes), table cells, chart titles, SmartArt text and speaker notes. The story ids
+        are stable, so extraction and write-back can be matched via a dict. Parsed SmartArt parts
+        are appended to ``smartart_roots`` as (part, root) so the caller can serialize them again.
+        """
+        for slide_number, slide in enumerate(prs.slides, start=1):
+            slide_id = f"slide{slide_number}"
+            title = slide.shapes.title
+            title_shape_id = title.shape_id if title is not None else None
+
+            for item in build_slide_shape_index(slide.shapes, slide_id, title_shape_id):
+                shape, shape_id, shape_type = item["shape"], item["id"], item["shape_type"]
+                if shape_type == "TABLE":
+                    for row_idx, row in enumerate(shape.table.rows):
+                        for col_idx, cell in enumerate(row.cells):
+                            yield f"{shape_id}_row{row_idx}_col{col_idx}", slide_number, "TABLE", cell.text_frame.paragraphs
+                elif shape_type == "CHART":
+                    chart = shape.chart
+                    if chart.has_title and chart.chart_title.has_text_frame:
+                        yield f"{shape_id}_chart_title", slide_number, "CHART", chart.chart_title.text_frame.paragraphs
+                    for axis_name in ("category_axis", "value_axis"):
+                        try:
+                            axis = getattr(chart, axis_name)
+                        except (ValueError, NotImplementedError):
+                            continue  # z.B. Kreisdiagramme haben keine Achsen
+                        if axis.has_title and axis.axis_title.has_text_frame:
+                            yield f"{shape_id}_{axis_name}_title", slide_number, "CHART", axis.axis_title.text_frame.paragraphs
+                elif shape_type == "SMARTART":
+                    for kind, part in iter_smartart_parts(slide, shape):
+                        root = parse_xml(part.blob)
+                        if smartart_roots is not None:
+                            smartart_roots.append((part, root))
+                        paragraphs = [_Paragraph(p, None) for p in root.iter(qn('a:p'))]
+                        yield f"{shape_id}_smartart_{kind}", slide_number, "SMARTART", paragraphs
+                elif shape.has_text_frame:
+                    yield shape_id, slide_number, shape_type, shape.text_frame.paragraphs
+
+            if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+                yield f"{slide_id}_notes", slide_number, "NOTES", slide.notes_slide.notes_text_frame.paragraphs
+
     def extract_text_from_presentation(presentation_path: str) -> List[Dict]:
-        """Extracts text and context from a PowerPoint presentation."""
+        """Extracts paragraph-level text segments and context from a PowerPoint presentation."""
         try:
             prs = Presentation(presentation_path)
             text_data = []
 
-            for slide_number, slide in enumerate(prs.slides, start=1):
-                for shape_index, shape in enumerate(slide.shapes):
-                    shape_id = f"slide{slide_number}_shape{shape_index}"
-                    if shape.has_text_frame:
-                        text_frame = shape.text_frame
-                        for paragraph in text_frame.paragraphs:
-                            for run in paragraph.runs:
-                                if run.text.strip():
-                                    # Safely extract and normalize text
-                                    clean_text = safe_text_extraction(run.text)
-                                    if clean_text:
-                                        shape_type = "UNKNOWN"
-                                        if shape == slide.shapes.title:
-                                            shape_type = "TITLE"
-                                        elif shape.has_table:
-                                            shape_type = "TABLE"
-                                        else:
-                                            shape_type = "BODY"
-
-                                        text_data.append({
-                                            "slide_number": slide_number,
-                                            "shape_type": shape_type,
-                                            "text": clean_text,
-                                            "shape_id": shape_id,
-                                        })
-
-                    elif shape.has_table:
-                        for row_idx, row in enumerate(shape.table.rows):
-                            for col_idx, cell in enumerate(row.cells):
-                                if cell.text.strip():
-                                    # Safely extract and normalize text
-                                    clean_text = safe_text_extraction(cell.text)
-                                    if clean_text:
-                                        text_data.append({
-                                            "slide_number": slide_number,
-                                            "shape_type": "TABLE",
-                                            "text": clean_text,
-                                            "shape_id": f"{shape_id}_row{row_idx}_col{col_idx}"
-                                        })
+            for story_id, slide_number, shape_type, paragraphs in iter_presentation_stories(prs):
+                for paragraph_index, paragraph in enumerate(paragraphs):
+                    if not paragraph.text.strip():
+                        continue
+                    clean_text = safe_text_extraction(build_marked_paragraph_text(paragraph))
+                    if clean_text:
+                        text_data.append({
+                            "slide_number": slide_number,
+                            "shape_type": shape_type,
+                            "text": clean_text,
+                            "shape_id": story_id,
+                            "element_id": f"{story_id}_para{paragraph_index}",
+                            "run_count": len(paragraph.runs),
+                        })
 
             return text_data
 
@@ -361,9 +658,55 @@ Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<
             st.error(f"Fehler beim Extrahieren von Text aus der Präsentation: {e}")
             return []
 
-    async def batch_translate_texts_with_openai(text_entries: List[Dict], target_language: str, cache: Dict, model: str = "gpt-4.1-mini", system_prompt: str = None, max_retries: int = 3, batch_size: int = 10) -> None:
-        """Batch translates multiple texts using the OpenAI API with structured JSON output."""
+    def build_batch_system_instruction(target_language: str, system_prompt: str = None) -> str:
+        """Builds the system instruction for batch requests (custom system prompt or default)."""
+        if system_prompt is None:
+            return f"""Du bist ein hilfreicher Assistent, der mehrere Texte in {target_language} übersetzt.
+Behalte die ursprüngliche Bedeutung so genau wie möglich bei.
+Passe den Ton jeder Übersetzung so an, dass er für professionelle Dokumente in der Zielsprache ({target_language}) angemessen ist.
+Der übersetzte Text für jede Eingabe sollte ungefähr die gleiche Länge wie der ursprüngliche Text haben (innerhalb einer 10%-Marge).
+Verwende korrekte Umlaute und Sonderzeichen für die Zielsprache.
+Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
+{{"translations": {{"<sha256 hash>": "<übersetzter Text>"}} }}"""
+        return system_prompt.format(target_language=target_language) + f"""
+Verwende korrekte Umlaute und Sonderzeichen für die Zielsprache.
+Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
+{{"translations": {{"<sha256 hash>": "<übersetzter Text>"}} }}"""
+
+    async def batch_translate_texts_with_openai(text_entries: List[Dict], target_language: str, cache: Dict, model: str = "gpt-4.1-mini", system_prompt: str = None, max_retries: int = 3, skip_target_language: bool = True, term_base: TermBase = None, pretranslated: Dict = None, fallback_model: str = None, cascade: bool = False) -> None:
+        """Batch translates multiple texts using the OpenAI API with structured JSON output.
+
+        Every entry is tagged with its detected source language. With skip_target_language, segments
+        that are already in the target language or contain no letters are copied into the cache
+        unchanged instead of being sent to the API. With a term_base, each request carries only the
+        term pairs found in its texts, and segments whose translation misses a required target term
+        are re-requested with just the violated pairs.
+
+        Afterwards all segments run through the local QA checks (translation_qa); only flagged
+        segments are re-requested, and the final findings are stored as st.session_state["qa_report"].
+
+        Slow batches are hedged; if the model keeps failing, the remaining batches go to fallback_model.
+
+        With cascade, simple segments are drafted with CASCADE_DRAFT_MODEL; only drafts that are missing
+        or flagged by the local QA checks are re-sent to the selected (premium) model. Long or complex
+        segments go to the premium model directly.
+
+        pretranslated holds results of a speculative pre-translation ({prompt hash: translation}); they
+        are used instead of an API call but still go through the glossary and QA checks.
+        """
         texts_to_translate = []
+        long_segments = []
+        queued_hashes = set()
+        skipped_target_language = 0
+        skipped_neutral = 0
+        skipped_tokens = 0
+        controller = BatchController.for_model(model)
+        # (Hash, Ausgangstext, bereits in Zielsprache) je eindeutigem Segment für die QA
+        qa_candidates = []
+        pretranslated_units = []
+        st.session_state.pop("qa_report", None)
+        # Segmente ohne Übersetzung (fehlgeschlagene Batches); nur Läufe ohne solche werden zwischengespeichert
+        st.session_state["untranslated_segments"] = 0
         cache_key_base = model + (system_prompt or DEFAULT_SYSTEM_PROMPT)
         
         for entry in text_entries:
@@ -371,60 +714,362 @@ Gib die Übersetzung als JSON-Objekt genau wie folgt zurück: {{"translated": "<
             clean_text = safe_text_extraction(entry["text"])
             cache_key = clean_text + cache_key_base
             prompt_hash = generate_prompt_hash(cache_key)
-            if prompt_hash not in cache:
+            entry["prompt_hash"] = prompt_hash
+            if prompt_hash in cache or prompt_hash in queued_hashes:
+                continue
+            # Run-Marker (<r0>...</r0>) aus PPTX-Segmenten verfälschen n-Gramme und Buchstabenzahl
+            detection_text = RUN_MARKER_TAG_PATTERN.sub("", clean_text)
+            detected_language, confidence = detect_language(detection_text)
+            entry["detected_language"] = detected_language
+            entry["language_confidence"] = confidence
+            # Nur eindeutig erkannte Segmente bleiben unübersetzt (Abstand zur zweitbesten Sprache, Mindestlänge)
+            same_language = is_reliably_language(detection_text, target_language)
+            qa_candidates.append((prompt_hash, clean_text, same_language))
+            if skip_target_language:
+                if detected_language == NEUTRAL:
+                    cache[prompt_hash] = clean_text
+                    skipped_neutral += 1
+                    skipped_tokens += estimate_tokens(clean_text)
+                    continue
+                if same_language:
+                    cache[prompt_hash] = clean_text
+                    skipped_target_language += 1
+                    skipped_tokens += estimate_tokens(clean_text)
+                    continue
+            queued_hashes.add(prompt_hash)
+            if pretranslated and prompt_hash in pretranslated:
+                cache[prompt_hash] = pretranslated[prompt_hash]
+                pretranslated_units.append((prompt_hash, clean_text))
+            elif estimate_tokens(clean_text) > LONG_SEGMENT_TOKEN_LIMIT:
+                # Lange Segmente werden in Satz-Chunks zerlegt und nach der Übersetzung wieder zusammengesetzt
+                chunks = split_long_segment(clean_text)
+                for chunk_index, chunk in enumerate(chunks):
+                    chunk["hash"] = generate_prompt_hash(f"{prompt_hash}_chunk_{chunk_index}")
+                long_segments.append((prompt_hash, chunks))
+            else:
                 texts_to_translate.append((prompt_hash, clean_text))
 
-        if not texts_to_translate:
+        skipped_segments = skipped_target_language + skipped_neutral
+        if pretranslated_units:
+            st.info(f"⚡ {len(pretranslated_units)} Segmente aus der Vorübersetzung übernommen")
+        if skipped_segments:
+            queued_segments = len(texts_to_translate) + len(long_segments)
+            queued_tokens = sum(estimate_tokens(text) for _, text in texts_to_translate)
+            avoided_calls = math.ceil((queued_tokens + skipped_tokens) / controller.token_budget) - math.ceil(queued_tokens / controller.token_budget)
+            st.info(
+                f"🔎 Spracherkennung: {queued_segments} Segmente werden übersetzt, "
+                f"{skipped_target_language} sind bereits in der Zielsprache, "
+                f"{skipped_neutral} ohne Text (Zahlen/Codes) übersprungen – "
+                f"ca. {avoided_calls} API-Aufrufe eingespart"
+            )
+
+        if not texts_to_translate and not long_segments and not pretranslated_units:
             return
 
-        total_batches = (len(texts_to_translate) + batch_size - 1) // batch_size
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        tasks = []
-        for batch_num, i in enumerate(range(0, len(texts_to_translate), batch_size), 1):
-            batch = texts_to_translate[i:i + batch_size]
-            payload = {hash_: text for hash_, text in batch}
+        api_key = st.session_state.get("api_key")
+        if not api_key:
+            raise ValueError("OpenAI API-Schlüssel nicht gefunden. Bitte gib deinen API-Schlüssel ein.")
 
-            status_text.text(f"Verarbeite Batch {batch_num}/{total_batches} ({len(batch)} Texte)")
-            progress_bar.progress(batch_num / total_batches)
+        client = AsyncOpenAI(api_key=api_key, timeout=60.0)
 
-            # Use custom system prompt or default for batch translation
-            if system_prompt is None:
-                system_instruction = f"""Du bist ein hilfreicher Assistent, der mehrere Texte in {target_language} übersetzt.
-Behalte die ursprüngliche Bedeutung so genau wie möglich bei.
-Passe den Ton jeder Übersetzung so an, dass er für professionelle Dokumente in der Zielsprache ({target_language}) angemessen ist.
-Der übersetzte Text für jede Eingabe sollte ungefähr die gleiche Länge wie der ursprüngliche Text haben (innerhalb einer 10%-Marge).
-Verwende korrekte Umlaute und Sonderzeichen für die Zielsprache.
-Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
-{{"translations": {{"<sha256 hash>": "<übersetzter Text>"}} }}"""
-            else:
-                system_instruction = system_prompt.format(target_language=target_language) + f"""
-Verwende korrekte Umlaute und Sonderzeichen für die Zielsprache.
-Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
-{{"translations": {{"<sha256 hash>": "<übersetzter Text>"}} }}"""
+        system_instruction = build_batch_system_instruction(target_language, system_prompt)
+        routing = new_request_routing(model, fallback_model)
 
+        def make_prompt(texts: Dict, context: str = None) -> Dict:
             prompt_data = {
-                "texts": payload,
+                "texts": texts,
                 "target_language": target_language,
-                "instructions": "Translate each text, maintaining original meaning and formatting. Use correct umlauts and special characters."
+                "instructions": BATCH_INSTRUCTIONS if context is None else CHUNK_INSTRUCTIONS
             }
+            if context:
+                prompt_data["context"] = context
+            attach_glossary(prompt_data, term_base)
+            return prompt_data
+
+        # Chunks zuerst und einzeln einplanen, damit lange Segmente parallel laufen und nicht den Schluss bestimmen
+        work_items = [(chunk["hash"], chunk["text"], chunk["context"] or "") for _, chunks in long_segments for chunk in chunks]
+        chunk_count = len(work_items)
+        # Kaskade: einfache Segmente zuerst mit dem Entwurfsmodell, komplexe direkt mit dem gewählten Modell
+        draft_model = CASCADE_DRAFT_MODEL if cascade and CASCADE_DRAFT_MODEL != model else None
+        draft_items = []
+        for hash_, text in texts_to_translate:
+            if draft_model and not is_complex_segment(text):
+                draft_items.append((hash_, text, None))
+            else:
+                work_items.append((hash_, text, None))
+
+        # Fortschritt wird erst bei tatsächlich abgeschlossenen Batches fortgeschrieben
+        progress = TranslationProgress(len(texts_to_translate) + chunk_count)
+        if draft_items:
+            # Fällt das Entwurfsmodell aus, übernimmt das Premium-Modell
+            draft_controller = BatchController.for_model(draft_model)
+            draft_routing = new_request_routing(draft_model, model)
+            # Das Premium-Modell behält auch als Fallback der Entwürfe seine eigene Batch-Steuerung
+            draft_routing["controllers"][model] = controller
+            await asyncio.gather(
+                run_adaptive_batches(client, system_instruction, work_items, make_prompt, cache, max_retries, model, controller, progress, routing),
+                run_adaptive_batches(client, system_instruction, draft_items, make_prompt, cache, max_retries, draft_model, draft_controller, progress, draft_routing),
+            )
+            draft_controller.save()
+        else:
+            await run_adaptive_batches(client, system_instruction, work_items, make_prompt, cache, max_retries, model, controller, progress, routing)
+        progress.finish()
+
+        if draft_items:
+            # Fehlende oder von der lokalen QA markierte Entwürfe gehen an das Premium-Modell
+            drafts = pd.DataFrame([(hash_, text) for hash_, text, _ in draft_items], columns=["hash", "source"])
+            drafts["target"] = drafts["hash"].map(cache)
+            draft_findings = run_qa_checks(drafts, target_language)
+            escalate = draft_findings[(draft_findings["qa"] != "") | draft_findings["target"].isna()]
+            if not escalate.empty:
+                st.info(f"🪜 Kaskade: {len(escalate)} Entwürfe werden mit {model} neu übersetzt...")
+                escalation_items = [(hash_, text, None) for hash_, text in zip(escalate["hash"], escalate["source"])]
+                await run_adaptive_batches(client, system_instruction, escalation_items, make_prompt, cache, max_retries, model, controller, routing=routing)
+            st.caption(f"🪜 Kaskade: {len(draft_items) - len(escalate)} Segmente mit {draft_model} übersetzt, "
+                       f"{len(escalate)} eskaliert und {len(work_items)} direkt mit {model} übersetzt")
+
+        if term_base:
+            # Chunks werden vor dem Zusammensetzen geprüft, damit nur der betroffene Chunk neu angefragt wird
+            translated_units = texts_to_translate + pretranslated_units + [(chunk["hash"], chunk["text"]) for _, chunks in long_segments for chunk in chunks]
+            await enforce_glossary(client, system_instruction, translated_units, target_language, cache, term_base, max_retries, model, controller, routing)
+
+        # Chunks in Originalreihenfolge zusammensetzen; fehlende Chunks bleiben im Original
+        missing_chunks = sum(chunk["hash"] not in cache for _, chunks in long_segments for chunk in chunks)
+        for prompt_hash, chunks in long_segments:
+            cache[prompt_hash] = "".join(
+                cache.pop(chunk["hash"], chunk["text"]) + chunk["separator"] for chunk in chunks
+            ).strip()
+
+        # Nur kurze, tatsächlich angefragte Segmente werden bei QA-Befunden erneut übersetzt
+        retranslatable = dict(texts_to_translate + pretranslated_units)
+        findings = await review_translations(client, system_instruction, qa_candidates, retranslatable, target_language, cache, max_retries, model, controller, term_base, routing)
+        for model_controller in routing["controllers"].values():
+            model_controller.save()
+        st.caption(f"⚙️ Batch-Steuerung ({model}): {controller.token_budget} Tokens pro Batch, "
+                   f"{controller.concurrency} parallele Anfragen ({controller.increases}× erhöht, {controller.decreases}× reduziert) | "
+                   f"Hedges: {routing['hedges']} ({routing['hedge_wins']} schneller) | "
+                   f"Fallback-Batches: {routing['fallbacks']}" + (f" → {fallback_model}" if routing["fallbacks"] else ""))
+        qa_by_hash = dict(zip(findings["hash"], findings["qa"]))
+        untranslated = missing_chunks + len({entry["prompt_hash"] for entry in text_entries if entry["prompt_hash"] not in cache})
+        st.session_state["untranslated_segments"] = untranslated
+        if untranslated:
+            st.warning(f"⚠️ {untranslated} Segmente konnten nicht übersetzt werden und bleiben im Original.")
+        st.session_state["qa_report"] = pd.DataFrame([
+            {
+                "Position": f"{entry['sheet_name']}!{entry['coordinate']}" if "coordinate" in entry else entry.get("element_id", ""),
+                "Original": entry["text"],
+                "Übersetzung": cache.get(entry["prompt_hash"], entry["text"]),
+                "QA": qa_by_hash.get(entry["prompt_hash"], ""),
+            }
+            for entry in text_entries
+        ])
 
-            api_key = st.session_state.get("api_key")
-            if not api_key:
-                raise ValueError("OpenAI API-Schlüssel nicht gefunden. Bitte gib deinen API-Schlüssel ein.")
-
-            client = AsyncOpenAI(api_key=api_key, timeout=60.0)
-            tasks.append(translate_batch(client, system_instruction, prompt_data, cache, max_retries, batch_num, total_batches, model))
+    def attach_glossary(prompt_data: Dict, term_base: TermBase) -> None:
+        """Adds the term pairs occurring in the texts of a request (and only those) to the prompt."""
+        if not term_base:
+            return
+        glossary = {}
+        for text in prompt_data["texts"].values():
+            glossary.update(term_base.find_terms(text))
+        if glossary:
+            prompt_data["glossary"] = glossary
+            prompt_data["instructions"] += " " + GLOSSARY_INSTRUCTION
+
+    async def enforce_glossary(client: AsyncOpenAI, system_instruction: str, translated_units: List, target_language: str, cache: Dict, term_base: TermBase, max_retries: int, model: str, controller: BatchController, routing: Dict = None) -> None:
+        """Checks translations against the term base and re-requests only the violating segments."""
+        violating = []
+        for round_num in range(GLOSSARY_RETRY_ROUNDS + 1):
+            violating = []
+            for hash_, text in translated_units:
+                if hash_ not in cache:
+                    continue
+                violations = term_base.find_violations(text, cache[hash_])
+                if violations:
+                    violating.append((hash_, text, violations))
+            if not violating or round_num == GLOSSARY_RETRY_ROUNDS:
+                break
 
-        await asyncio.gather(*tasks)
-        progress_bar.progress(1.0)
-        status_text.text("Übersetzung abgeschlossen!")
+            st.info(f"📖 Terminologie: {len(violating)} Segmente ohne vorgegebene Zielbegriffe werden erneut übersetzt...")
+            violations_by_hash = {hash_: violations for hash_, _, violations in violating}
+
+            def make_prompt(texts: Dict, context: str = None) -> Dict:
+                glossary = {}
+                for hash_ in texts:
+                    glossary.update(violations_by_hash[hash_])
+                return {
+                    "texts": texts,
+                    "target_language": target_language,
+                    "glossary": glossary,
+                    "instructions": "A previous translation of these texts ignored the required terminology. "
+                                    "Translate each text again, maintaining original meaning and formatting. "
+                                    "Keep inline run markers such as <r0>...</r0>. " + GLOSSARY_INSTRUCTION
+                }
+
+            work_items = [(hash_, text, None) for hash_, text, _ in violating]
+            await run_adaptive_batches(client, system_instruction, work_items, make_prompt, cache, max_retries, model, controller, routing=routing)
+            translated_units = [(hash_, text) for hash_, text, _ in violating]
+
+        if violating:
+            st.warning(f"📖 Terminologie: {len(violating)} Segmente enthalten nach der Korrektur weiterhin nicht alle Zielbegriffe.")
+        else:
+            st.info("📖 Terminologie: alle gefundenen Begriffe wurden eingehalten.")
+
+    async def review_translations(client: AsyncOpenAI, system_instruction: str, qa_candidates: List, retranslatable: Dict, target_language: str, cache: Dict, max_retries: int, model: str, controller: BatchController, term_base: TermBase = None, routing: Dict = None) -> pd.DataFrame:
+        """Runs the local QA checks and re-requests flagged segments; returns the final findings."""
+        segments = pd.DataFrame(qa_candidates, columns=["hash", "source", "same_language"])
+        for round_num in range(QA_RETRY_ROUNDS + 1):
+            segments["target"] = segments["hash"].map(cache)
+            findings = run_qa_checks(segments, target_language)
+            flagged = findings[(findings["qa"] != "") & findings["hash"].isin(retranslatable)]
+            if flagged.empty or round_num == QA_RETRY_ROUNDS:
+                break
 
-    async def translate_batch(client: AsyncOpenAI, system_instruction: str, prompt_data: Dict, cache: Dict, max_retries: int, batch_num: int, total_batches: int, model: str) -> None:
-        """Translates a single batch (async)."""
+            st.info(f"🔍 QA: {len(flagged)} auffällige Segmente werden erneut übersetzt...")
+            findings_by_hash = dict(zip(flagged["hash"], flagged["qa"]))
+
+            def make_prompt(texts: Dict, context: str = None) -> Dict:
+                prompt_data = {
+                    "texts": texts,
+                    "target_language": target_language,
+                    "qa_findings": {hash_: findings_by_hash[hash_] for hash_ in texts},
+                    "instructions": "An automatic check flagged the previous translation of these texts (see 'qa_findings'). "
+                                    "Translate each text again, fully into the target language, keeping all numbers, dates, placeholders "
+                                    "such as {name} and inline markers such as <r0>...</r0> exactly as in the source."
+                }
+                attach_glossary(prompt_data, term_base)
+                return prompt_data
+
+            work_items = [(hash_, text, None) for hash_, text in zip(flagged["hash"], flagged["source"])]
+            await run_adaptive_batches(client, system_instruction, work_items, make_prompt, cache, max_retries, model, controller, routing=routing)
+
+        flagged_count = int((findings["qa"] != "").sum())
+        if flagged_count:
+            st.warning(f"🔍 QA: {flagged_count} Segmente mit Auffälligkeiten – Details im QA-Bericht")
+        else:
+            st.info("🔍 QA: keine Auffälligkeiten gefunden")
+        return findings
+
+    def new_request_routing(model: str, fallback_model: str = None) -> Dict:
+        """Per-run routing state: circuit breakers and batch controllers per model plus hedge and fallback telemetry."""
+        return {"model": model, "fallback_model": fallback_model, "breakers": defaultdict(CircuitBreaker),
+                "controllers": {}, "hedges": 0, "hedge_wins": 0, "fallbacks": 0}
+
+    def model_controller(routing: Dict, model: str) -> BatchController:
+        """The BatchController of a model in this run; a model seen for the first time starts from its tuned values."""
+        if model not in routing["controllers"]:
+            routing["controllers"][model] = BatchController.for_model(model)
+        return routing["controllers"][model]
+
+    def fallback_active(routing: Dict) -> bool:
+        """True while the primary model's breaker is open and a healthy fallback model is configured."""
+        fallback_model = routing["fallback_model"]
+        return bool(routing["breakers"][routing["model"]].is_open and fallback_model
+                    and not routing["breakers"][fallback_model].is_open)
+
+    def route_model(routing: Dict) -> str:
+        """Returns the model for the next new batch."""
+        return routing["fallback_model"] if fallback_active(routing) else routing["model"]
+
+    async def hedged_translate_batch(client: AsyncOpenAI, system_instruction: str, prompt_data: Dict, cache: Dict, max_retries: int, batch_num: int, total_batches: int, model: str, controller: BatchController, routing: Dict) -> Dict:
+        """Runs translate_batch; if it takes longer than the observed p95 latency, a duplicate request is
+        issued and the first successful one wins (the other one is cancelled). A request that finished
+        with failed=True does not win while the other one is still running."""
+        primary = asyncio.ensure_future(translate_batch(client, system_instruction, prompt_data, cache, max_retries, batch_num, total_batches, model))
+        delay = controller.hedge_delay()
+        if delay is None:
+            stats = await primary
+        else:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                stats = primary.result()
+            else:
+                routing["hedges"] += 1
+                hedge = asyncio.ensure_future(translate_batch(client, system_instruction, prompt_data, cache, max_retries, batch_num, total_batches, model))
+                running = {primary, hedge}
+                while running:
+                    done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    # Erfolgreiche Antworten zuerst; ein schneller Fehlschlag wartet auf die andere Anfrage
+                    winner = min(done, key=lambda task: task.result()["failed"])
+                    if not winner.result()["failed"]:
+                        break
+                for task in running:
+                    task.cancel()
+                if winner is hedge:
+                    routing["hedge_wins"] += 1
+                stats = winner.result()
+        stats["model"] = model
+        return stats
+
+    async def run_adaptive_batches(client: AsyncOpenAI, system_instruction: str, work_items: List, make_prompt, cache: Dict, max_retries: int, model: str, controller: BatchController, progress: TranslationProgress = None, routing: Dict = None) -> None:
+        """Sends work items as batches sized and scheduled by the BatchController.
+
+        work_items are (hash, text, context) tuples. Items with context None are packed into batches
+        up to the controller's current token budget; items with a context (chunks of long segments)
+        are sent alone. make_prompt(texts, context) builds the prompt data of a batch. At most
+        the model's concurrency batches are in flight; both values adapt while the run progresses and
+        every model has its own controller (routing["controllers"]). Slow batches are hedged, and when
+        the model's circuit breaker opens the remaining batches go to routing["fallback_model"]. Batches
+        that failed on the primary model are sent to the fallback model once, whether or not the
+        breaker has opened.
+        """
+        if routing is None:
+            routing = new_request_routing(model)
+        routing["controllers"].setdefault(model, controller)
+        pending = deque(work_items)
+        # Auf dem Hauptmodell fehlgeschlagene Einträge, die einmal mit dem Fallback-Modell wiederholt werden
+        retry_pending = deque()
+        in_flight = {}
+        requeued = set()
+        batch_num = 0
+        while pending or retry_pending or in_flight:
+            while pending or retry_pending:
+                queue, batch_model = (retry_pending, routing["fallback_model"]) if retry_pending else (pending, route_model(routing))
+                batch_controller = model_controller(routing, batch_model)
+                if len(in_flight) >= batch_controller.concurrency:
+                    break
+                hash_, text, context = queue.popleft()
+                texts = {hash_: text}
+                budget = batch_controller.token_budget - estimate_tokens(text)
+                if context is None:
+                    while (queue and queue[0][2] is None and len(texts) < MAX_BATCH_SEGMENTS
+                           and estimate_tokens(queue[0][1]) <= budget):
+                        next_hash, next_text, _ = queue.popleft()
+                        texts[next_hash] = next_text
+                        budget -= estimate_tokens(next_text)
+                batch_num += 1
+                if batch_model != routing["model"]:
+                    routing["fallbacks"] += 1
+                task = asyncio.ensure_future(hedged_translate_batch(
+                    client, system_instruction, make_prompt(texts, context), cache, max_retries, batch_num,
+                    batch_num + len(pending) + len(retry_pending), batch_model, batch_controller, routing
+                ))
+                in_flight[task] = [(hash_, text, context) for hash_, text in texts.items()]
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                batch_items = in_flight.pop(finished)
+                stats = finished.result()
+                model_controller(routing, stats["model"]).record(stats["latency"], stats["rate_limited"], stats["parse_failed"])
+                routing["breakers"][stats["model"]].record(stats["failed"])
+                if stats["failed"] and stats["model"] == routing["model"] and routing["fallback_model"] and batch_items[0][0] not in requeued:
+                    # Einmal mit dem Fallback-Modell wiederholen; der Fortschritt zählt erst danach
+                    requeued.update(hash_ for hash_, _, _ in batch_items)
+                    retry_pending.extend(batch_items)
+                    continue
+                if progress is not None:
+                    progress.record_batch(stats["segments"], stats["tokens"], stats["retries"])
+
+    async def translate_batch(client: AsyncOpenAI, system_instruction: str, prompt_data: Dict, cache: Dict, max_retries: int, batch_num: int, total_batches: int, model: str) -> Dict:
+        """Translates a single batch (async) and returns its segment, token and retry counts.
+
+        latency (duration of the last request), rate_limited (429 seen) and parse_failed (malformed
+        or incomplete JSON) are reported for the BatchController; failed (no usable answer after all
+        attempts) feeds the circuit breaker.
+        """
+        stats = {"segments": len(prompt_data["texts"]), "tokens": 0, "retries": 0,
+                 "latency": 0.0, "rate_limited": False, "parse_failed": False, "failed": True}
         for attempt in range(max_retries):
+            stats["retries"] = attempt
+            started = time.monotonic()
             try:
                 response = await client.chat.completions.create(
                     model=model,
@@ -437,32 +1082,169 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
                     timeout=60,
                     response_format={"type": "json_object"}
                 )
+                stats["latency"] = time.monotonic() - started
+                if response.usage is not None:
+                    stats["tokens"] += response.usage.total_tokens
                 output = response.choices[0].message.content.strip()
 
-                for parse_attempt in range(max_retries):
-                    try:
-                        result = json.loads(output)
-                        translations = result.get("translations", {})
-                        for hash_, translated_text in translations.items():
-                            # Ensure proper encoding of translated text
-                            clean_translated_text = safe_text_extraction(translated_text)
-                            cache[hash_] = clean_translated_text
-                        break
-                    except (json.JSONDecodeError, KeyError) as e:
-                        if parse_attempt == max_retries - 1:
-                            pass
-                    except Exception as e:
-                        pass
-                else:
+                try:
+                    translations = json.loads(output).get("translations", {})
+                except (json.JSONDecodeError, AttributeError):
+                    stats["parse_failed"] = True
                     continue
+                for hash_, translated_text in translations.items():
+                    # Ensure proper encoding of translated text
+                    cache[hash_] = safe_text_extraction(translated_text)
+                # Fehlende Hashes (typisch für zu große Batches) zählen ebenfalls als Parse-Fehler
+                if any(hash_ not in translations for hash_ in prompt_data["texts"]):
+                    stats["parse_failed"] = True
+                stats["failed"] = False
                 break
 
+            except openai.RateLimitError:
+                stats["latency"] = time.monotonic() - started
+                stats["rate_limited"] = True
+                await asyncio.sleep(2 ** attempt)
             except Exception as e:
-                if attempt == max_retries - 1:
+                stats["latency"] = time.monotonic() - started
+        return stats
+
+    # ===== SPECULATIVE PRE-TRANSLATION =====
+    async def pretranslate_segments(text_entries: List[Dict], target_language: str, speculative_cache: Dict, model: str, system_prompt: str, api_key: str, skip_target_language: bool = True, term_base: TermBase = None, max_retries: int = 3) -> None:
+        """Translates the short segments of a document into speculative_cache without any UI output.
+
+        Runs in a background thread while the user is still adjusting the settings. Long segments,
+        language-skipped segments, glossary verification and QA are left to the regular run, which
+        picks up the results via its pretranslated argument.
+        """
+        cache_key_base = model + (system_prompt or DEFAULT_SYSTEM_PROMPT)
+        texts_to_translate = {}
+        for entry in text_entries:
+            clean_text = safe_text_extraction(entry["text"])
+            if estimate_tokens(clean_text) > LONG_SEGMENT_TOKEN_LIMIT:
+                continue
+            if skip_target_language:
+                detection_text = RUN_MARKER_TAG_PATTERN.sub("", clean_text)
+                detected_language, _ = detect_language(detection_text)
+                if detected_language == NEUTRAL or is_reliably_language(detection_text, target_language):
+                    continue
+            texts_to_translate[generate_prompt_hash(clean_text + cache_key_base)] = clean_text
+
+        client = AsyncOpenAI(api_key=api_key, timeout=60.0)
+        system_instruction = build_batch_system_instruction(target_language, system_prompt)
+
+        def make_prompt(texts: Dict, context: str = None) -> Dict:
+            prompt_data = {"texts": texts, "target_language": target_language, "instructions": BATCH_INSTRUCTIONS}
+            attach_glossary(prompt_data, term_base)
+            return prompt_data
+
+        controller = BatchController.for_model(model)
+        work_items = [(hash_, text, None) for hash_, text in texts_to_translate.items()]
+        # Startet mit den abgestimmten Werten, speichert aber nicht: die Tuning-Datei schreibt nur der reguläre Lauf
+        await run_adaptive_batches(client, system_instruction, work_items, make_prompt, speculative_cache, max_retries, model, controller)
+
+    def start_speculation(key: str, file_bytes: bytes, file_type: str, target_language: str, model: str, system_prompt: str, api_key: str, skip_target_language: bool, term_base: TermBase) -> Dict:
+        """Starts extraction and pre-translation of an upload in a background thread."""
+        speculation = {"key": key, "cache": {}, "status": "läuft", "segments": None,
+                       "cancelled": threading.Event(), "loop": None, "task": None}
+        extract_function, suffix = {
+            'word': (extract_text_from_document, '.docx'),
+            'excel': (extract_text_from_excel, '.xlsx'),
+            'powerpoint': (extract_text_from_presentation, '.pptx'),
+        }[file_type]
+
+        def worker():
+            loop = asyncio.new_event_loop()
+            speculation["loop"] = loop
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_input:
+                temp_input.write(file_bytes)
+                temp_input_path = temp_input.name
+            try:
+                text_data = extract_function(temp_input_path)
+                speculation["segments"] = len(text_data)
+                if speculation["cancelled"].is_set():
+                    raise asyncio.CancelledError()
+                speculation["task"] = loop.create_task(pretranslate_segments(
+                    text_data, target_language, speculation["cache"], model, system_prompt, api_key, skip_target_language, term_base
+                ))
+                loop.run_until_complete(speculation["task"])
+                speculation["status"] = "fertig"
+            except asyncio.CancelledError:
+                speculation["status"] = "abgebrochen"
+            except Exception:
+                speculation["status"] = "fehlgeschlagen"
+            finally:
+                loop.close()
+                try:
+                    os.unlink(temp_input_path)
+                except:
+                    pass
+
+        threading.Thread(target=worker, daemon=True).start()
+        return speculation
+
+    def cancel_speculation(speculation: Dict) -> None:
+        """Stops a running speculation; results that already arrived stay in its cache."""
+        speculation["cancelled"].set()
+        loop, task = speculation.get("loop"), speculation.get("task")
+        if loop is not None and task is not None and not task.done():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Loop ist bereits geschlossen
+                pass
+
+    # ===== UPDATE MODE (REVISED DOCUMENTS) =====
+    def carry_over_previous_translations(text_data: List[Dict], previous_files, extract_function, suffix: str, cache: Dict, cache_key_base: str) -> int:
+        """Seeds the cache with the translations of unchanged segments from a previous revision.
+
+        previous_files is (previous source file, its translated output). Segments are aligned by
+        locator (element_id) and content: a segment whose text is unchanged at the same locator takes
+        the translation from there; otherwise an identical source text anywhere in the previous
+        revision is used. Returns the number of segments carried over.
+        """
+        previous_paths = []
+        try:
+            for previous_file in previous_files:
+                previous_file.seek(0)
+                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_previous:
+                    temp_previous.write(previous_file.read())
+                    previous_paths.append(temp_previous.name)
+            previous_source = {entry["element_id"]: entry["text"] for entry in extract_function(previous_paths[0])}
+            previous_target = {entry["element_id"]: entry["text"] for entry in extract_function(previous_paths[1])}
+        finally:
+            for path in previous_paths:
+                try:
+                    os.unlink(path)
+                except:
                     pass
 
+        # Ausgangstext -> Übersetzung der Vorversion (Fallback, wenn sich die Position verschoben hat)
+        translation_by_text = {
+            source_text: previous_target[element_id]
+            for element_id, source_text in previous_source.items()
+            if element_id in previous_target
+        }
+
+        carried = 0
+        for entry in text_data:
+            clean_text = safe_text_extraction(entry["text"])
+            element_id = entry["element_id"]
+            if previous_source.get(element_id) == clean_text and element_id in previous_target:
+                translation = previous_target[element_id]
+            else:
+                translation = translation_by_text.get(clean_text)
+            if translation is None:
+                continue
+            cache[generate_prompt_hash(clean_text + cache_key_base)] = translation
+            carried += 1
+
+        st.info(f"🔁 Aktualisierung: {carried} von {len(text_data)} Segmenten aus der Vorversion übernommen, "
+                f"{len(text_data) - carried} neue oder geänderte Segmente werden übersetzt")
+        return carried
+
     # ===== TRANSLATION FUNCTIONS FOR EACH FILE TYPE =====
-    async def translate_document(document_file, target_language: str, model: str = "gpt-4.1-mini", system_prompt: str = None) -> bytes:
+    async def translate_document(document_file, target_language: str, model: str = "gpt-4.1-mini", system_prompt: str = None, skip_target_language: bool = True, term_base: TermBase = None, previous_files=None, pretranslated: Dict = None, fallback_model: str = None, cascade: bool = False) -> bytes:
         """Translates a Word document and returns the translated version as bytes."""
         
         # Create temporary files with proper encoding
@@ -481,65 +1263,42 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
 
             # Initialize cache for this session
             cache = {}
+            if previous_files:
+                carry_over_previous_translations(text_data, previous_files, extract_text_from_document, '.docx', cache, model + (system_prompt or DEFAULT_SYSTEM_PROMPT))
 
-            await batch_translate_texts_with_openai(text_data, target_language, cache, model, system_prompt)
+            await batch_translate_texts_with_openai(text_data, target_language, cache, model, system_prompt, skip_target_language=skip_target_language, term_base=term_base, pretranslated=pretranslated, fallback_model=fallback_model, cascade=cascade)
 
             # Load the document
             doc = Document(temp_input_path)
 
-            # Apply translations
-            translated_text_data = []
+            # Apply translations (O(1) lookup per paragraph via element_id)
+            translations_by_element = {}
             cache_key_base = model + (system_prompt or DEFAULT_SYSTEM_PROMPT)
             
             for text_entry in text_data:
                 clean_text = safe_text_extraction(text_entry["text"])
                 cache_key = clean_text + cache_key_base
                 prompt_hash = generate_prompt_hash(cache_key)
-                translated_text = cache.get(prompt_hash, clean_text)
-                translated_text_entry = text_entry.copy()
-                translated_text_entry["translated_text"] = translated_text
-                translated_text_data.append(translated_text_entry)
+                translations_by_element[text_entry["element_id"]] = cache.get(prompt_hash, clean_text)
 
-            # Replace text in paragraphs
-            for para_index, paragraph in enumerate(doc.paragraphs):
-                element_id = f"para_{para_index}"
-                translated_entry = next((entry for entry in translated_text_data 
-                                       if entry.get("element_id") == element_id), None)
-                if translated_entry:
-                    try:
-                        # Preserve formatting by replacing runs
-                        if paragraph.runs:
-                            # Clear existing text
-                            for run in paragraph.runs:
-                                run.text = ""
-                            # Set translated text in first run
-                            paragraph.runs[0].text = translated_entry["translated_text"]
-                        else:
-                            # If no runs, set paragraph text directly
-                            paragraph.text = translated_entry["translated_text"]
-                    except Exception as e:
-                        continue
+            raw_roots = []
+            for element_id, _, p_element in iter_document_stories(doc, raw_roots):
+                translated_text = translations_by_element.get(element_id)
+                if translated_text is None:
+                    continue
+                try:
+                    # Translated text goes into the first text node; runs, images and text boxes stay in place
+                    text_nodes = paragraph_text_nodes(p_element)
+                    text_nodes[0].text = translated_text
+                    text_nodes[0].set(XML_SPACE_ATTRIBUTE, "preserve")
+                    for text_node in text_nodes[1:]:
+                        text_node.text = ""
+                except Exception as e:
+                    continue
 
-            # Replace text in tables
-            for table_index, table in enumerate(doc.tables):
-                for row_index, row in enumerate(table.rows):
-                    for col_index, cell in enumerate(row.cells):
-                        element_id = f"table_{table_index}_row_{row_index}_col_{col_index}"
-                        translated_entry = next((entry for entry in translated_text_data 
-                                               if entry.get("element_id") == element_id), None)
-                        if translated_entry:
-                            try:
-                                # Clear and set new text for cell
-                                for paragraph in cell.paragraphs:
-                                    if paragraph.runs:
-                                        for run in paragraph.runs:
-                                            run.text = ""
-                                        paragraph.runs[0].text = translated_entry["translated_text"]
-                                    else:
-                                        paragraph.text = translated_entry["translated_text"]
-                                    break  # Only update first paragraph in cell
-                            except Exception as e:
-                                continue
+            # Fußnoten/Endnoten werden von python-docx nicht als XML-Part geladen
+            for part, root in raw_roots:
+                part._blob = serialize_docx_xml(root)
 
             doc.save(temp_output_path)
             
@@ -560,7 +1319,7 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
             except:
                 pass
 
-    async def translate_excel(excel_file, target_language: str, model: str = "gpt-4.1-mini", system_prompt: str = None) -> bytes:
+    async def translate_excel(excel_file, target_language: str, model: str = "gpt-4.1-mini", system_prompt: str = None, skip_target_language: bool = True, term_base: TermBase = None, previous_files=None, pretranslated: Dict = None, fallback_model: str = None, cascade: bool = False) -> bytes:
         """Translates an Excel file and returns the translated version as bytes."""
         
         # Create temporary files with proper encoding
@@ -579,8 +1338,10 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
 
             # Initialize cache for this session
             cache = {}
+            if previous_files:
+                carry_over_previous_translations(text_data, previous_files, extract_text_from_excel, '.xlsx', cache, model + (system_prompt or DEFAULT_SYSTEM_PROMPT))
 
-            await batch_translate_texts_with_openai(text_data, target_language, cache, model, system_prompt)
+            await batch_translate_texts_with_openai(text_data, target_language, cache, model, system_prompt, skip_target_language=skip_target_language, term_base=term_base, pretranslated=pretranslated, fallback_model=fallback_model, cascade=cascade)
 
             # Load the workbook
             workbook = load_workbook(temp_input_path)
@@ -631,7 +1392,7 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
             except:
                 pass
 
-    async def translate_presentation(presentation_file, target_language: str, model: str = "gpt-4.1-mini", system_prompt: str = None) -> bytes:
+    async def translate_presentation(presentation_file, target_language: str, model: str = "gpt-4.1-mini", system_prompt: str = None, skip_target_language: bool = True, term_base: TermBase = None, previous_files=None, pretranslated: Dict = None, fallback_model: str = None, cascade: bool = False) -> bytes:
         """Translates a PowerPoint presentation and returns the translated version as bytes."""
         
         # Create temporary files with proper encoding
@@ -650,8 +1411,10 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
 
             # Initialize cache for this session
             cache = {}
+            if previous_files:
+                carry_over_previous_translations(text_data, previous_files, extract_text_from_presentation, '.pptx', cache, model + (system_prompt or DEFAULT_SYSTEM_PROMPT))
 
-            await batch_translate_texts_with_openai(text_data, target_language, cache, model, system_prompt)
+            await batch_translate_texts_with_openai(text_data, target_language, cache, model, system_prompt, skip_target_language=skip_target_language, term_base=term_base, pretranslated=pretranslated, fallback_model=fallback_model, cascade=cascade)
 
             # Load and save the presentation
             prs = Presentation(temp_input_path)
@@ -659,49 +1422,30 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
 
             translated_prs = Presentation(temp_output_path)
 
-            # Apply translations
-            translated_text_data = []
+            # Apply translations (O(1) lookup per paragraph via element_id)
+            translations_by_element = {}
             cache_key_base = model + (system_prompt or DEFAULT_SYSTEM_PROMPT)
             
             for text_entry in text_data:
                 clean_text = safe_text_extraction(text_entry["text"])
                 cache_key = clean_text + cache_key_base
                 prompt_hash = generate_prompt_hash(cache_key)
-                translated_text = cache.get(prompt_hash, clean_text)
-                translated_text_entry = text_entry.copy()
-                translated_text_entry["translated_text"] = translated_text
-                translated_text_data.append(translated_text_entry)
-
-            for slide_number, slide in enumerate(translated_prs.slides, start=1):
-                for shape_index, shape in enumerate(slide.shapes):
-                    shape_id = f"slide{slide_number}_shape{shape_index}"
+                translations_by_element[text_entry["element_id"]] = cache.get(prompt_hash, clean_text)
 
-                    if shape.has_text_frame:
-                        try:
-                            text_frame = shape.text_frame
-                            for paragraph in text_frame.paragraphs:
-                                for run in paragraph.runs:
-                                    if run.text.strip():
-                                        clean_original_text = safe_text_extraction(run.text)
-                                        for entry in translated_text_data:
-                                            if entry["shape_id"] == shape_id and safe_text_extraction(entry["text"]) == clean_original_text:
-                                                # Ensure proper encoding when setting the text
-                                                run.text = entry["translated_text"]
-                                                break
-                        except Exception as e:
-                            continue
+            smartart_roots = []
+            for story_id, _, _, paragraphs in iter_presentation_stories(translated_prs, smartart_roots):
+                for paragraph_index, paragraph in enumerate(paragraphs):
+                    translated_text = translations_by_element.get(f"{story_id}_para{paragraph_index}")
+                    if translated_text is None:
+                        continue
+                    try:
+                        apply_marked_paragraph_text(paragraph, translated_text)
+                    except Exception as e:
+                        continue
 
-                    elif shape.has_table:
-                        try:
-                            for row_idx, row in enumerate(shape.table.rows):
-                                for col_idx, cell in enumerate(row.cells):
-                                    cell_shape_id = f"{shape_id}_row{row_idx}_col{col_idx}"
-                                    cell_translated_text_entry = next((entry for entry in translated_text_data if entry["shape_id"] == cell_shape_id), None)
-                                    if cell_translated_text_entry:
-                                        # Ensure proper encoding when setting the text
-                                        cell.text = cell_translated_text_entry["translated_text"]
-                        except Exception as e:
-                            continue
+            # SmartArt-Parts sind keine XML-Parts von python-pptx und müssen neu serialisiert werden
+            for part, root in smartart_roots:
+                part._blob = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
 
             translated_prs.save(temp_output_path)
             
@@ -751,6 +1495,22 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
         )
         
         selected_model = MODEL_OPTIONS[selected_model_name]
+
+        fallback_options = ["Keins"] + [name for name in MODEL_OPTIONS if name != selected_model_name]
+        fallback_model_name = st.selectbox(
+            "Fallback-Modell",
+            options=fallback_options,
+            index=1 if len(fallback_options) > 1 else 0,
+            help="Fällt das gewählte Modell während der Übersetzung wiederholt aus, werden die restlichen Batches automatisch an dieses Modell geschickt."
+        )
+        fallback_model = MODEL_OPTIONS.get(fallback_model_name)
+
+        cascade_mode = st.checkbox(
+            "🪜 Kaskade (günstiges Modell zuerst)",
+            value=False,
+            disabled=selected_model == CASCADE_DRAFT_MODEL,
+            help=f"Einfache Segmente werden zuerst mit {CASCADE_DRAFT_MODEL} übersetzt. Nur lange oder komplexe Segmente und Entwürfe, die die lokale QA-Prüfung nicht bestehen, gehen an das gewählte Modell."
+        )
         
         # Show model info
         if "gpt-5-mini" in selected_model:
@@ -770,6 +1530,31 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
         target_language = LANGUAGE_OPTIONS[selected_language_name]
         
         st.info(f"Ausgewählt: {selected_language_name} ({target_language})")
+
+        skip_target_language = st.checkbox(
+            "Segmente in Zielsprache überspringen",
+            value=True,
+            help="Erkennt die Ausgangssprache jedes Segments offline. Segmente, die bereits in der Zielsprache sind, und Segmente ohne Text (Zahlen, Codes) werden unverändert übernommen und nicht an die API gesendet."
+        )
+
+        term_file = st.file_uploader(
+            "📖 Terminologie (optional)",
+            type=['csv', 'xlsx'],
+            help="CSV- oder Excel-Datei mit Ausgangsbegriff und Zielbegriff (z.B. Spalten 'Quelle' und 'de'). Pro Anfrage werden nur die im Text vorkommenden Begriffe mitgeschickt und die Übersetzungen dagegen geprüft."
+        )
+        term_base = None
+        if term_file is not None:
+            try:
+                term_base = TermBase(read_term_file(term_file.getvalue(), term_file.name, target_language))
+                st.info(f"📖 {len(term_base)} Begriffe geladen")
+            except Exception as e:
+                st.error(f"Terminologie konnte nicht geladen werden: {e}")
+
+        speculative_mode = st.checkbox(
+            "⚡ Spekulative Vorübersetzung",
+            value=False,
+            help="Startet Extraktion und Übersetzung bereits beim Hochladen mit den aktuellen Einstellungen. Beim Klick auf 'Übersetzen' werden fertige Segmente übernommen; ändern sich die Einstellungen, wird die Vorarbeit abgebrochen. Verursacht API-Kosten, auch wenn am Ende nicht übersetzt wird."
+        )
     
     # System prompt customization (collapsed by default)
     with st.expander("⚙️ Systemprompt anpassen (Erweitert)", expanded=False):
@@ -791,6 +1576,9 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
             preview = custom_system_prompt.format(target_language=selected_language_name)
             st.code(preview, language="text")
     
+    # Use custom system prompt if different from default
+    system_prompt_to_use = custom_system_prompt if custom_system_prompt != DEFAULT_SYSTEM_PROMPT else None
+
     # Main content area
     col1, col2 = st.columns([2, 1])
     
@@ -803,6 +1591,7 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
             help="Lade eine Word (.docx), PowerPoint (.pptx) oder Excel (.xlsx/.xls) Datei hoch"
         )
         
+        previous_files = None
         if uploaded_file is not None:
             file_type = detect_file_type(uploaded_file)
             file_icon = get_file_icon(file_type)
@@ -824,6 +1613,44 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
                     uploaded_file.seek(0)  # Reset file pointer again
                 except Exception as e:
                     st.warning(f"Konnte keine Vorschau anzeigen: {e}")
+
+            # Überarbeitete Fassung: nur neue oder geänderte Segmente übersetzen
+            if st.checkbox("🔁 Übersetzung aktualisieren (Vorversion verwenden)",
+                           help="Lade die vorherige Ausgangsdatei und deren Übersetzung hoch. Unveränderte Segmente werden übernommen, nur neue oder geänderte Segmente gehen an die API."):
+                upload_types = [os.path.splitext(uploaded_file.name)[1].lstrip('.').lower()]
+                previous_source_file = st.file_uploader("Vorherige Ausgangsdatei", type=upload_types, key="previous_source_file")
+                previous_translated_file = st.file_uploader("Vorherige Übersetzung", type=upload_types, key="previous_translated_file")
+                if previous_source_file is not None and previous_translated_file is not None:
+                    previous_files = (previous_source_file, previous_translated_file)
+                else:
+                    st.info("Bitte beide Dateien der Vorversion hochladen – sonst wird vollständig übersetzt.")
+
+        # Spekulative Vorübersetzung: läuft im Hintergrund, veraltete Vorarbeit wird abgebrochen
+        speculation = st.session_state.get("speculation")
+        speculation_key = None
+        if uploaded_file is not None and speculative_mode and api_key and not previous_files and file_type in ('word', 'excel', 'powerpoint'):
+            speculation_key = document_cache_key(
+                uploaded_file.getvalue(),
+                file_type=file_type,
+                target_language=target_language,
+                model=selected_model,
+                system_prompt=system_prompt_to_use,
+                skip_target_language=skip_target_language,
+                term_file=term_file.getvalue() if term_base else None,
+                cascade=cascade_mode,
+                fallback_model=fallback_model,
+            )
+        if speculation is not None and speculation["key"] != speculation_key:
+            cancel_speculation(speculation)
+            speculation = st.session_state["speculation"] = None
+        if speculation_key is not None:
+            if speculation is None:
+                speculation = st.session_state["speculation"] = start_speculation(
+                    speculation_key, uploaded_file.getvalue(), file_type, target_language, selected_model,
+                    system_prompt_to_use, api_key, skip_target_language, term_base
+                )
+            segments_text = f" von {speculation['segments']}" if speculation["segments"] is not None else ""
+            st.caption(f"⚡ Vorübersetzung ({speculation['status']}): {len(speculation['cache'])}{segments_text} Segmente bereit")
     
     with col2:
         st.header("🚀 Übersetzung")
@@ -833,61 +1660,116 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
             file_icon = get_file_icon(file_type)
             
             if st.button(f"🌍 {file_icon} Dokument übersetzen", type="primary"):
-                with st.spinner(f"{file_icon} Dokument wird übersetzt..."):
-                    try:
-                        # Reset file pointer
-                        uploaded_file.seek(0)
-                        
-                        # Use custom system prompt if different from default
-                        system_prompt_to_use = custom_system_prompt if custom_system_prompt != DEFAULT_SYSTEM_PROMPT else None
-                        
-                        # Route to appropriate translation function based on file type
-                        if file_type == 'word':
-                            translated_bytes = asyncio.run(
-                                translate_document(uploaded_file, target_language, selected_model, system_prompt_to_use)
-                            )
-                            file_extension = '.docx'
-                            mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        elif file_type == 'excel':
-                            translated_bytes = asyncio.run(
-                                translate_excel(uploaded_file, target_language, selected_model, system_prompt_to_use)
-                            )
-                            file_extension = '.xlsx'
-                            mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        elif file_type == 'powerpoint':
-                            translated_bytes = asyncio.run(
-                                translate_presentation(uploaded_file, target_language, selected_model, system_prompt_to_use)
-                            )
-                            file_extension = '.pptx'
-                            mime_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                        else:
-                            st.error("Nicht unterstützter Dateityp!")
+                # Reset file pointer
+                uploaded_file.seek(0)
+
+                # Fertige Segmente der Vorübersetzung übernehmen, Restarbeit übernimmt der reguläre Lauf
+                pretranslated = None
+                if speculation is not None:
+                    # Bleibt in der Sitzung, damit sie bei unveränderten Einstellungen nicht neu startet
+                    cancel_speculation(speculation)
+                    pretranslated = dict(speculation["cache"])
+
+                if file_type == 'word':
+                    file_extension = '.docx'
+                    mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                elif file_type == 'excel':
+                    file_extension = '.xlsx'
+                    mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                else:
+                    file_extension = '.pptx'
+                    mime_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+                # Identische Uploads mit identischen Einstellungen kommen direkt aus dem Dokument-Cache
+                document_cache = DocumentCache()
+                document_key = document_cache_key(
+                    uploaded_file.getvalue(),
+                    file_type=file_type,
+                    target_language=target_language,
+                    model=selected_model,
+                    system_prompt=system_prompt_to_use,
+                    skip_target_language=skip_target_language,
+                    term_file=term_file.getvalue() if term_base else None,
+                    cascade=cascade_mode,
+                    fallback_model=fallback_model,
+                    previous_files=[previous_file.getvalue() for previous_file in previous_files] if previous_files else None,
+                )
+                cached_document = document_cache.get(document_key)
+
+                if cached_document is not None:
+                    translated_bytes, document_metadata = cached_document
+                    qa_records = document_metadata.get("qa_report")
+                    st.session_state["qa_report"] = pd.DataFrame(qa_records) if qa_records else None
+                    st.success("⚡ Dieses Dokument wurde mit denselben Einstellungen bereits übersetzt – Ergebnis aus dem Cache.")
+                else:
+                    with st.spinner(f"{file_icon} Dokument wird übersetzt..."):
+                        try:
+                            # Route to appropriate translation function based on file type
+                            if file_type == 'word':
+                                translated_bytes = asyncio.run(
+                                    translate_document(uploaded_file, target_language, selected_model, system_prompt_to_use, skip_target_language, term_base, previous_files, pretranslated, fallback_model, cascade_mode)
+                                )
+                            elif file_type == 'excel':
+                                translated_bytes = asyncio.run(
+                                    translate_excel(uploaded_file, target_language, selected_model, system_prompt_to_use, skip_target_language, term_base, previous_files, pretranslated, fallback_model, cascade_mode)
+                                )
+                            elif file_type == 'powerpoint':
+                                translated_bytes = asyncio.run(
+                                    translate_presentation(uploaded_file, target_language, selected_model, system_prompt_to_use, skip_target_language, term_base, previous_files, pretranslated, fallback_model, cascade_mode)
+                                )
+                            else:
+                                st.error("Nicht unterstützter Dateityp!")
+                                translated_bytes = None
+                        except Exception as e:
+                            st.error(f"Ein Fehler ist aufgetreten: {str(e)}")
                             translated_bytes = None
-                        
-                        if translated_bytes:
-                            # Generate download filename
-                            original_name = uploaded_file.name
-                            for ext in ['.docx', '.pptx', '.xlsx', '.xls']:
-                                original_name = original_name.replace(ext, '')
-                            
-                            model_suffix = "mini" if "mini" in selected_model else "4o"
-                            download_filename = f"{original_name}_übersetzt_{target_language}_{model_suffix}{file_extension}"
-                            
-                            st.success(f"🎉 {file_icon} Übersetzung abgeschlossen!")
-                            
-                            # Download button
-                            st.download_button(
-                                label=f"📥 {file_icon} Übersetztes Dokument herunterladen",
-                                data=translated_bytes,
-                                file_name=download_filename,
-                                mime=mime_type
-                            )
-                        else:
-                            st.error("Übersetzung fehlgeschlagen. Bitte versuche es erneut.")
-                            
-                    except Exception as e:
-                        st.error(f"Ein Fehler ist aufgetreten: {str(e)}")
-        
+
+                    if translated_bytes and st.session_state.get("untranslated_segments"):
+                        # Teilweise übersetzte Dokumente (API-Fehler, Rate-Limit) nicht für spätere Sitzungen speichern
+                        st.warning("Das Dokument wurde nicht vollständig übersetzt und daher nicht zwischengespeichert.")
+                    elif translated_bytes:
+                        qa_report = st.session_state.get("qa_report")
+                        document_cache.put(document_key, translated_bytes, {
+                            "file_name": uploaded_file.name,
+                            "target_language": target_language,
+                            "model": selected_model,
+                            "qa_report": qa_report.to_dict("records") if qa_report is not None else None,
+                        })
+                        st.success(f"🎉 {file_icon} Übersetzung abgeschlossen!")
+
+                if translated_bytes:
+                    # Generate download filename
+                    original_name = uploaded_file.name
+                    for ext in ['.docx', '.pptx', '.xlsx', '.xls']:
+                        original_name = original_name.replace(ext, '')
+
+                    model_suffix = "mini" if "mini" in selected_model else "4o"
+                    download_filename = f"{original_name}_übersetzt_{target_language}_{model_suffix}{file_extension}"
+
+                    # Download button
+                    st.download_button(
+                        label=f"📥 {file_icon} Übersetztes Dokument herunterladen",
+                        data=translated_bytes,
+                        file_name=download_filename,
+                        mime=mime_type
+                    )
+
+                    qa_report = st.session_state.get("qa_report")
+                    if qa_report is not None and not qa_report.empty:
+                        flagged_report = qa_report[qa_report["QA"] != ""]
+                        with st.expander(f"🔍 QA-Bericht ({len(flagged_report)} auffällige Segmente)", expanded=not flagged_report.empty):
+                            st.dataframe(flagged_report, use_container_width=True)
+                        report_buffer = BytesIO()
+                        qa_report.to_excel(report_buffer, index=False, sheet_name="QA-Bericht")
+                        st.download_button(
+                            label="📥 QA-Bericht herunterladen",
+                            data=report_buffer.getvalue(),
+                            file_name=f"{os.path.splitext(download_filename)[0]}_QA.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
+                else:
+                    st.error("Übersetzung fehlgeschlagen. Bitte versuche es erneut.")
+
         elif not api_key:
             st.warning("⚠️ Bitte gib deinen OpenAI API-Schlüssel in der Seitenleiste ein")
         elif uploaded_file is None:
@@ -898,8 +1780,8 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
         st.markdown("""
         | Format | Dateierweiterung | Was wird übersetzt | 
         |--------|------------------|-------------------|
-        | **📄 Word** | .docx | Paragraphen, Überschriften, Tabellen |
-        | **📊 PowerPoint** | .pptx | Folieninhalte, Titel, Tabellen |
+        | **📄 Word** | .docx | Paragraphen, Überschriften, Tabellen (auch verschachtelt), Textfelder, Kopf- und Fußzeilen, Fußnoten, Kommentare |
+        | **📊 PowerPoint** | .pptx | Folieninhalte, Titel, Tabellen, Gruppen, Diagrammtitel, SmartArt, Sprechernotizen |
         | **📈 Excel** | .xlsx, .xls | Textinhalte in Zellen (alle Arbeitsblätter) |
         
         **Was wird NICHT übersetzt:**
@@ -949,6 +1831,10 @@ Gib die Übersetzungen als JSON-Objekt genau wie folgt zurück:
         - **Formatierung bleibt erhalten** nach der Übersetzung
         - **Batch-Verarbeitung** für effiziente Übersetzung großer Dokumente
         - **Caching** verhindert doppelte Übersetzungen identischer Texte
+        - **QA-Bericht**: lokale Prüfung auf Platzhalter, Zahlen/Datum, Länge, unübersetzte Texte und falsche Schrift; auffällige Segmente werden automatisch erneut übersetzt
+        - **Übersetzung aktualisieren**: Bei überarbeiteten Fassungen werden unveränderte Segmente aus der Vorversion übernommen
+        - **Kaskade** (optional): Einfache Segmente übersetzt zuerst das günstigste Modell, nur auffällige oder komplexe Segmente das gewählte Modell
+        - **Terminologie** (optional): Kundenbegriffe aus CSV/Excel werden pro Anfrage mitgeschickt und in den Übersetzungen geprüft
         
         **⏱️ Hinweis**: Der Übersetzungsprozess kann je nach Größe deines Dokuments einige Minuten dauern.
         """)